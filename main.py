@@ -3,10 +3,10 @@
 GreenPulse - Unified CLI for ESG data analysis and reporting
 """
 import argparse
+import json
 import sys
 import subprocess
 from pathlib import Path
-import pandas as pd
 import os
 
 # Add project root to path
@@ -15,37 +15,89 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from src.analysis.emissions_analysis import analyze_emissions_data
+from src.data_fetch.repository import get_repository
 
 
-def fetch_data():
+def fetch_data(incremental=False, sequential=False, result_path=None):
     """Fetch all data from available sources"""
+    from src.data_fetch.fetch_all import run_fetch
+    
     print("🔄 Fetching data from all sources...")
-    fetch_script = project_root / "src" / "data_fetch" / "fetch_all.py"
     
     try:
-        result = subprocess.run([
-            sys.executable, str(fetch_script)
-        ], cwd=project_root, check=True)
-        print("✅ Data fetch completed successfully!")
-        return 0
-    except subprocess.CalledProcessError as e:
+        result = run_fetch(concurrent=not sequential, incremental=incremental)
+    except Exception as e:
         print(f"❌ Data fetch failed: {e}")
         return 1
+    
+    if result_path:
+        Path(result_path).write_text(json.dumps(result.to_dict(), indent=2), encoding='utf-8')
+        print(f"📝 Fetch result written to {result_path}")
+    
+    failed = [name for name, source in result.sources.items() if not source.ok]
+    if failed:
+        print(f"❌ Data fetch failed for: {', '.join(name.upper() for name in failed)}")
+        return 1
+    
+    print("✅ Data fetch completed successfully!")
+    return 0
+
+
+def backfill_elhub(start, end, areas=None, entity='price-areas', window_days=7, workers=4):
+    """Backfill Elhub hourly data for a date range"""
+    from datetime import datetime
+    from src.data_fetch.sources.elhub import backfill_elhub_data
+    
+    try:
+        summary = backfill_elhub_data(
+            datetime.fromisoformat(start),
+            datetime.fromisoformat(end),
+            areas=areas,
+            entity_param=entity,
+            window_days=window_days,
+            max_workers=workers
+        )
+    except ValueError as e:
+        print(f"❌ Invalid backfill arguments: {e}")
+        return 1
+    
+    if summary['failed']:
+        print(f"⚠️ {len(summary['failed'])} windows failed - run the same command again to retry them")
+        return 1
+    return 0
+
+
+def reprocess_snapshot(source, sha256=None, list_only=False):
+    """Rebuild a source's outputs from an archived raw response"""
+    from src.data_fetch.fetch_all import reprocess_snapshot as reprocess
+    from src.data_fetch.files import DataFileManager
+    
+    file_manager = DataFileManager()
+    
+    if list_only:
+        entries = file_manager.archive.entries(source)
+        print(f"🗄️ {len(entries)} archived {source.upper()} snapshots:")
+        for entry in entries:
+            print(f"  {entry['sha256'][:12]}  {entry['fetched_at']}  {entry['size']:>12,} bytes")
+        return 0
+    
+    return 0 if reprocess(source, sha256, file_manager) else 1
 
 
 def run_analysis():
     """Run emissions analysis only"""
     print("📊 Running emissions analysis...")
     
-    data_path = project_root / "data" / "processed" / "ssb_emissions_clean.csv"
+    repository = get_repository()
+    emissions_df = repository.ssb_emissions()
     
-    if not data_path.exists():
-        print(f"❌ Emissions data not found at {data_path}")
+    if emissions_df is None:
+        print(f"❌ Emissions data not found at {repository.path('ssb_emissions_clean')}")
         print("🔄 Run 'python main.py fetch' first")
         return 1
     
     try:
-        results = analyze_emissions_data(data_path)
+        results = analyze_emissions_data(emissions_df)
         print(results['summary_report'])
         
         # Show forecast
@@ -65,14 +117,11 @@ def run_analysis():
         return 1
 
 
-def analyze_company_efficiency(companies_path, projects_path):
+def analyze_company_efficiency(companies_df, projects_df):
     """Analyze company efficiency data"""
-    if not companies_path.exists() or not projects_path.exists():
+    if companies_df is None or projects_df is None:
         return None
     
-    companies_df = pd.read_csv(companies_path)
-    projects_df = pd.read_csv(projects_path)
-    
     # Company efficiency summary
     total_companies = len(companies_df)
     total_investment = companies_df['total_investment_nok'].sum()
@@ -192,25 +241,25 @@ def run_comprehensive_analysis():
     """Run comprehensive ESG analysis"""
     print("🚀 Starting comprehensive ESG analysis...")
     
-    data_dir = project_root / "data" / "processed"
+    repository = get_repository()
     
     # Analyze emissions data
     emissions_results = None
-    emissions_path = data_dir / "ssb_emissions_clean.csv"
-    if emissions_path.exists():
+    emissions_df = repository.ssb_emissions()
+    if emissions_df is not None:
         print("📊 Analyzing national emissions data...")
-        emissions_results = analyze_emissions_data(emissions_path)
+        emissions_results = analyze_emissions_data(emissions_df)
     else:
         print("⚠️ No emissions data found")
     
     # Analyze company efficiency data
     efficiency_results = None
-    companies_path = data_dir / "company_efficiency_summary.csv"
-    projects_path = data_dir / "efficiency_projects.csv"
+    companies_df = repository.company_efficiency()
+    projects_df = repository.efficiency_projects()
     
-    if companies_path.exists() and projects_path.exists():
+    if companies_df is not None and projects_df is not None:
         print("🏭 Analyzing company efficiency data...")
-        efficiency_results = analyze_company_efficiency(companies_path, projects_path)
+        efficiency_results = analyze_company_efficiency(companies_df, projects_df)
     else:
         print("⚠️ No company efficiency data found")
     
@@ -235,6 +284,53 @@ def run_comprehensive_analysis():
     return 0
 
 
+def run_pipeline(incremental=False, force=False, workers=4):
+    """Fetch, process and report as a pipeline, skipping stages with unchanged inputs"""
+    from src.data_fetch.fetch_all import build_fetch_pipeline
+    from src.data_fetch.pipeline import Stage, print_pipeline_report
+    
+    pipeline = build_fetch_pipeline(incremental=incremental, max_workers=workers)
+    processed = pipeline.file_manager.processed_dir
+    
+    pipeline.add(Stage(
+        'esg_report',
+        lambda: run_comprehensive_analysis() == 0,
+        inputs=[processed / "ssb_emissions_clean.arrow",
+                processed / "company_efficiency_summary.arrow",
+                processed / "efficiency_projects.arrow"],
+        outputs=[project_root / "reports" / "esg_analysis_report.txt"]
+    ))
+    
+    report = pipeline.run(force=force)
+    print_pipeline_report(report)
+    
+    failed = [name for name, result in report['stages'].items() if result['status'] in ('failed', 'blocked')]
+    return 1 if failed else 0
+
+
+def serve_stand_in(cassette, port=8765, latency=0.0, jitter=0.0, error_rate=0.0, scale=1, seed=None):
+    """Replay recorded API responses from a local stand-in server"""
+    from src.data_fetch.replay import StandInServer
+    
+    cassette = Path(cassette)
+    if not cassette.exists():
+        print(f"❌ No cassette at {cassette} - record one with HTTP_RECORD_DIR={cassette} python main.py fetch")
+        return 1
+    
+    server = StandInServer(cassette, port=port, latency=latency, jitter=jitter,
+                           error_rate=error_rate, payload_scale=scale, seed=seed)
+    print(f"🎞️ Replaying {len(server.cassette)} recorded responses at {server.url}")
+    print(f"📝 Point fetches at it with HTTP_REPLAY_URL={server.url}; press Ctrl+C to stop")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n👋 Stand-in server stopped after {server.stats['requests']} requests")
+    finally:
+        server.stop()
+    return 0
+
+
 def launch_dashboard():
     """Launch the Streamlit dashboard"""
     print("🚀 Launching GreenPulse Dashboard...")
@@ -272,9 +368,13 @@ def main():
         epilog="""
 Examples:
   python main.py fetch                    # Fetch all data sources
+  python main.py backfill --start 2024-01-01 --end 2025-01-01   # Backfill Elhub hourly data
+  python main.py reprocess ssb            # Rebuild SSB outputs from the latest archived response
   python main.py analyze                  # Run emissions analysis only
   python main.py comprehensive            # Run full ESG analysis
+  python main.py pipeline --incremental   # Fetch, process and report, skipping unchanged stages
   python main.py dashboard                # Launch interactive dashboard
+  python main.py standin data/cassettes/nightly --latency 0.2   # Replay recorded responses offline
   
   # Complete workflow:
   python main.py fetch && python main.py comprehensive && python main.py dashboard
@@ -284,12 +384,52 @@ Examples:
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # Fetch command
-    subparsers.add_parser('fetch', help='Fetch data from all available sources')
+    fetch_parser = subparsers.add_parser('fetch', help='Fetch data from all available sources')
+    fetch_parser.add_argument('--incremental', action='store_true',
+                              help='Skip downloads and writes for sources with no new data')
+    fetch_parser.add_argument('--sequential', action='store_true',
+                              help='Fetch sources one after another instead of concurrently')
+    fetch_parser.add_argument('--result-json', metavar='PATH',
+                              help='Write per-source status, rows, bytes and durations as JSON')
+    
+    # Backfill command
+    backfill_parser = subparsers.add_parser('backfill', help='Backfill Elhub hourly data for a date range')
+    backfill_parser.add_argument('--start', required=True, help='Range start (ISO date, e.g. 2024-01-01)')
+    backfill_parser.add_argument('--end', required=True, help='Range end, exclusive (ISO date)')
+    backfill_parser.add_argument('--areas', nargs='+', help='Area identifiers (default: NO1-NO5)')
+    backfill_parser.add_argument('--entity', default='price-areas', choices=['price-areas', 'grid-areas'],
+                                 help='Area type to fetch')
+    backfill_parser.add_argument('--window-days', type=int, default=7, help='Days per request window')
+    backfill_parser.add_argument('--workers', type=int, default=4, help='Maximum concurrent requests')
+    
+    # Reprocess command
+    reprocess_parser = subparsers.add_parser('reprocess', help='Rebuild outputs from an archived raw response')
+    reprocess_parser.add_argument('source', choices=['ssb', 'elhub', 'enova'], help='Data source')
+    reprocess_parser.add_argument('--hash', help='Snapshot hash or prefix (default: latest)')
+    reprocess_parser.add_argument('--list', action='store_true', help='List archived snapshots instead')
     
     # Analysis commands
     subparsers.add_parser('analyze', help='Run emissions trend analysis')
     subparsers.add_parser('comprehensive', help='Run comprehensive ESG analysis')
     
+    # Pipeline command
+    pipeline_parser = subparsers.add_parser('pipeline', help='Fetch, process and report as a pipeline')
+    pipeline_parser.add_argument('--incremental', action='store_true',
+                                 help='Skip downloads for sources with no new data')
+    pipeline_parser.add_argument('--force', action='store_true',
+                                 help='Run every stage even if its inputs are unchanged')
+    pipeline_parser.add_argument('--workers', type=int, default=4, help='Maximum stages running at once')
+    
+    # Stand-in server command
+    standin_parser = subparsers.add_parser('standin', help='Replay recorded API responses from a local server')
+    standin_parser.add_argument('cassette', help='Cassette directory recorded with HTTP_RECORD_DIR')
+    standin_parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    standin_parser.add_argument('--latency', type=float, default=0.0, help='Delay per response in seconds')
+    standin_parser.add_argument('--jitter', type=float, default=0.0, help='Maximum extra random delay in seconds')
+    standin_parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    standin_parser.add_argument('--scale', type=int, default=1, help='Make successful JSON payloads N times larger')
+    standin_parser.add_argument('--seed', type=int, help='Seed for latency and error draws')
+    
     # Dashboard command
     subparsers.add_parser('dashboard', help='Launch interactive dashboard')
     
@@ -301,11 +441,20 @@ Examples:
     
     # Execute the requested command
     if args.command == 'fetch':
-        return fetch_data()
+        return fetch_data(args.incremental, args.sequential, args.result_json)
+    elif args.command == 'backfill':
+        return backfill_elhub(args.start, args.end, args.areas, args.entity, args.window_days, args.workers)
+    elif args.command == 'reprocess':
+        return reprocess_snapshot(args.source, args.hash, args.list)
     elif args.command == 'analyze':
         return run_analysis()
     elif args.command == 'comprehensive':
         return run_comprehensive_analysis()
+    elif args.command == 'pipeline':
+        return run_pipeline(args.incremental, args.force, args.workers)
+    elif args.command == 'standin':
+        return serve_stand_in(args.cassette, args.port, args.latency, args.jitter,
+                              args.error_rate, args.scale, args.seed)
     elif args.command == 'dashboard':
         return launch_dashboard()
     else:
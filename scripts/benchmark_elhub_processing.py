@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark ElhubDataProcessor.to_consumption_summary on synthetic hourly data
+
+Usage:
+    python scripts/benchmark_elhub_processing.py                  # 1M and 10M records
+    python scripts/benchmark_elhub_processing.py --sizes 100000 1000000 --legacy
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.data_fetch.sources.elhub import ElhubDataProcessor
+
+PRICE_AREAS = ['NO1', 'NO2', 'NO3', 'NO4', 'NO5']
+CONSUMPTION_GROUPS = ['household', 'cabin', 'primary', 'secondary', 'tertiary']
+
+
+def build_payload(n_records: int) -> dict:
+    """Build a formatted Elhub payload with n_records hourly records"""
+    per_area = n_records // len(PRICE_AREAS)
+    hours_needed = per_area // len(CONSUMPTION_GROUPS) + 1
+    start = datetime(2024, 1, 1)
+
+    # Share the timestamp strings between areas, as json.load would not,
+    # to keep the synthetic input itself from dominating memory
+    timestamps = [
+        (start + timedelta(hours=h)).strftime('%Y-%m-%dT%H:00:00+01:00')
+        for h in range(hours_needed)
+    ]
+
+    data = []
+    for area in PRICE_AREAS:
+        records = [
+            {
+                'startTime': timestamps[i // len(CONSUMPTION_GROUPS)],
+                'endTime': timestamps[i // len(CONSUMPTION_GROUPS)],
+                'priceArea': area,
+                'consumptionGroup': CONSUMPTION_GROUPS[i % len(CONSUMPTION_GROUPS)],
+                'quantityKwh': 1000.0 + i % 500,
+                'meteringPointCount': 100 + i % 50
+            }
+            for i in range(per_area)
+        ]
+        data.append({
+            'id': area,
+            'type': 'price-areas',
+            'attributes': {'country': 'NO', 'name': area, 'consumptionPerGroupMbaHour': records}
+        })
+
+    return {'raw_data': {'data': data}}
+
+
+def legacy_consumption_summary(elhub_data: dict) -> pd.DataFrame:
+    """The pre-vectorization implementation, kept for comparison"""
+    records = []
+    for area_data in elhub_data['raw_data']['data']:
+        for consumption_record in area_data['attributes']['consumptionPerGroupMbaHour']:
+            records.append({
+                'timestamp': consumption_record.get('startTime'),
+                'price_area': consumption_record.get('priceArea'),
+                'consumption_group': consumption_record.get('consumptionGroup'),
+                'quantity_kwh': consumption_record.get('quantityKwh'),
+                'metering_points': consumption_record.get('meteringPointCount'),
+                'area_id': area_data.get('id'),
+                'country': area_data.get('attributes', {}).get('country')
+            })
+
+    df = pd.DataFrame(records)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['date'] = df['timestamp'].dt.date
+    df['hour'] = df['timestamp'].dt.hour
+    return df
+
+
+def time_call(func, payload) -> tuple:
+    start = time.perf_counter()
+    df = func(payload)
+    return time.perf_counter() - start, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Elhub consumption processing")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1_000_000, 10_000_000],
+                        help='Record counts to benchmark')
+    parser.add_argument('--legacy', action='store_true',
+                        help='Also time the old per-record loop implementation')
+    args = parser.parse_args()
+
+    print("⏱️ ElhubDataProcessor.to_consumption_summary benchmark")
+    print(f"{'records':>12} {'implementation':<12} {'seconds':>9} {'rows/sec':>14}")
+
+    for size in args.sizes:
+        payload = build_payload(size)
+
+        implementations = [('vectorized', ElhubDataProcessor.to_consumption_summary)]
+        if args.legacy:
+            implementations.append(('legacy', legacy_consumption_summary))
+
+        for name, func in implementations:
+            seconds, rows = time_call(func, payload)
+            print(f"{rows:>12,} {name:<12} {seconds:>9.2f} {rows / seconds:>14,.0f}")
+
+        del payload
+
+
+if __name__ == "__main__":
+    main()
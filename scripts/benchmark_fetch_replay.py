@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fetch pipeline offline against recorded API responses
+
+Record a cassette once with network access, then replay it with
+controlled latency, errors and payload size:
+
+    HTTP_RECORD_DIR=data/cassettes/nightly python main.py fetch
+    python scripts/benchmark_fetch_replay.py data/cassettes/nightly --latency 0.2 --workers 1 4
+    python scripts/benchmark_fetch_replay.py data/cassettes/nightly --scale 10 --error-rate 0.1 --seed 1
+
+Each run writes into a throwaway project directory, so data/ is untouched.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.data_fetch.fetch_all import build_fetch_pipeline
+from src.data_fetch.files import DataFileManager
+from src.data_fetch.replay import StandInServer, StandInTransport
+from src.data_fetch.transport import set_transport
+
+
+def run_once(server: StandInServer, workers: int) -> dict:
+    """Run the full pipeline once against the stand-in server"""
+    set_transport(StandInTransport(server.url))
+
+    with tempfile.TemporaryDirectory(prefix="greenpulse-bench-") as root:
+        pipeline = build_fetch_pipeline(DataFileManager(Path(root)), max_workers=workers)
+        requests_before = server.stats['requests']
+        start = time.perf_counter()
+        report = pipeline.run(force=True)
+        report['seconds'] = time.perf_counter() - start
+        report['requests'] = server.stats['requests'] - requests_before
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fetch pipeline against a stand-in server")
+    parser.add_argument('cassette', help='Cassette directory recorded with HTTP_RECORD_DIR')
+    parser.add_argument('--workers', nargs='+', type=int, default=[4], help='Pipeline worker counts to compare')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per worker count')
+    parser.add_argument('--latency', type=float, default=0.0, help='Delay per response in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum extra random delay in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    parser.add_argument('--scale', type=int, default=1, help='Make successful JSON payloads N times larger')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for latency and error draws')
+    args = parser.parse_args()
+
+    server = StandInServer(args.cassette, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, payload_scale=args.scale, seed=args.seed)
+
+    with server:
+        print(f"\n⏱️ Fetch pipeline benchmark: {len(server.cassette)} recorded responses, "
+              f"latency {args.latency}s, error rate {args.error_rate:.0%}, payload x{args.scale}")
+        print(f"{'workers':>8} {'run':>4} {'seconds':>9} {'requests':>9}  critical path")
+
+        for workers in args.workers:
+            for run in range(1, args.repeat + 1):
+                report = run_once(server, workers)
+                failed = [name for name, result in report['stages'].items() if result['status'] != 'success']
+                note = f"  (not successful: {', '.join(failed)})" if failed else ''
+                print(f"{workers:>8} {run:>4} {report['seconds']:>9.2f} {report['requests']:>9}  "
+                      f"{' → '.join(report['critical_path'])}{note}")
+
+        stats = server.stats
+        print(f"\n📊 Server: {stats['requests']} requests, {stats['replayed']} replayed, "
+              f"{stats['errors']} injected errors, {stats['missing']} not recorded, "
+              f"{stats['bytes'] / 1e6:.1f} MB served")
+
+    set_transport(None)
+
+
+if __name__ == "__main__":
+    main()
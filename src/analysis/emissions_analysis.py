@@ -3,11 +3,13 @@ Emissions analysis and forecasting for the GreenPulse project
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Tuple, Optional, Union
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from src.data_fetch.columnar import read_table
+
 
 class EmissionsAnalyzer:
     """Analyze greenhouse gas emissions trends and patterns"""
@@ -228,17 +230,17 @@ class EmissionsAnalyzer:
         return report
 
 
-def analyze_emissions_data(csv_path: Path) -> Dict[str, Any]:
+def analyze_emissions_data(data: Union[Path, pd.DataFrame]) -> Dict[str, Any]:
     """
-    Convenience function to analyze emissions data from CSV
+    Convenience function to analyze emissions data from a processed table
     
     Args:
-        csv_path: Path to the emissions CSV file
+        data: Emissions table, or the path to it (Arrow file or CSV export)
         
     Returns:
         Complete analysis results
     """
-    df = pd.read_csv(csv_path)
+    df = data if isinstance(data, pd.DataFrame) else read_table(data)
     analyzer = EmissionsAnalyzer(df)
     
     return {
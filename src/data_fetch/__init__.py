@@ -1,24 +1,62 @@
 """
 Data fetching module for GreenPulse project
 """
-from .fetch_all import fetch_all_data, fetch_ssb_only, DataFileManager
+from .fetch_all import (
+    fetch_all_data, fetch_all_data_async, fetch_ssb_only, run_fetch, FetchResult, SourceFetchResult
+)
+from .files import DataFileManager
+from .repository import DataRepository, get_repository
 from .sources.ssb import SSBApiClient, SSBDataProcessor, fetch_ssb_data
-from .sources.elhub import fetch_elhub_data, ElhubApiClient, ElhubDataProcessor
+from .sources.elhub import (
+    fetch_elhub_data, backfill_elhub_data, ElhubApiClient, ElhubBackfill, ElhubDataProcessor
+)
 from .sources.enova import fetch_enova_data, EnovaApiClient
 from .config import DataFetchConfig, config
+from .analytics_store import AnalyticsStore, load_analytics_store
+from .circuit import CircuitBreaker
+from .columnar import processed_table_path, read_table
+from .metrics import JsonLinesSink, MetricsRegistry
+from .ratelimit import HostRateLimiter, TokenBucket
+from .transport import HttpTransport, get_transport, set_transport, get_rate_limiter
+from .replay import Cassette, RecordingTransport, StandInServer, StandInTransport
 
 __all__ = [
     'fetch_all_data',
+    'fetch_all_data_async',
     'fetch_ssb_only', 
+    'run_fetch',
+    'FetchResult',
+    'SourceFetchResult',
     'DataFileManager',
+    'DataRepository',
+    'get_repository',
     'SSBApiClient',
     'SSBDataProcessor', 
     'fetch_ssb_data',
     'fetch_elhub_data',
+    'backfill_elhub_data',
     'ElhubApiClient',
+    'ElhubBackfill',
     'ElhubDataProcessor',
     'fetch_enova_data',
     'EnovaApiClient',
+    'HttpTransport',
+    'get_transport',
+    'set_transport',
+    'get_rate_limiter',
+    'HostRateLimiter',
+    'TokenBucket',
+    'AnalyticsStore',
+    'load_analytics_store',
+    'CircuitBreaker',
+    'read_table',
+    'processed_table_path',
+    'MetricsRegistry',
+    'JsonLinesSink',
+    'Cassette',
+    'RecordingTransport',
+    'StandInTransport',
+    'StandInServer',
     'DataFetchConfig',
     'config'
 ]
@@ -0,0 +1,550 @@
+"""
+Embedded analytical store (SQLite) for the processed SSB, Elhub and Enova tables
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .columnar import ARROW_SUFFIX, PROCESSED_SCHEMAS, read_arrow
+from .files import file_digest
+from .parquet_store import DEFAULT_DATASET, ElhubParquetStore, as_timestamp, parts_identity
+
+# Processed tables of each source, loaded under their file stem
+SOURCE_TABLES = {
+    'ssb': ('ssb_emissions_clean',),
+    'enova': ('company_efficiency_summary', 'efficiency_projects', 'company_annual_metrics'),
+}
+
+# Indexes on the processed tables (year, company)
+TABLE_INDEXES = {
+    'ssb_emissions_clean': [('year',)],
+    'company_efficiency_summary': [('company_name',), ('year',)],
+    'efficiency_projects': [('year',), ('company_name',)],
+    'company_annual_metrics': [('company_name', 'year'), ('year',)],
+}
+
+# Elhub hourly records, clustered by price area and time. Timestamps are
+# UTC epoch seconds, dates local calendar days as YYYY-MM-DD.
+ELHUB_TABLE = 'elhub_consumption'
+ELHUB_DAILY_TABLE = 'elhub_daily'
+
+_ELHUB_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {ELHUB_TABLE} (
+    dataset TEXT NOT NULL,
+    price_area TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    consumption_group TEXT NOT NULL,
+    quantity_kwh REAL,
+    metering_points INTEGER,
+    area_id TEXT NOT NULL,
+    country TEXT,
+    date TEXT NOT NULL,
+    hour INTEGER,
+    PRIMARY KEY (price_area, timestamp, area_id, consumption_group, dataset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS {ELHUB_TABLE}_timestamp ON {ELHUB_TABLE} (timestamp);
+CREATE TABLE IF NOT EXISTS {ELHUB_DAILY_TABLE} (
+    dataset TEXT NOT NULL,
+    price_area TEXT NOT NULL,
+    date TEXT NOT NULL,
+    consumption_group TEXT NOT NULL,
+    quantity_kwh REAL,
+    metering_points REAL,
+    records INTEGER,
+    PRIMARY KEY (price_area, date, consumption_group, dataset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS {ELHUB_DAILY_TABLE}_date ON {ELHUB_DAILY_TABLE} (date);
+CREATE TABLE IF NOT EXISTS _loads (
+    name TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    loaded_at TEXT NOT NULL
+);
+"""
+
+AGGREGATES = {'sum': 'SUM', 'mean': 'AVG', 'min': 'MIN', 'max': 'MAX', 'count': 'COUNT', 'nunique': 'COUNT(DISTINCT'}
+
+OPERATORS = {'=': '=', '==': '=', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>=',
+             'in': 'IN', 'not in': 'NOT IN'}
+
+Filter = Tuple[str, str, Any]
+
+
+class AnalyticsStore:
+    """
+    SQLite database holding the processed tables for querying in place
+
+    The processed SSB and Enova tables are loaded under their file stems
+    (ssb_emissions_clean, company_efficiency_summary, ...). Elhub hourly
+    records go to elhub_consumption, clustered by price area and timestamp,
+    with a per-day rollup in elhub_daily so daily summaries over years of
+    data read tens of thousands of rows instead of millions.
+
+    Loading is incremental: each table, and each Elhub partition, is only
+    reloaded when its files changed since the last load. Reloads run in one
+    transaction, so readers see either the old rows or the new ones.
+
+    Queries push filters, grouping and aggregation down into SQLite and only
+    the result is turned into a DataFrame:
+
+        store.query('efficiency_projects', columns=['year', 'project_type'],
+                    aggregates={'investment_nok': 'sum'}, filters=[('year', '>=', 2020)])
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Database file (created on the first load)
+        """
+        self.path = Path(path)
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @contextmanager
+    def _connect(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        if write:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=60)
+        else:
+            connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, timeout=60)
+
+        try:
+            if write:
+                self._ensure_schema(connection)
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write connection inside one transaction, schema changes included"""
+        with self._connect(write=True) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.rollback()
+                raise
+            connection.commit()
+
+    def _ensure_schema(self, connection: sqlite3.Connection):
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            # WAL lets the dashboard keep reading while a fetch loads new data
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_ELHUB_SCHEMA)
+            self._schema_ready = True
+
+    def tables(self) -> Dict[str, List[str]]:
+        """Columns of every table in the store"""
+        if not self.exists():
+            return {}
+        with self._connect() as connection:
+            names = [row[0] for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE '\\_%' ESCAPE '\\'"
+            )]
+            return {
+                name: [row[1] for row in connection.execute(f'PRAGMA table_info("{name}")')]
+                for name in names
+            }
+
+    def loads(self) -> Dict[str, Dict[str, Any]]:
+        """What was loaded from where: digest, rows and time per table or Elhub partition"""
+        if not self.exists():
+            return {}
+        with self._connect() as connection:
+            return {
+                name: {'digest': digest, 'rows': rows, 'loaded_at': loaded_at}
+                for name, digest, rows, loaded_at in connection.execute("SELECT * FROM _loads")
+            }
+
+    def load_table(self, name: str, path: Path, digest: Optional[str] = None) -> Optional[int]:
+        """
+        Replace a table with the contents of a processed Arrow file
+
+        Args:
+            name: Table name
+            path: Arrow IPC file (see columnar.py)
+            digest: Content hash of the file, if already known
+
+        Returns:
+            Rows loaded, or None if the file is unchanged since the last load
+        """
+        digest = digest or file_digest(path)
+        if self.loads().get(name, {}).get('digest') == digest:
+            return None
+
+        df = read_arrow(path)
+        schema = PROCESSED_SCHEMAS.get(name) or pa.Schema.from_pandas(df, preserve_index=False)
+        columns = ', '.join(f'"{field.name}" {_sql_type(field.type)}' for field in schema)
+        placeholders = ', '.join('?' for _ in df.columns)
+
+        with self._transaction() as connection:
+            connection.execute(f'DROP TABLE IF EXISTS "{name}"')
+            connection.execute(f'CREATE TABLE "{name}" ({columns})')
+            for index_columns in TABLE_INDEXES.get(name, []):
+                connection.execute(
+                    f'CREATE INDEX "{name}_{"_".join(index_columns)}" ON "{name}" ({", ".join(index_columns)})'
+                )
+            connection.executemany(
+                f'INSERT INTO "{name}" ({", ".join(df.columns)}) VALUES ({placeholders})',
+                _rows(df)
+            )
+            _record_load(connection, name, digest, len(df))
+
+        return len(df)
+
+    def load_elhub(self, store: ElhubParquetStore) -> int:
+        """
+        Bring the Elhub tables in line with a Parquet dataset
+
+        Only partitions (price area and month) whose files changed are
+        reloaded; partitions that disappeared are removed.
+
+        Args:
+            store: Partitioned Parquet store of one Elhub dataset
+
+        Returns:
+            Rows loaded
+        """
+        prefix = f"elhub/{store.dataset}/"
+        loaded = {name: entry for name, entry in self.loads().items() if name.startswith(prefix)}
+        seen = set()
+        rows = 0
+
+        for price_area, month, files in store.partitions():
+            key = f"{prefix}{price_area}/{month}"
+            seen.add(key)
+
+            digest = parts_identity(files)
+            if loaded.get(key, {}).get('digest') == digest:
+                continue
+
+            # Read through the store, which retries when a merge replaces the parts
+            start, end = _month_bounds(month)
+            df = store.read(price_areas=[price_area], start=start, end=end)
+            with self._transaction() as connection:
+                self._delete_elhub_partition(connection, store.dataset, price_area, month)
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO {ELHUB_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    _elhub_rows(df, store.dataset, price_area)
+                )
+                self._rollup_elhub_partition(connection, store.dataset, price_area, month)
+                _record_load(connection, key, digest, len(df))
+            rows += len(df)
+
+        for key in loaded.keys() - seen:
+            price_area, month = key[len(prefix):].split('/')
+            with self._transaction() as connection:
+                self._delete_elhub_partition(connection, store.dataset, price_area, month)
+                connection.execute("DELETE FROM _loads WHERE name = ?", (key,))
+
+        return rows
+
+    def elhub_in_sync(self, store: ElhubParquetStore) -> bool:
+        """
+        Whether the Elhub tables hold exactly the store's current parts
+
+        Compares the partition identities recorded by the last load_elhub
+        with those of the parts on disk now, so a caller holding frames read
+        from the store can tell whether the rollups describe the same data.
+        """
+        prefix = f"elhub/{store.dataset}/"
+        loaded = {name: entry['digest'] for name, entry in self.loads().items() if name.startswith(prefix)}
+        current = {
+            f"{prefix}{price_area}/{month}": parts_identity(files)
+            for price_area, month, files in store.partitions()
+        }
+        return loaded == current
+
+    @staticmethod
+    def _delete_elhub_partition(connection: sqlite3.Connection, dataset: str, price_area: str, month: str):
+        start, end = _month_bounds(month)
+        connection.execute(
+            f"DELETE FROM {ELHUB_TABLE} WHERE price_area = ? AND timestamp >= ? AND timestamp < ? AND dataset = ?",
+            (price_area, _epoch_seconds(start), _epoch_seconds(end), dataset)
+        )
+        connection.execute(
+            f"DELETE FROM {ELHUB_DAILY_TABLE} WHERE price_area = ? AND date >= ? AND date < ? AND dataset = ?",
+            (price_area, f"{start:%Y-%m-%d}", f"{end:%Y-%m-%d}", dataset)
+        )
+
+    @staticmethod
+    def _rollup_elhub_partition(connection: sqlite3.Connection, dataset: str, price_area: str, month: str):
+        start, end = _month_bounds(month)
+        connection.execute(
+            f"""INSERT OR REPLACE INTO {ELHUB_DAILY_TABLE}
+                SELECT dataset, price_area, date, consumption_group,
+                       SUM(quantity_kwh), AVG(metering_points), COUNT(*)
+                FROM {ELHUB_TABLE}
+                WHERE price_area = ? AND timestamp >= ? AND timestamp < ? AND dataset = ?
+                GROUP BY dataset, price_area, date, consumption_group""",
+            (price_area, _epoch_seconds(start), _epoch_seconds(end), dataset)
+        )
+
+    def query(self, table: str, columns: Optional[Sequence[str]] = None,
+              filters: Optional[Iterable[Filter]] = None,
+              aggregates: Optional[Dict[str, str]] = None,
+              order_by: Optional[Sequence[str]] = None,
+              limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Query a table, filtering and aggregating inside the database
+
+        Args:
+            table: Table name
+            columns: Columns to return; with aggregates, the columns to group by
+            filters: (column, operator, value) tuples, all of which must hold.
+                Operators: =, ==, !=, <, <=, >, >=, in, not in. Timestamps and
+                dates may be given as datetimes or strings.
+            aggregates: Column -> sum, mean, min, max, count or nunique; the
+                result column keeps the column name. '*': 'count' counts rows
+                into a 'count' column.
+            order_by: Result columns to sort by; prefix with '-' for descending
+            limit: Maximum number of rows
+
+        Returns:
+            DataFrame of the result; Elhub timestamps come back tz-aware in
+            Norwegian time and dates as datetimes
+        """
+        if not self.exists():
+            return pd.DataFrame(columns=list(columns or []) + list(aggregates or {}))
+
+        known = self.tables()
+        if table not in known:
+            raise ValueError(f"Unknown table: {table}")
+        valid = set(known[table])
+
+        def check(column: str) -> str:
+            if column not in valid:
+                raise ValueError(f"Unknown column {column!r} in table {table}")
+            return f'"{column}"'
+
+        select = [check(column) for column in columns or ([] if aggregates else known[table])]
+        outputs = list(columns or ([] if aggregates else known[table]))
+        for column, func in (aggregates or {}).items():
+            if func not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate {func!r}; use one of {sorted(AGGREGATES)}")
+            if column == '*':
+                select.append('COUNT(*) AS "count"')
+                outputs.append('count')
+                continue
+            close = ')' * (2 if func == 'nunique' else 1)
+            select.append(f'{AGGREGATES[func]}({check(column)}{close} AS "{column}"')
+            outputs.append(column)
+
+        sql = f'SELECT {", ".join(select)} FROM "{table}"'
+        params: List[Any] = []
+
+        clauses = []
+        for column, op, value in filters or []:
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown filter operator {op!r}")
+            if op in ('in', 'not in'):
+                values = [_encode(column, item) for item in value]
+                clauses.append(f'{check(column)} {OPERATORS[op]} ({", ".join("?" for _ in values)})')
+                params.extend(values)
+            else:
+                clauses.append(f'{check(column)} {OPERATORS[op]} ?')
+                params.append(_encode(column, value))
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+
+        if aggregates and columns:
+            sql += ' GROUP BY ' + ', '.join(check(column) for column in columns)
+
+        if order_by:
+            terms = []
+            for term in order_by:
+                column = term.lstrip('-')
+                if column not in outputs:
+                    raise ValueError(f"Cannot order by {column!r}: not in the result")
+                terms.append(f'"{column}"' + (' DESC' if term.startswith('-') else ''))
+            sql += ' ORDER BY ' + ', '.join(terms)
+
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+
+        with self._connect() as connection:
+            df = pd.read_sql_query(sql, connection, params=params)
+
+        return _decode(df, aggregates or {})
+
+    def daily_summary(self, price_areas: Optional[Iterable[str]] = None,
+                      start: Optional[Union[datetime, str]] = None,
+                      end: Optional[Union[datetime, str]] = None,
+                      dataset: Optional[str] = DEFAULT_DATASET) -> pd.DataFrame:
+        """
+        Daily Elhub consumption per price area and consumption group
+
+        Same frame as ElhubDataProcessor.get_daily_summary, read from the
+        daily rollup.
+
+        Args:
+            price_areas: Only these price areas
+            start: First day to include
+            end: Day after the last one to include
+            dataset: Elhub dataset to summarise (default: consumption per
+                group); None summarises every dataset separately
+
+        Returns:
+            DataFrame with date, price_area, consumption_group, quantity_kwh
+            and metering_points (mean per hour), plus dataset when dataset
+            is None
+        """
+        if ELHUB_DAILY_TABLE not in self.tables():
+            return pd.DataFrame()
+
+        filters = []
+        if price_areas:
+            filters.append(('price_area', 'in', list(price_areas)))
+        if start is not None:
+            filters.append(('date', '>=', start))
+        if end is not None:
+            filters.append(('date', '<', end))
+        # Datasets measure different things; their quantities never add up
+        columns = ['date', 'price_area', 'consumption_group']
+        if dataset is None:
+            columns.append('dataset')
+        else:
+            filters.append(('dataset', '=', dataset))
+
+        return self.query(
+            ELHUB_DAILY_TABLE,
+            columns=columns,
+            aggregates={'quantity_kwh': 'sum', 'metering_points': 'mean'},
+            filters=filters,
+            order_by=columns
+        )
+
+
+def analytics_store(file_manager) -> AnalyticsStore:
+    """Get the analytical store under data/processed/"""
+    return AnalyticsStore(file_manager.processed_dir / "analytics.sqlite")
+
+
+def load_analytics_store(file_manager, sources: Iterable[str] = ('ssb', 'elhub', 'enova')) -> Dict[str, int]:
+    """
+    Load the processed tables of some sources into the analytical store
+
+    Tables and Elhub partitions that did not change since the last load are
+    left alone, so this is cheap to run after every fetch.
+
+    Args:
+        file_manager: DataFileManager owning data/processed
+        sources: Sources to load
+
+    Returns:
+        Rows loaded per source
+    """
+    store = analytics_store(file_manager)
+    loaded = {}
+
+    for source in sources:
+        start = time.perf_counter()
+        rows = 0
+
+        if source == 'elhub':
+            elhub_root = file_manager.processed_dir / "elhub"
+            datasets = sorted(path.name for path in elhub_root.iterdir() if path.is_dir()) \
+                if elhub_root.exists() else []
+            for dataset in datasets:
+                rows += store.load_elhub(ElhubParquetStore(elhub_root, dataset))
+        else:
+            for name in SOURCE_TABLES.get(source, ()):
+                path = file_manager.processed_dir / f"{name}{ARROW_SUFFIX}"
+                if path.exists():
+                    rows += store.load_table(name, path, file_manager.file_digest(path)) or 0
+
+        loaded[source] = rows
+        if rows:
+            print(f"🗄️ Loaded {rows} {source} rows into {store.path.name} in {time.perf_counter() - start:.2f}s")
+
+    return loaded
+
+
+def _sql_type(arrow_type: pa.DataType) -> str:
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    if pa.types.is_integer(arrow_type) or pa.types.is_boolean(arrow_type):
+        return 'INTEGER'
+    if pa.types.is_floating(arrow_type):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _rows(df: pd.DataFrame) -> Iterator[tuple]:
+    """Rows of a frame as plain Python values, which is what sqlite3 accepts"""
+    columns = []
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        columns.append(series.astype(object).where(series.notna(), None).tolist())
+    return zip(*columns)
+
+
+def _elhub_rows(df: pd.DataFrame, dataset: str, price_area: str) -> Iterator[tuple]:
+    rows = len(df)
+    return zip(
+        [dataset] * rows,
+        [price_area] * rows,
+        df['timestamp'].dt.as_unit('s').astype('int64').tolist(),
+        df['consumption_group'].astype(str).tolist(),
+        df['quantity_kwh'].astype(object).where(df['quantity_kwh'].notna(), None).tolist(),
+        df['metering_points'].astype(object).where(df['metering_points'].notna(), None).tolist(),
+        df['area_id'].astype(str).tolist(),
+        df['country'].astype(object).where(df['country'].notna(), None).tolist(),
+        df['date'].to_numpy().astype('datetime64[D]').astype(str).tolist(),
+        df['hour'].astype(int).tolist(),
+    )
+
+
+def _record_load(connection: sqlite3.Connection, name: str, digest: str, rows: int):
+    connection.execute(
+        "INSERT OR REPLACE INTO _loads VALUES (?, ?, ?, ?)",
+        (name, digest, rows, datetime.now().isoformat())
+    )
+
+
+def _encode(column: str, value: Any) -> Any:
+    """Filter value in the representation stored in the database"""
+    if column == 'timestamp':
+        return _epoch_seconds(as_timestamp(value))
+    if column == 'date':
+        return f"{pd.Timestamp(value):%Y-%m-%d}"
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(df: pd.DataFrame, aggregates: Dict[str, str]) -> pd.DataFrame:
+    """Turn stored timestamps and dates back into datetimes"""
+    if 'timestamp' in df.columns and aggregates.get('timestamp') in (None, 'min', 'max'):
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s', utc=True).dt.tz_convert('Europe/Oslo')
+    if 'date' in df.columns and aggregates.get('date') in (None, 'min', 'max'):
+        df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def _epoch_seconds(timestamp: pd.Timestamp) -> int:
+    return int(timestamp.timestamp())
+
+
+def _month_bounds(month: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Local start of a YYYY-MM month and of the month after it"""
+    start = pd.Timestamp(f"{month}-01").tz_localize('Europe/Oslo')
+    return start, start + pd.offsets.MonthBegin(1)
+
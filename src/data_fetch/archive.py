@@ -0,0 +1,149 @@
+"""
+Content-addressed archive of raw API responses
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+
+class RawSnapshotArchive:
+    """
+    Compressed, de-duplicated store of every raw API response
+
+    Layout:
+        <root>/objects/ab/abcdef....json.gz   one object per distinct response
+        <root>/index.jsonl                    one line per fetch
+
+    Objects are named by the SHA-256 of the uncompressed response, so a
+    response identical to an earlier one costs an index line and nothing
+    else. The index records (source, fetched_at, sha256) plus sizes and any
+    metadata needed to reprocess the snapshot without the network.
+    """
+
+    def __init__(self, root: Path, compresslevel: int = 6):
+        """
+        Args:
+            root: Archive directory
+            compresslevel: gzip compression level for new objects
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.jsonl"
+        self.compresslevel = compresslevel
+        self._lock = threading.Lock()
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / f"{sha256}.json.gz"
+
+    def put(self, source: str, data: Union[bytes, BinaryIO], metadata: Optional[Dict[str, Any]] = None,
+            fetched_at: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Archive one raw response
+
+        Args:
+            source: Source name, e.g. 'ssb'
+            data: Response body, as bytes or a binary stream read to the end
+            metadata: Extra information stored with the index entry
+            fetched_at: ISO timestamp of the fetch (defaults to now)
+
+        Returns:
+            The index entry written for this snapshot
+        """
+        stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        # Compress and hash in one pass; the name is only known at the end
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, prefix=".object.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as raw_file:
+                with gzip.GzipFile(fileobj=raw_file, mode='wb', compresslevel=self.compresslevel, mtime=0) as f:
+                    for chunk in iter(lambda: stream.read(1 << 20), b''):
+                        digest.update(chunk)
+                        size += len(chunk)
+                        f.write(chunk)
+
+            sha256 = digest.hexdigest()
+            object_path = self.object_path(sha256)
+            if object_path.exists():
+                os.unlink(tmp_path)
+            else:
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, object_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        entry = {
+            'source': source,
+            'fetched_at': fetched_at or datetime.now().isoformat(),
+            'sha256': sha256,
+            'size': size,
+            'stored_size': object_path.stat().st_size,
+            'metadata': metadata or {}
+        }
+
+        with self._lock:
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+        return entry
+
+    def entries(self, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Index entries in fetch order, optionally for one source only"""
+        if not self.index_path.exists():
+            return []
+
+        entries = []
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append can leave a partial last line
+                    continue
+                if source is None or entry.get('source') == source:
+                    entries.append(entry)
+        return entries
+
+    def latest(self, source: str) -> Optional[Dict[str, Any]]:
+        """Most recent index entry for a source"""
+        entries = self.entries(source)
+        return entries[-1] if entries else None
+
+    def find(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Most recent index entry for an object, accepting a hash prefix"""
+        matches = [entry for entry in self.entries() if entry['sha256'].startswith(sha256)]
+        return matches[-1] if matches else None
+
+    def open(self, sha256: str) -> BinaryIO:
+        """Open an archived response for streaming, decompressed"""
+        return gzip.open(self.object_path(sha256), 'rb')
+
+    def read(self, sha256: str) -> bytes:
+        """Read an archived response, decompressed"""
+        with self.open(sha256) as f:
+            return f.read()
+
+    def stats(self) -> Dict[str, int]:
+        """Number of snapshots and objects, and their raw and stored sizes"""
+        entries = self.entries()
+        objects = {entry['sha256']: entry for entry in entries}
+        return {
+            'snapshots': len(entries),
+            'objects': len(objects),
+            'raw_bytes': sum(entry['size'] for entry in entries),
+            'stored_bytes': sum(entry['stored_size'] for entry in objects.values())
+        }
@@ -0,0 +1,43 @@
+"""
+Cooperative cancellation of source fetches that outlived their timeout
+"""
+import threading
+from typing import Optional, Set
+
+
+class FetchCancelled(RuntimeError):
+    """Raised inside a source fetch once the run has given up on it"""
+
+
+_cancelled: Set[str] = set()
+_lock = threading.Lock()
+
+
+def cancel(source: str):
+    """
+    Stop a source fetch at its next request or file write
+
+    A worker thread cannot be interrupted, so the fetch notices at the next
+    transport request or DataFileManager write of one of its files and
+    raises FetchCancelled there. A request or write already under way
+    still completes.
+    """
+    with _lock:
+        _cancelled.add(source)
+
+
+def reset(source: str):
+    """Let a source fetch run again, e.g. at the start of the next run"""
+    with _lock:
+        _cancelled.discard(source)
+
+
+def is_cancelled(source: Optional[str]) -> bool:
+    with _lock:
+        return source in _cancelled
+
+
+def check(source: Optional[str]):
+    """Raise FetchCancelled if the source's fetch was cancelled"""
+    if is_cancelled(source):
+        raise FetchCancelled(f"{source} fetch was cancelled after its timeout")
@@ -0,0 +1,105 @@
+"""
+Persistent circuit breakers for endpoints that keep failing
+"""
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from .state import JsonStateStore
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breakers kept in a state store
+
+    An endpoint starts closed and is always tried. After `failure_threshold`
+    consecutive failures it opens and is skipped until `cooldown` has passed.
+    The first caller after that gets a single half-open trial: success closes
+    the circuit, failure opens it for another cooldown. A trial that never
+    reports back (e.g. the run crashed) is given up after one cooldown.
+
+    State survives between runs, so a run does not pay again for endpoints
+    that failed on the previous ones.
+    """
+
+    def __init__(self, store: JsonStateStore, failure_threshold: int = 3,
+                 cooldown: timedelta = timedelta(hours=24),
+                 clock: Callable[[], datetime] = datetime.now):
+        """
+        Args:
+            store: State store holding one entry per endpoint with failures
+            failure_threshold: Consecutive failures that open a circuit
+            cooldown: How long an open circuit skips its endpoint
+            clock: Source of the current time
+        """
+        self.store = store
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+
+    def state(self, key: str) -> str:
+        entry = self.store.get(key)
+        return entry['state'] if entry else CLOSED
+
+    def allow(self, key: str) -> bool:
+        """Whether a request to the endpoint should be sent now"""
+        if not self.store.get(key):
+            return True
+
+        decision = {'allowed': False}
+        now = self.clock()
+
+        def transition(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if not entry or entry['state'] == CLOSED:
+                decision['allowed'] = True
+                return entry
+
+            # Open past its cooldown, or a half-open trial that never reported back
+            since = datetime.fromisoformat(entry['trial_at'] if entry['state'] == HALF_OPEN else entry['opened_at'])
+            if now - since >= self.cooldown:
+                decision['allowed'] = True
+                return {**entry, 'state': HALF_OPEN, 'trial_at': now.isoformat()}
+            return entry
+
+        self.store.update(key, transition)
+        return decision['allowed']
+
+    def retry_at(self, key: str) -> Optional[datetime]:
+        """When an open circuit will allow its next trial"""
+        entry = self.store.get(key)
+        if not entry or entry['state'] == CLOSED:
+            return None
+        since = entry['trial_at'] if entry['state'] == HALF_OPEN else entry['opened_at']
+        return datetime.fromisoformat(since) + self.cooldown
+
+    def record_success(self, key: str):
+        self.store.delete(key)
+
+    def record_failure(self, key: str, reason: str = '') -> str:
+        """Count a failure; returns the resulting circuit state"""
+        now = self.clock().isoformat()
+
+        def transition(entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            entry = dict(entry or {'state': CLOSED, 'failures': 0})
+            entry['failures'] += 1
+            entry['last_failure'] = reason
+            entry['last_failure_at'] = now
+
+            if entry['state'] == HALF_OPEN or entry['failures'] >= self.failure_threshold:
+                entry['state'] = OPEN
+                entry['opened_at'] = now
+                entry.pop('trial_at', None)
+            return entry
+
+        return self.store.update(key, transition)['state']
+
+    def reset(self, key: Optional[str] = None):
+        """Close one circuit, or all of them"""
+        if key is not None:
+            self.store.delete(key)
+            return
+        for name in list(self.store.load()):
+            self.store.delete(name)
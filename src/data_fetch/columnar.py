@@ -0,0 +1,109 @@
+"""
+Columnar processed-data format: Arrow IPC files with explicit schemas
+"""
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+
+ARROW_SUFFIX = '.arrow'
+
+_category = pa.dictionary(pa.int32(), pa.string())
+
+# Schemas of the processed tables, by file stem. Tables without an entry
+# are written with the schema pyarrow infers from the frame.
+PROCESSED_SCHEMAS = {
+    'ssb_emissions_clean': pa.schema([
+        ('year', pa.int16()),
+        ('emissions_ktCO2e', pa.float64()),
+        ('emissions_MtCO2e', pa.float64()),
+        ('source', _category),
+        ('pollutant', _category),
+        ('country', pa.string())
+    ]),
+    'company_efficiency_summary': pa.schema([
+        ('company_name', pa.string()),
+        ('sector', _category),
+        ('employees', pa.int32()),
+        ('total_projects', pa.int64()),
+        ('total_investment_nok', pa.int64()),
+        ('energy_savings_mwh', pa.float64()),
+        ('efficiency_improvement_percent', pa.float64()),
+        ('renewable_share_percent', pa.float64()),
+        ('co2_emissions_tonnes', pa.float64()),
+        ('year', pa.int16())
+    ]),
+    'efficiency_projects': pa.schema([
+        ('year', pa.int16()),
+        ('project_type', _category),
+        ('investment_nok', pa.int64()),
+        ('annual_savings_mwh', pa.float64()),
+        ('co2_reduction_tonnes', pa.float64()),
+        ('enova_support_nok', pa.int64()),
+        ('company_name', _category),
+        ('company_sector', _category)
+    ]),
+    'company_annual_metrics': pa.schema([
+        ('company_name', _category),
+        ('sector', _category),
+        ('year', pa.int16()),
+        ('total_energy_consumption_mwh', pa.float64()),
+        ('efficiency_improvement_percent', pa.float64()),
+        ('cumulative_savings_mwh', pa.float64()),
+        ('renewable_energy_share_percent', pa.float64()),
+        ('co2_emissions_tonnes', pa.float64())
+    ]),
+}
+
+
+def write_arrow(df: pd.DataFrame, f: BinaryIO, schema: Optional[pa.Schema] = None):
+    """
+    Write a frame as an uncompressed Arrow IPC file
+
+    Uncompressed, so readers can memory-map the file and use its columns
+    in place.
+
+    Args:
+        df: Frame to write
+        f: Binary file object
+        schema: Explicit schema; columns are cast to it
+    """
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    with pa.ipc.new_file(f, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_arrow(path: Union[str, Path], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read an Arrow IPC file through a memory map
+
+    Only the requested columns are touched. Numeric columns without nulls
+    are handed to pandas without a copy, backed by the mapped file.
+
+    Args:
+        path: Arrow IPC file
+        columns: Only read these columns (all columns when None)
+
+    Returns:
+        DataFrame with categoricals for dictionary-encoded columns
+    """
+    # The map stays open for as long as any column still refers to it
+    table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas(split_blocks=True)
+
+
+def read_table(path: Union[str, Path], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a processed table from an Arrow IPC file, or from a CSV export"""
+    path = Path(path)
+    if path.suffix == ARROW_SUFFIX:
+        return read_arrow(path, columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def processed_table_path(processed_dir: Path, name: str) -> Path:
+    """Path of a processed table: the Arrow file, or its CSV export when there is none yet"""
+    arrow_path = Path(processed_dir) / f"{name}{ARROW_SUFFIX}"
+    return arrow_path if arrow_path.exists() else Path(processed_dir) / f"{name}.csv"
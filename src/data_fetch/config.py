@@ -4,6 +4,8 @@ Configuration management for data fetching APIs
 import os
 from typing import Optional
 
+from .ratelimit import parse_rate_limits
+
 
 class DataFetchConfig:
     """Configuration for data fetching APIs"""
@@ -13,6 +15,38 @@ class DataFetchConfig:
         self.elhub_api_key = os.getenv('ELHUB_API_KEY')
         self.enova_api_key = os.getenv('ENOVA_API_KEY')
         
+        # Shared HTTP transport settings
+        self.http_pool_connections = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+        self.http_pool_maxsize = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+        self.http_connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))
+        self.http_read_timeout = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+        
+        # Per-host request limits as host=rate:burst (requests per second, burst size).
+        # SSB allows 30 requests per minute per IP; 6 + 0.4/s * 60s stays within it.
+        self.http_rate_limits = parse_rate_limits(
+            os.getenv('HTTP_RATE_LIMITS', 'data.ssb.no=0.4:6,api.elhub.no=5:10')
+        )
+        
+        # Retries on 429/503 with exponential backoff and jitter
+        self.http_max_retries = int(os.getenv('HTTP_MAX_RETRIES', '5'))
+        self.http_backoff_base = float(os.getenv('HTTP_BACKOFF_BASE', '1'))
+        self.http_backoff_max = float(os.getenv('HTTP_BACKOFF_MAX', '60'))
+        
+        # Elhub endpoints failing this many runs in a row are skipped for the cooldown
+        self.elhub_breaker_failures = int(os.getenv('ELHUB_BREAKER_FAILURES', '3'))
+        self.elhub_breaker_cooldown_hours = float(os.getenv('ELHUB_BREAKER_COOLDOWN_HOURS', '24'))
+        
+        # Append fetch request/parse/write metrics to this JSON-lines file
+        self.fetch_metrics_path = os.getenv('FETCH_METRICS_PATH')
+        
+        # Record every response to a cassette directory, or send every request
+        # to a stand-in server replaying one (see replay.py)
+        self.http_record_dir = os.getenv('HTTP_RECORD_DIR')
+        self.http_replay_url = os.getenv('HTTP_REPLAY_URL')
+        
+        # Memory limit of the DataRepository frame cache, in megabytes
+        self.data_cache_max_mb = float(os.getenv('DATA_CACHE_MAX_MB', '256'))
+        
     @property
     def has_ssb_auth(self) -> bool:
         return self.ssb_api_key is not None
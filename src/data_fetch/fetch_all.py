@@ -1,10 +1,17 @@
 """
 Main data fetching orchestrator for all data sources
 """
+import argparse
+import asyncio
 import json
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 # Handle both direct execution and module imports
 if __name__ == "__main__":
@@ -12,106 +19,573 @@ if __name__ == "__main__":
     project_root = Path(__file__).resolve().parents[2]
     if str(project_root) not in sys.path:
         sys.path.insert(0, str(project_root))
-    
+
+    from src.data_fetch import cancellation, metrics
+    from src.data_fetch.analytics_store import load_analytics_store
+    from src.data_fetch.config import config
+    from src.data_fetch.files import DataFileManager
+    from src.data_fetch.pipeline import Pipeline, Stage, print_pipeline_report
     from src.data_fetch.sources.ssb import SSBApiClient, SSBDataProcessor, fetch_ssb_data
-    from src.data_fetch.sources.elhub import fetch_elhub_data
-    from src.data_fetch.sources.enova import fetch_enova_data
+    from src.data_fetch.sources.elhub import fetch_elhub_data, process_elhub_file, save_elhub_snapshot
+    from src.data_fetch.sources.enova import fetch_enova_data, process_enova_file, save_enova_outputs
 else:
     # Use relative imports when imported as a module
+    from . import cancellation, metrics
+    from .analytics_store import load_analytics_store
+    from .config import config
+    from .files import DataFileManager
+    from .pipeline import Pipeline, Stage, print_pipeline_report
     from .sources.ssb import SSBApiClient, SSBDataProcessor, fetch_ssb_data
-    from .sources.elhub import fetch_elhub_data
-    from .sources.enova import fetch_enova_data
-
-
-class DataFileManager:
-    """Manage saving data files in different formats"""
-    
-    def __init__(self, project_root: Path = None):
-        if project_root is None:
-            project_root = Path(__file__).resolve().parents[2]
-        
-        self.project_root = project_root
-        self.raw_dir = project_root / "data" / "raw"
-        self.processed_dir = project_root / "data" / "processed"
-        
-        # Create directories if they don't exist
-        self.raw_dir.mkdir(parents=True, exist_ok=True)
-        self.processed_dir.mkdir(parents=True, exist_ok=True)
-    
-    def save_raw_json(self, data: bytes, filename: str = "ssb_emissions.json") -> Path:
-        """Save raw JSON response from API"""
-        filepath = self.raw_dir / filename
-        filepath.write_bytes(data)
-        return filepath
-    
-    def save_formatted_json(self, data: Dict[str, Any], filename: str = "ssb_emissions_formatted.json") -> Path:
-        """Save formatted JSON data"""
-        filepath = self.raw_dir / filename
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        return filepath
-    
-    def save_raw_csv(self, df, filename: str = "ssb_emissions_raw.csv") -> Path:
-        """Save raw CSV data"""
-        filepath = self.raw_dir / filename
-        df.to_csv(filepath, index=False)
-        return filepath
-    
-    def save_processed_csv(self, df, filename: str = "ssb_emissions_clean.csv") -> Path:
-        """Save processed CSV data"""
-        filepath = self.processed_dir / filename
-        df.to_csv(filepath, index=False)
-        return filepath
-
-
-def fetch_all_data():
-    """Fetch data from all sources"""
-    print("🚀 Starting data fetch from all sources...")
-    
-    # Initialize file manager
-    file_manager = DataFileManager()
-    
-    # Fetch SSB emissions data
-    print("\n📊 Fetching SSB emissions data...")
+    from .sources.elhub import fetch_elhub_data, process_elhub_file, save_elhub_snapshot
+    from .sources.enova import fetch_enova_data, process_enova_file, save_enova_outputs
+
+
+# Per-source timeouts (seconds) for the concurrent fetch mode. Elhub gets the
+# most headroom because its fallback chain may probe several endpoints.
+DEFAULT_SOURCE_TIMEOUTS = {
+    'ssb': 120.0,
+    'elhub': 300.0,
+    'enova': 120.0,
+}
+
+# Returned by a source fetch that found nothing new to download
+SKIPPED = 'skipped'
+
+
+@dataclass
+class SourceFetchResult:
+    """Outcome of fetching one source"""
+    source: str
+    status: str  # success, skipped, failed, error or timeout
+    duration_s: float = 0.0
+    error: Optional[str] = None
+    rows: int = 0
+    bytes_written: int = 0
+    files: List[str] = field(default_factory=list)
+    requests: int = 0
+    retries: int = 0
+    request_s: float = 0.0
+    wait_s: float = 0.0
+    response_bytes: int = 0
+    parse_s: float = 0.0
+    write_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ('success', SKIPPED)
+
+
+@dataclass
+class FetchResult:
+    """Outcome of a fetch run over all sources"""
+    started_at: str
+    duration_s: float
+    sources: Dict[str, SourceFetchResult]
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.sources.values())
+
+    @property
+    def rows(self) -> int:
+        return sum(result.rows for result in self.sources.values())
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(result.bytes_written for result in self.sources.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'ok': self.ok}
+
+
+def _stored_ssb_updated(file_manager: DataFileManager, table_id: str) -> Optional[str]:
+    """Get the "updated" timestamp of the SSB data we already have on disk"""
+    entry = file_manager.state_store('ssb_manifest').get(table_id)
+    if entry:
+        return entry.get('updated')
+
+    # No manifest yet - fall back to the metadata saved with the formatted JSON
+    formatted_path = file_manager.raw_dir / "ssb_emissions_formatted.json"
+    if formatted_path.exists():
+        try:
+            with open(formatted_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f).get('metadata', {})
+            if metadata.get('table_id') == table_id:
+                return metadata.get('updated')
+        except (json.JSONDecodeError, OSError):
+            pass
+    return None
+
+
+def fetch_ssb_source(file_manager: DataFileManager, incremental: bool = False,
+                     table_id: str = "13931"):
+    """
+    Fetch SSB emissions data and save it in all formats
+
+    Args:
+        file_manager: Write sink for the output files
+        incremental: Skip the download and all writes when SSB has not
+            published anything newer than the data we already have
+        table_id: SSB table identifier
+
+    Returns:
+        True on success, or SKIPPED if the table was unchanged
+    """
+    raw_data = download_ssb_source(file_manager, incremental, table_id)
+    if raw_data == SKIPPED:
+        return SKIPPED
+
+    save_ssb_outputs(file_manager, raw_data)
+
+    print("✅ SSB data fetched and saved successfully")
+    return True
+
+
+def download_ssb_source(file_manager: DataFileManager, incremental: bool = False,
+                        table_id: str = "13931"):
+    """
+    Download the SSB emissions table and save the raw response only
+
+    Args:
+        file_manager: Write sink for the raw file
+        incremental: Skip the download when the table is unchanged
+        table_id: SSB table identifier
+
+    Returns:
+        The raw JSON-stat2 data, or SKIPPED if the table was unchanged
+    """
+    ssb_client = SSBApiClient()
+
+    if incremental:
+        stored_updated = _stored_ssb_updated(file_manager, table_id)
+        outputs_exist = (file_manager.processed_dir / "ssb_emissions_clean.arrow").exists()
+
+        if stored_updated and outputs_exist:
+            latest_updated = ssb_client.fetch_table_updated(table_id)
+            if latest_updated == stored_updated:
+                print(f"⏭️ SSB table {table_id} unchanged since {stored_updated} - skipping download")
+                return SKIPPED
+            print(f"🆕 SSB table {table_id} updated {latest_updated} (have {stored_updated})")
+
+    raw_data = ssb_client.fetch_emissions_data(table_id)
+    raw_bytes = json.dumps(raw_data).encode('utf-8')
+    file_manager.archive.put('ssb', raw_bytes, metadata={'table_id': table_id})
+    file_manager.save_raw_json(raw_bytes, "ssb_emissions.json")
+
+    return raw_data
+
+
+def process_ssb_file(file_manager: DataFileManager):
+    """
+    Derive the SSB outputs from the saved ssb_emissions.json
+
+    Returns:
+        True on success, or SKIPPED if there is no raw file
+    """
+    raw_path = file_manager.raw_dir / "ssb_emissions.json"
+    if not raw_path.exists():
+        return SKIPPED
+
+    raw_bytes = raw_path.read_bytes()
+    save_ssb_outputs(file_manager, json.loads(raw_bytes), raw_bytes)
+    return True
+
+
+def save_ssb_outputs(file_manager: DataFileManager, raw_data: Dict[str, Any], raw_bytes: Optional[bytes] = None):
+    """
+    Derive and save every SSB output from one JSON-stat2 response
+
+    Args:
+        file_manager: Write sink for the output files
+        raw_data: Raw JSON-stat2 data from SSB API
+        raw_bytes: Serialised raw_data, if already at hand
+    """
+    # Decode once, derive every format from the same frame
+    with metrics.timed(metrics.PARSE, 'ssb', step='decode'):
+        outputs = SSBDataProcessor.process(raw_data)
+
+    # Save in multiple formats, concurrently
+    writes = [
+        (file_manager.save_raw_json, raw_bytes or json.dumps(raw_data).encode('utf-8'), "ssb_emissions.json"),
+        (file_manager.save_formatted_json, outputs['formatted_json']),
+        (file_manager.save_raw_csv, outputs['raw_csv']),
+        (file_manager.save_processed_table, outputs['clean_csv'], "ssb_emissions_clean"),
+    ]
+    with ThreadPoolExecutor(max_workers=len(writes), thread_name_prefix="ssb-write") as executor:
+        for future in [executor.submit(*write) for write in writes]:
+            future.result()
+
+    table_id = outputs['formatted_json']['metadata']['table_id']
+    file_manager.state_store('ssb_manifest').set(table_id, {
+        'updated': raw_data.get('updated'),
+        'fetched_at': datetime.now().isoformat()
+    })
+
+
+# Source name -> (progress message, fetch function taking a DataFileManager)
+SOURCE_FETCHERS = {
+    'ssb': ("📊 Fetching SSB emissions data...", fetch_ssb_source),
+    'elhub': ("⚡ Fetching Elhub energy data...", fetch_elhub_data),
+    'enova': ("🔋 Fetching Enova energy efficiency data...", fetch_enova_data),
+}
+
+# Sources whose fetch function supports incremental mode
+INCREMENTAL_SOURCES = {'ssb', 'elhub'}
+
+
+def _source_fetchers(incremental: bool) -> Dict[str, Any]:
+    """Get the source fetchers, bound to the requested fetch mode"""
+    fetchers = {}
+    for name, (message, fetcher) in SOURCE_FETCHERS.items():
+        if incremental and name in INCREMENTAL_SOURCES:
+            fetcher = partial(fetcher, incremental=True)
+        fetchers[name] = (message, fetcher)
+    return fetchers
+
+
+def _fetch_status(outcome) -> str:
+    """Map the return value of a source fetch to a summary status"""
+    if outcome == SKIPPED:
+        return SKIPPED
+    return 'success' if outcome else 'failed'
+
+
+async def _run_source(name: str, message: str, fetcher, executor: ThreadPoolExecutor,
+                      file_manager: DataFileManager, timeout: float) -> Dict[str, Any]:
+    """Run one blocking source fetch in a worker thread with a timeout"""
+    print(f"\n{message}")
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    result = {'source': name, 'status': 'failed', 'error': None}
+    cancellation.reset(name)
+
     try:
-        ssb_client = SSBApiClient()
-        raw_data = ssb_client.fetch_emissions_data()
-        
-        # Save in multiple formats
-        file_manager.save_raw_json(
-            json.dumps(raw_data).encode('utf-8'),
-            "ssb_emissions.json"
+        outcome = await asyncio.wait_for(
+            loop.run_in_executor(executor, fetcher, file_manager),
+            timeout=timeout
         )
-        
-        formatted_data = SSBDataProcessor.to_formatted_json(raw_data)
-        file_manager.save_formatted_json(formatted_data)
-        
-        raw_df = SSBDataProcessor.to_raw_csv(raw_data)
-        file_manager.save_raw_csv(raw_df)
-        
-        clean_df = SSBDataProcessor.to_clean_csv(raw_data)
-        file_manager.save_processed_csv(clean_df)
-        
-        print("✅ SSB data fetched and saved successfully")
-        
+        result['status'] = _fetch_status(outcome)
+    except asyncio.TimeoutError:
+        # The worker keeps running until its next request or file write
+        cancellation.cancel(name)
+        result['status'] = 'timeout'
+        result['error'] = f"no result after {timeout:g}s"
+        print(f"⏱️ {name.upper()} fetch timed out after {timeout:g}s - cancelled at its next request or write")
     except Exception as e:
-        print(f"❌ Error fetching SSB data: {e}")
-    
-    # Fetch Elhub data
-    print("\n⚡ Fetching Elhub energy data...")
+        result['status'] = 'error'
+        result['error'] = str(e)
+        print(f"❌ Error fetching {name.upper()} data: {e}")
+
+    result['duration_s'] = round(time.perf_counter() - start, 2)
+    return result
+
+
+async def fetch_all_data_async(timeouts: Optional[Dict[str, float]] = None,
+                               file_manager: Optional[DataFileManager] = None,
+                               incremental: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch all sources concurrently
+
+    Each source runs in its own worker thread, so the total wall-clock time is
+    bounded by the slowest source (or its timeout) instead of the sum of all
+    sources. A source that times out is reported as such and cancelled (see
+    cancellation.cancel): its worker cannot be interrupted, so a request or
+    file write already under way still completes, but it raises
+    FetchCancelled at its next request or write instead of carrying on.
+
+    Args:
+        timeouts: Per-source timeouts in seconds, merged over DEFAULT_SOURCE_TIMEOUTS
+        file_manager: Write sink shared by all sources
+        incremental: Skip sources that have published nothing new
+
+    Returns:
+        Dictionary mapping source name to its status, duration and error
+    """
+    timeouts = {**DEFAULT_SOURCE_TIMEOUTS, **(timeouts or {})}
+    file_manager = file_manager or DataFileManager()
+
+    fetchers = _source_fetchers(incremental)
+
+    executor = ThreadPoolExecutor(max_workers=len(fetchers), thread_name_prefix="fetch")
     try:
-        fetch_elhub_data()
-    except Exception as e:
-        print(f"❌ Error fetching Elhub data: {e}")
-    
-    # Fetch Enova data
-    print("\n🔋 Fetching Enova energy efficiency data...")
+        results = await asyncio.gather(*(
+            _run_source(name, message, fetcher, executor, file_manager, timeouts[name])
+            for name, (message, fetcher) in fetchers.items()
+        ))
+    finally:
+        # Don't block on workers that outlived their timeout
+        executor.shutdown(wait=False)
+
+    return {result['source']: result for result in results}
+
+
+def print_fetch_summary(result: FetchResult):
+    """Print a per-source summary of a fetch run"""
+    icons = {'success': '✅', SKIPPED: '⏭️', 'failed': '❌', 'error': '❌', 'timeout': '⏱️'}
+
+    print("\n📋 Fetch summary:")
+    print(f"  {'source':<9} {'status':<8} {'time':>8} {'rows':>11} {'written':>11}")
+    for name, source in result.sources.items():
+        icon = icons.get(source.status, '❔')
+        line = (f"  {icon} {name.upper():<6} {source.status:<8} {source.duration_s:>7.2f}s "
+                f"{source.rows:>11,} {_format_bytes(source.bytes_written):>11}")
+        if source.error:
+            line += f"  ({source.error})"
+        print(line)
+    print(f"  ⏱️ {result.duration_s:.2f}s total, {result.rows:,} rows and "
+          f"{_format_bytes(result.bytes_written)} written")
+
+    print("\n📈 Where the time went:")
+    print(f"  {'source':<7} {'requests':>8} {'retries':>7} {'latency':>9} {'waited':>9} {'received':>10} "
+          f"{'parse':>8} {'write':>8}")
+    for name, source in result.sources.items():
+        print(f"  {name.upper():<7} {source.requests:>8} {source.retries:>7} {source.request_s:>8.2f}s "
+              f"{source.wait_s:>8.2f}s {_format_bytes(source.response_bytes):>10} "
+              f"{source.parse_s:>7.2f}s {source.write_s:>7.2f}s")
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _fetch_all_sequential(file_manager: DataFileManager, incremental: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Fetch all sources one after another"""
+    summary = {}
+
+    for name, (message, fetcher) in _source_fetchers(incremental).items():
+        print(f"\n{message}")
+        start = time.perf_counter()
+        result = {'source': name, 'status': 'failed', 'error': None}
+
+        try:
+            result['status'] = _fetch_status(fetcher(file_manager))
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = str(e)
+            print(f"❌ Error fetching {name.upper()} data: {e}")
+
+        result['duration_s'] = round(time.perf_counter() - start, 2)
+        summary[name] = result
+
+    return summary
+
+
+def run_fetch(concurrent: bool = True, timeouts: Optional[Dict[str, float]] = None,
+              incremental: bool = False, file_manager: Optional[DataFileManager] = None,
+              metrics_sink=None) -> FetchResult:
+    """
+    Fetch data from all sources in this process
+
+    Args:
+        concurrent: Run all sources at the same time. Falls back to the
+            sequential path when disabled or when called from inside a
+            running event loop (use fetch_all_data_async there instead).
+        timeouts: Per-source timeouts in seconds (concurrent mode only). A
+            source that times out is cancelled at its next request or file
+            write, but a write already under way still completes after this
+            returns and is missing from the reported writes; its files are
+            not loaded into the analytical store.
+        incremental: Only download and rewrite sources that have published
+            new data since the last run
+        file_manager: Write sink shared by all sources
+        metrics_sink: Extra sink for the request, parse and write events
+            (FETCH_METRICS_PATH adds a JSON-lines file as well)
+
+    Returns:
+        FetchResult with status, duration, rows and bytes written, request
+        latency and waits, retries, parse and write time per source
+    """
+    print("🚀 Starting data fetch from all sources...")
+
+    file_manager = file_manager or DataFileManager()
+    started_at = datetime.now().isoformat()
+    start = time.perf_counter()
+    first_write = len(file_manager.writes)
+
+    registry = metrics.MetricsRegistry()
+    sinks = [registry, metrics_sink]
+    if config.fetch_metrics_path:
+        sinks.append(metrics.JsonLinesSink(config.fetch_metrics_path))
+    sinks = [sink for sink in sinks if sink is not None]
+    for sink in sinks:
+        metrics.add_sink(sink)
+
     try:
-        fetch_enova_data()
+        summary = _run_sources(file_manager, concurrent, timeouts, incremental)
+    finally:
+        for sink in sinks:
+            metrics.remove_sink(sink)
+
+    # A timed-out source may still be finishing a write; leave its files alone
+    loaded = [name for name, result in summary.items() if result['status'] != 'timeout']
+    try:
+        load_analytics_store(file_manager, loaded)
     except Exception as e:
-        print(f"❌ Error fetching Enova data: {e}")
-    
+        print(f"⚠️ Analytics store not updated: {e}")
+
+    sources = {name: SourceFetchResult(**result) for name, result in summary.items()}
+    for write in file_manager.writes[first_write:]:
+        result = sources.get(file_manager.source_of(write['path']))
+        if result is not None:
+            result.rows += write['rows'] or 0
+            result.bytes_written += write['bytes']
+            result.files.append(str(write['path']))
+
+    for name, totals in registry.summary().items():
+        if name in sources:
+            result = sources[name]
+            result.requests = totals['requests']
+            result.retries = totals['retries']
+            result.request_s = round(totals['request_s'], 3)
+            result.wait_s = round(totals['wait_s'], 3)
+            result.response_bytes = totals['response_bytes']
+            result.parse_s = round(totals['parse_s'], 3)
+            result.write_s = round(totals['write_s'], 3)
+
+    result = FetchResult(started_at, round(time.perf_counter() - start, 2), sources)
+
+    print_fetch_summary(result)
     print("\n🎉 Data fetch completed!")
+    return result
+
+
+def _run_sources(file_manager: DataFileManager, concurrent: bool, timeouts: Optional[Dict[str, float]],
+                 incremental: bool) -> Dict[str, Dict[str, Any]]:
+    """Fetch every source, concurrently if possible"""
+    if concurrent:
+        try:
+            asyncio.get_running_loop()
+            print("⚠️ Event loop already running - falling back to sequential fetch")
+            concurrent = False
+        except RuntimeError:
+            pass
+
+    if concurrent:
+        return asyncio.run(fetch_all_data_async(timeouts, file_manager, incremental))
+    return _fetch_all_sequential(file_manager, incremental)
+
+
+def fetch_all_data(concurrent: bool = True, timeouts: Optional[Dict[str, float]] = None,
+                   incremental: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch data from all sources
+
+    Same as run_fetch, with the result as plain dictionaries.
+
+    Returns:
+        Dictionary mapping source name to its fetch result
+    """
+    result = run_fetch(concurrent, timeouts, incremental)
+    return {name: asdict(source) for name, source in result.sources.items()}
+
+
+def build_fetch_pipeline(file_manager: Optional[DataFileManager] = None, incremental: bool = False,
+                         max_workers: int = 4) -> Pipeline:
+    """
+    Build the fetch and processing pipeline
+
+    Each source gets a fetch stage, which only writes the raw response, and
+    a processing stage that derives the other outputs from that file, and
+    a load stage that brings the analytical store up to date. The three
+    sources run side by side, and a processing stage is skipped when its
+    raw file has the same content as on its last run.
+
+    Args:
+        file_manager: Write sink shared by all stages
+        incremental: Fetch stages skip sources with no new data
+        max_workers: Maximum number of stages running at once
+
+    Returns:
+        Pipeline ready to run; callers may add further stages
+    """
+    file_manager = file_manager or DataFileManager()
+    raw, processed = file_manager.raw_dir, file_manager.processed_dir
+
+    return Pipeline(file_manager, [
+        Stage('fetch_ssb', partial(download_ssb_source, file_manager, incremental),
+              outputs=[raw / "ssb_emissions.json"]),
+        Stage('process_ssb', partial(process_ssb_file, file_manager),
+              inputs=[raw / "ssb_emissions.json"],
+              outputs=[raw / "ssb_emissions_formatted.json", raw / "ssb_emissions_raw.csv",
+                       processed / "ssb_emissions_clean.arrow", processed / "ssb_emissions_clean.csv"]),
+        Stage('fetch_elhub', partial(fetch_elhub_data, file_manager, incremental=incremental, process=False),
+              outputs=[raw / "elhub_energy.json"]),
+        Stage('process_elhub', partial(process_elhub_file, file_manager),
+              inputs=[raw / "elhub_energy.json"],
+              outputs=[processed / "elhub"]),
+        Stage('fetch_enova', partial(fetch_enova_data, file_manager, process=False),
+              outputs=[raw / "enova_efficiency.json"]),
+        Stage('process_enova', partial(process_enova_file, file_manager),
+              inputs=[raw / "enova_efficiency.json"],
+              outputs=[processed / f"{name}{suffix}"
+                       for name in ("company_efficiency_summary", "efficiency_projects", "company_annual_metrics")
+                       for suffix in (".arrow", ".csv")]),
+        # Cheap when nothing changed: the store only reloads changed tables and partitions
+        Stage('load_ssb', partial(load_analytics_store, file_manager, ['ssb']),
+              after=['process_ssb'], always_run=True),
+        Stage('load_elhub', partial(load_analytics_store, file_manager, ['elhub']),
+              after=['process_elhub'], always_run=True),
+        Stage('load_enova', partial(load_analytics_store, file_manager, ['enova']),
+              after=['process_enova'], always_run=True),
+    ], max_workers=max_workers)
+
+
+def run_pipeline(incremental: bool = False, force: bool = False, max_workers: int = 4) -> Dict[str, Any]:
+    """
+    Run the fetch and processing pipeline and print its timing report
+
+    Args:
+        incremental: Fetch stages skip sources with no new data
+        force: Run processing stages even when their inputs are unchanged
+        max_workers: Maximum number of stages running at once
+
+    Returns:
+        Pipeline report (see Pipeline.run)
+    """
+    report = build_fetch_pipeline(incremental=incremental, max_workers=max_workers).run(force=force)
+    print_pipeline_report(report)
+    return report
+
+
+def reprocess_snapshot(source: str, sha256: Optional[str] = None,
+                       file_manager: Optional[DataFileManager] = None) -> bool:
+    """
+    Rebuild a source's outputs from an archived raw response, without the network
+
+    Args:
+        source: Source name ('ssb', 'elhub' or 'enova')
+        sha256: Snapshot hash or hash prefix (defaults to the latest snapshot)
+        file_manager: Write sink for the output files
+
+    Returns:
+        True if a snapshot was found and reprocessed
+    """
+    file_manager = file_manager or DataFileManager()
+    archive = file_manager.archive
+
+    entry = archive.find(sha256) if sha256 else archive.latest(source)
+    if entry is None or entry['source'] != source:
+        print(f"❌ No archived {source.upper()} snapshot{f' matching {sha256}' if sha256 else ''}")
+        return False
+
+    print(f"♻️ Reprocessing {source.upper()} snapshot {entry['sha256'][:12]} fetched {entry['fetched_at']}")
+
+    if source == 'elhub':
+        with archive.open(entry['sha256']) as body:
+            save_elhub_snapshot(file_manager, body, entry['metadata'])
+    elif source == 'ssb':
+        raw_bytes = archive.read(entry['sha256'])
+        save_ssb_outputs(file_manager, json.loads(raw_bytes), raw_bytes)
+    else:
+        save_enova_outputs(file_manager, json.loads(archive.read(entry['sha256'])))
+
+    print(f"✅ {source.upper()} outputs rebuilt from snapshot")
+    return True
 
 
 def fetch_ssb_only():
@@ -121,4 +595,11 @@ def fetch_ssb_only():
 
 
 if __name__ == "__main__":
-    fetch_all_data()
+    parser = argparse.ArgumentParser(description="Fetch data from all GreenPulse sources")
+    parser.add_argument('--sequential', action='store_true',
+                        help='Fetch sources one after another instead of concurrently')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Skip downloads and writes for sources with no new data')
+    args = parser.parse_args()
+
+    run_fetch(concurrent=not args.sequential, incremental=args.incremental)
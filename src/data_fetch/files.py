@@ -0,0 +1,224 @@
+"""
+File management for fetched and processed data
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, BinaryIO, Callable, List, Optional
+
+from . import cancellation, metrics
+from .archive import RawSnapshotArchive
+from .columnar import ARROW_SUFFIX, PROCESSED_SCHEMAS, write_arrow
+from .state import JsonStateStore
+
+# First path component (under data/raw or data/processed) of each source's files
+SOURCE_FILE_PREFIXES = {
+    'ssb': ('ssb_',),
+    'elhub': ('elhub',),
+    'enova': ('enova_', 'company_', 'efficiency_'),
+}
+
+
+class DataFileManager:
+    """
+    Manage saving data files in different formats
+
+    Every save goes to a temporary file in the target directory and is
+    renamed into place, so readers never see a half-written file. The
+    content hash of each file is kept in the 'file_hashes' state store; a
+    save whose bytes match the file on disk is dropped, leaving the existing
+    file and its mtime untouched.
+
+    Every write that changed a file is listed in `writes`, with its size and,
+    for tables, its row count, so a fetch run can report what it wrote.
+    """
+
+    def __init__(self, project_root: Path = None):
+        if project_root is None:
+            project_root = Path(__file__).resolve().parents[2]
+
+        self.project_root = project_root
+        self.raw_dir = project_root / "data" / "raw"
+        self.processed_dir = project_root / "data" / "processed"
+        self.state_dir = project_root / "data" / "state"
+        self.archive = RawSnapshotArchive(project_root / "data" / "archive")
+        self._state_stores: Dict[str, JsonStateStore] = {}
+        self._state_lock = threading.Lock()
+        self.file_hashes = self.state_store('file_hashes')
+        self.writes: List[Dict[str, Any]] = []
+        self._writes_lock = threading.Lock()
+
+        # Create directories if they don't exist
+        self.raw_dir.mkdir(parents=True, exist_ok=True)
+        self.processed_dir.mkdir(parents=True, exist_ok=True)
+
+    def state_store(self, name: str) -> JsonStateStore:
+        """Get the persistent state store with the given name"""
+        with self._state_lock:
+            if name not in self._state_stores:
+                self._state_stores[name] = JsonStateStore(self.state_dir / f"{name}.json")
+            return self._state_stores[name]
+
+    def save_raw_json(self, data: bytes, filename: str = "ssb_emissions.json") -> Path:
+        """Save raw JSON response from API"""
+        return self.write_atomic(self.raw_dir / filename, lambda f: f.write(data))
+
+    def save_formatted_json(self, data: Dict[str, Any], filename: str = "ssb_emissions_formatted.json") -> Path:
+        """Save formatted JSON data"""
+        content = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        return self.write_atomic(self.raw_dir / filename, lambda f: f.write(content))
+
+    def save_raw_csv(self, df, filename: str = "ssb_emissions_raw.csv") -> Path:
+        """Save raw CSV data"""
+        return self.write_atomic(self.raw_dir / filename, lambda f: df.to_csv(f, index=False), rows=len(df))
+
+    def save_processed_csv(self, df, filename: str = "ssb_emissions_clean.csv") -> Path:
+        """Save processed CSV data"""
+        return self.write_atomic(self.processed_dir / filename, lambda f: df.to_csv(f, index=False), rows=len(df))
+
+    def save_processed_table(self, df, name: str) -> Path:
+        """
+        Save a processed table as an Arrow IPC file, plus a CSV export
+
+        The Arrow file is what the analysis and dashboard read (memory-mapped,
+        with the schema from PROCESSED_SCHEMAS); the CSV is kept for people
+        and tools outside the project.
+
+        Args:
+            df: Processed table
+            name: File stem, e.g. 'ssb_emissions_clean'
+
+        Returns:
+            Path of the Arrow file
+        """
+        schema = PROCESSED_SCHEMAS.get(name)
+        arrow_path = self.write_atomic(
+            self.processed_dir / f"{name}{ARROW_SUFFIX}", lambda f: write_arrow(df, f, schema), rows=len(df)
+        )
+        self.save_processed_csv(df, f"{name}.csv")
+        return arrow_path
+
+    def save_json_with_body(self, envelope: Dict[str, Any], body_key: str, body: BinaryIO,
+                            filename: str) -> Path:
+        """
+        Save a JSON object whose body_key value is copied verbatim from a stream
+
+        Lets a large API response be wrapped with metadata without parsing it.
+        The body must itself be a valid JSON document.
+        """
+        head = json.dumps(envelope, ensure_ascii=False)[:-1]
+        separator = ', ' if envelope else ''
+
+        def write(f: BinaryIO):
+            f.write(f'{head}{separator}{json.dumps(body_key)}: '.encode('utf-8'))
+            shutil.copyfileobj(body, f)
+            f.write(b'}')
+
+        return self.write_atomic(self.raw_dir / filename, write)
+
+    def write_atomic(self, filepath: Path, write: Callable[[BinaryIO], Any], rows: Optional[int] = None) -> Path:
+        """
+        Write a file through a temporary file and an atomic rename
+
+        Args:
+            filepath: Target path
+            write: Callback writing the file content to a binary file object
+            rows: Number of table rows in the content, for the write log
+
+        Returns:
+            The target path, whether or not its content changed
+        """
+        start = time.perf_counter()
+        cancellation.check(self.source_of(filepath))
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            digest = file_digest(tmp_path)
+
+            if digest == self.file_digest(filepath):
+                os.unlink(tmp_path)
+                # Hashed from disk when the manifest entry was missing or stale
+                self._remember_digest(filepath, digest)
+                metrics.emit(metrics.WRITE, self.source_of(filepath), path=str(filepath), bytes=0,
+                             rows=rows, changed=False, seconds=round(time.perf_counter() - start, 6))
+                return filepath
+
+            # Checked again before the rename: a fetch that timed out while
+            # writing leaves the file as it was
+            cancellation.check(self.source_of(filepath))
+
+            # mkstemp creates the file owner-only; keep the usual permissions
+            os.chmod(tmp_path, filepath.stat().st_mode & 0o777 if filepath.exists() else 0o644)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        stat = self._remember_digest(filepath, digest)
+        self.record_write(filepath, stat.st_size, rows, time.perf_counter() - start)
+        return filepath
+
+    def record_write(self, filepath: Path, size: int, rows: Optional[int] = None,
+                     seconds: Optional[float] = None):
+        """Add a written file to the write log (also used by stores writing on their own)"""
+        with self._writes_lock:
+            self.writes.append({'path': Path(filepath), 'bytes': size, 'rows': rows})
+        metrics.emit(metrics.WRITE, self.source_of(filepath), path=str(filepath), bytes=size, rows=rows,
+                     changed=True, seconds=round(seconds or 0.0, 6))
+
+    def source_of(self, filepath: Path) -> Optional[str]:
+        """Name of the source a data file belongs to, by its name under data/raw or data/processed"""
+        for base in (self.raw_dir, self.processed_dir):
+            try:
+                name = Path(filepath).relative_to(base).parts[0]
+            except ValueError:
+                continue
+            for source, prefixes in SOURCE_FILE_PREFIXES.items():
+                if name.startswith(prefixes):
+                    return source
+        return None
+
+    def _manifest_key(self, filepath: Path) -> str:
+        try:
+            return filepath.resolve().relative_to(self.project_root.resolve()).as_posix()
+        except ValueError:
+            return str(filepath.resolve())
+
+    def _remember_digest(self, filepath: Path, digest: str) -> os.stat_result:
+        """Store a file's hash in the manifest unless the entry is already current"""
+        stat = filepath.stat()
+        key = self._manifest_key(filepath)
+        entry = {'sha256': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if self.file_hashes.get(key) != entry:
+            self.file_hashes.set(key, entry)
+        return stat
+
+    def file_digest(self, filepath: Path) -> Optional[str]:
+        """Hash of the file on disk, from the manifest while size and mtime still match"""
+        try:
+            stat = filepath.stat()
+        except FileNotFoundError:
+            return None
+
+        entry = self.file_hashes.get(self._manifest_key(filepath))
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            return entry['sha256']
+        return file_digest(filepath)
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
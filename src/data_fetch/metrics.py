@@ -0,0 +1,144 @@
+"""
+Fetch instrumentation: request, parse and write timings sent to pluggable sinks
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Event kinds and the summary counters they feed
+REQUEST = 'request'
+DOWNLOAD = 'download'
+PARSE = 'parse'
+WRITE = 'write'
+
+
+class MetricsRegistry:
+    """
+    In-memory metrics sink
+
+    Keeps every event and summarises them per source: request count,
+    latency and time spent waiting on rate limits and backoff, response
+    bytes, retries, parse time, write count, time and bytes.
+    """
+
+    def __init__(self):
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, event: Dict[str, Any]):
+        with self._lock:
+            self._events.append(event)
+
+    def events(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [event for event in self._events if kind is None or event['kind'] == kind]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-source totals of all recorded events"""
+        totals = defaultdict(lambda: {
+            'requests': 0, 'request_s': 0.0, 'max_request_s': 0.0, 'wait_s': 0.0, 'response_bytes': 0,
+            'retries': 0, 'parse_s': 0.0, 'writes': 0, 'write_s': 0.0, 'written_bytes': 0
+        })
+
+        for event in self.events():
+            source = totals[event.get('source') or 'other']
+            seconds = event.get('seconds', 0.0)
+            if event['kind'] == REQUEST:
+                source['requests'] += 1
+                source['request_s'] += seconds
+                source['max_request_s'] = max(source['max_request_s'], seconds)
+                source['retries'] += event.get('retries', 0)
+                source['wait_s'] += event.get('wait_s', 0.0)
+                source['response_bytes'] += event.get('bytes') or 0
+            elif event['kind'] == DOWNLOAD:
+                source['request_s'] += seconds
+                source['response_bytes'] += event.get('bytes') or 0
+            elif event['kind'] == PARSE:
+                source['parse_s'] += seconds
+            elif event['kind'] == WRITE:
+                source['writes'] += 1
+                source['write_s'] += seconds
+                source['written_bytes'] += event.get('bytes') or 0
+
+        return {name: dict(values) for name, values in sorted(totals.items())}
+
+
+class JsonLinesSink:
+    """Metrics sink appending one JSON object per event to a file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def record(self, event: Dict[str, Any]):
+        line = json.dumps(event, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+_sinks: List[Any] = []
+_sinks_lock = threading.Lock()
+
+
+def add_sink(sink):
+    """Start sending events to a sink (anything with a record(event) method)"""
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def emit(kind: str, source: Optional[str], **fields):
+    """Send one event to every sink; does nothing when no sink is installed"""
+    if not _sinks:
+        return
+
+    event = {'time': time.time(), 'kind': kind, 'source': source, **fields}
+    with _sinks_lock:
+        sinks = list(_sinks)
+    for sink in sinks:
+        sink.record(event)
+
+
+@contextmanager
+def timed(kind: str, source: Optional[str], **fields) -> Iterator[Dict[str, Any]]:
+    """
+    Time a block and emit one event for it
+
+    Yields the event fields, so the block can add to them (e.g. bytes).
+    """
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        emit(kind, source, seconds=round(time.perf_counter() - start, 6), **fields)
+
+
+def timed_iter(kind: str, source: Optional[str], iterator, **fields) -> Iterator[Any]:
+    """Pass items through, emitting one event with the time spent producing them"""
+    seconds = 0.0
+    items = 0
+    iterator = iter(iterator)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                seconds += time.perf_counter() - start
+            items += 1
+            yield item
+    finally:
+        emit(kind, source, seconds=round(seconds, 6), items=items, **fields)
@@ -0,0 +1,356 @@
+"""
+Partitioned Parquet storage for Elhub hourly time series
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Dataset of the hourly consumption per group, the one the dashboard shows
+DEFAULT_DATASET = 'CONSUMPTION_PER_GROUP_MBA_HOUR'
+
+# Columns stored as categoricals in memory and dictionary-encoded on disk
+CATEGORY_COLUMNS = ('price_area', 'consumption_group', 'area_id')
+
+# Column order of frames returned by reads (ElhubDataProcessor.to_consumption_summary)
+SUMMARY_COLUMNS = [
+    'timestamp', 'price_area', 'consumption_group', 'quantity_kwh', 'metering_points',
+    'area_id', 'country', 'date', 'hour'
+]
+
+# File name prefix of a partition's merged file
+MERGED_PREFIX = 'part-merged-'
+
+# Times a read lists the partitions again when a part disappears under it
+READ_ATTEMPTS = 3
+
+# Identity of an hourly record; merged writes keep one row per key. area_id
+# is not part of it: a streamed record can get its price area as area_id when
+# the element id comes late, and must still replace the same hour.
+RECORD_KEY = ['timestamp', 'price_area', 'consumption_group']
+
+# The price area is the partition, so within a partition this is the key
+PARTITION_RECORD_KEY = [column for column in RECORD_KEY if column != 'price_area']
+
+# Merge locks per (resolved dataset directory, price area, month), shared by
+# every store instance in the process: the fetch, a backfill and the
+# analytical store loader each build their own store on the same directory
+_PARTITION_LOCKS = defaultdict(threading.Lock)
+_PARTITION_LOCKS_GUARD = threading.Lock()
+
+# On-disk schema of each part file; price_area and month live in the path
+FILE_SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('us', tz='Europe/Oslo')),
+    ('consumption_group', pa.dictionary(pa.int32(), pa.string())),
+    ('quantity_kwh', pa.float64()),
+    ('metering_points', pa.int64()),
+    ('area_id', pa.dictionary(pa.int32(), pa.string())),
+    ('country', pa.string()),
+    ('date', pa.timestamp('us')),
+    ('hour', pa.int8())
+])
+
+
+class ElhubParquetStore:
+    """
+    Hive-partitioned Parquet dataset of Elhub hourly records
+
+    Layout: <root>/<dataset>/price_area=NO5/month=2024-01/part-*.parquet
+
+    Rows carry the ElhubDataProcessor.to_consumption_summary columns, so a
+    read returns the same frame the dashboard builds from JSON. Reads only
+    touch the partitions and columns they ask for: "NO5, last 30 days,
+    quantity_kwh only" opens one or two files and decodes one column.
+
+    Writes to a partition are serialised by a lock shared by all stores on
+    the same directory within one process. Writes from separate processes
+    are not safe: two processes merging the same partition at once can
+    each remove the parts the other just read, losing rows.
+    """
+
+    PARTITIONING = ds.partitioning(
+        pa.schema([('price_area', pa.string()), ('month', pa.string())]),
+        flavor='hive'
+    )
+
+    def __init__(self, root: Path, dataset: str = DEFAULT_DATASET,
+                 on_write: Optional[Callable[[Path, int, int, float], None]] = None):
+        """
+        Args:
+            root: Directory holding all Elhub datasets
+            dataset: Elhub dataset name (one sub-directory per dataset)
+            on_write: Called with (path, bytes, rows, seconds) for every file written
+        """
+        self.root = Path(root)
+        self.dataset = dataset
+        self.on_write = on_write
+        self.path = self.root / dataset
+
+    def exists(self) -> bool:
+        return self.path.exists() and any(self.path.rglob('*.parquet'))
+
+    def partition_dir(self, price_area: str, month: str) -> Path:
+        return self.path / f"price_area={price_area}" / f"month={month}"
+
+    def write_batches(self, batches: Iterable[pd.DataFrame], replace: bool = False) -> int:
+        """
+        Write a stream of record batches, merged into their partitions
+
+        Each batch is staged under a hidden name next to the partition it
+        belongs to, so memory stays bounded by one batch. Once the stream is
+        exhausted, every touched partition is merged with its staged rows
+        the same way as upsert: newer rows win on RECORD_KEY and hours that
+        are only in the existing data (backfilled or ingested incrementally)
+        are kept.
+
+        Args:
+            batches: DataFrames with the consumption summary columns
+            replace: Replace each touched partition with the staged rows
+                instead of merging, for rebuilding a partition from a
+                complete snapshot. Partitions the stream does not touch are
+                left alone either way.
+
+        Returns:
+            Number of rows written
+        """
+        run_id = uuid.uuid4().hex[:12]
+        staged = defaultdict(list)
+        rows = 0
+
+        try:
+            for batch_number, batch in enumerate(batches):
+                for (price_area, month), part in self._split_partitions(batch):
+                    directory = self.partition_dir(price_area, month)
+                    directory.mkdir(parents=True, exist_ok=True)
+                    staging = directory / f".part-{run_id}-{batch_number:05d}.parquet.tmp"
+                    pq.write_table(self._to_table(part), staging)
+                    staged[(price_area, month)].append(staging)
+                rows += len(batch)
+
+            for (price_area, month), paths in staged.items():
+                self._merge_partition(price_area, month, paths, replace=replace)
+        finally:
+            for paths in staged.values():
+                for path in paths:
+                    path.unlink(missing_ok=True)
+
+        return rows
+
+    def upsert(self, df: pd.DataFrame) -> int:
+        """
+        Merge records into their partitions, replacing rows with the same key
+
+        Each touched partition is read, merged with the new rows (newer rows
+        win on RECORD_KEY), and rewritten as a single file.
+
+        Args:
+            df: Records with the consumption summary columns
+
+        Returns:
+            Number of rows in the merged partitions
+        """
+        return sum(
+            self._merge_partition(price_area, month, [part.drop(columns='price_area', errors='ignore')])
+            for (price_area, month), part in self._split_partitions(df)
+        )
+
+    def _merge_partition(self, price_area: str, month: str, new: List[Union[Path, pd.DataFrame]],
+                         replace: bool = False) -> int:
+        """
+        Rewrite one partition as a single file holding its merged rows
+
+        Runs under the partition lock. The new file is written under a
+        hidden name and renamed into place before the old parts are removed.
+        From the rename on it supersedes the old parts (see _current_parts),
+        so readers see either the old rows or the new ones, never an empty
+        partition or both.
+
+        Args:
+            price_area: Partition price area
+            month: Partition month (YYYY-MM)
+            new: Staged part files or frames, oldest first
+            replace: Drop the existing rows instead of merging with them
+
+        Returns:
+            Number of rows in the partition
+        """
+        with self._partition_lock(price_area, month):
+            directory = self.partition_dir(price_area, month)
+            directory.mkdir(parents=True, exist_ok=True)
+            old_files = sorted(directory.glob('*.parquet'))
+
+            frames = [] if replace else [
+                pq.read_table(path, schema=FILE_SCHEMA).to_pandas() for path in self._current_parts(directory)
+            ]
+            frames.extend(
+                pq.read_table(item, schema=FILE_SCHEMA).to_pandas() if isinstance(item, Path) else item
+                for item in new
+            )
+            merged = pd.concat(frames, ignore_index=True)
+            merged = merged.drop_duplicates(subset=PARTITION_RECORD_KEY, keep='last').sort_values('timestamp')
+
+            # Names sort by time, so the newest merged file is the current one
+            name = f"{MERGED_PREFIX}{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+            staging = directory / f".{name}.tmp"
+            start = time.perf_counter()
+            pq.write_table(self._to_table(merged), staging)
+            staging.replace(directory / name)
+            self._report_write(directory / name, len(merged), start)
+            for path in old_files:
+                path.unlink(missing_ok=True)
+
+            return len(merged)
+
+    def read(self, price_areas: Optional[Iterable[str]] = None,
+             start: Optional[Union[datetime, str]] = None,
+             end: Optional[Union[datetime, str]] = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read records with partition pruning and column projection
+
+        Args:
+            price_areas: Only read these price areas
+            start: Only read records at or after this time
+            end: Only read records before this time
+            columns: Only read these columns (all columns when None)
+
+        Returns:
+            DataFrame of the matching records
+        """
+        if start is not None:
+            start = as_timestamp(start)
+        if end is not None:
+            end = as_timestamp(end)
+
+        expression = None
+        if price_areas:
+            expression = _and(expression, ds.field('price_area').isin(list(price_areas)))
+        if start is not None:
+            expression = _and(expression, ds.field('timestamp') >= start.to_pydatetime())
+        if end is not None:
+            expression = _and(expression, ds.field('timestamp') < end.to_pydatetime())
+
+        # A merge may remove a part between listing and opening it; list again
+        for attempt in range(READ_ATTEMPTS):
+            files = self._part_files(price_areas, start, end)
+            if not files:
+                return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
+            try:
+                dataset = ds.dataset(
+                    [str(path) for path in files],
+                    format='parquet',
+                    partitioning=self.PARTITIONING,
+                    partition_base_dir=str(self.path),
+                    schema=pa.unify_schemas([FILE_SCHEMA, self.PARTITIONING.schema])
+                )
+                table = dataset.to_table(columns=columns, filter=expression)
+                break
+            except FileNotFoundError:
+                if attempt == READ_ATTEMPTS - 1:
+                    raise
+
+        df = table.to_pandas()
+
+        for column in CATEGORY_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+
+        return df[[column for column in SUMMARY_COLUMNS if column in df.columns]]
+
+    def _part_files(self, price_areas: Optional[Iterable[str]], start: Optional[pd.Timestamp],
+                    end: Optional[pd.Timestamp]) -> List[Path]:
+        """Current part files of the partitions a read can match"""
+        areas = set(price_areas) if price_areas else None
+        files = []
+        for area_dir in sorted(self.path.glob('price_area=*')):
+            if areas is not None and area_dir.name.split('=', 1)[1] not in areas:
+                continue
+            for month_dir in sorted(area_dir.glob('month=*')):
+                month = month_dir.name.split('=', 1)[1]
+                if (start is not None and month < f"{start:%Y-%m}") or (end is not None and month > f"{end:%Y-%m}"):
+                    continue
+                files.extend(self._current_parts(month_dir))
+        return files
+
+    def partitions(self) -> Iterator[Tuple[str, str, List[Path]]]:
+        """Yield (price_area, month, current part files) for every non-empty partition"""
+        for month_dir in sorted(self.path.glob('price_area=*/month=*')):
+            files = self._current_parts(month_dir)
+            if files:
+                yield month_dir.parent.name.split('=', 1)[1], month_dir.name.split('=', 1)[1], files
+
+    @staticmethod
+    def _current_parts(directory: Path) -> List[Path]:
+        """
+        Part files holding a partition's rows
+
+        The newest merged file holds every row of the partition, so any
+        other part next to it is an old one about to be removed. Partitions
+        without a merged file are made of all their parts.
+        """
+        parts = sorted(directory.glob('*.parquet'))
+        merged = [path for path in parts if path.name.startswith(MERGED_PREFIX)]
+        return merged[-1:] if merged else parts
+
+    def _report_write(self, filepath: Path, rows: int, start: float):
+        if self.on_write is not None:
+            self.on_write(filepath, filepath.stat().st_size, rows, time.perf_counter() - start)
+
+    def _partition_lock(self, price_area: str, month: str) -> threading.Lock:
+        with _PARTITION_LOCKS_GUARD:
+            return _PARTITION_LOCKS[(str(self.path.resolve()), price_area, month)]
+
+    @staticmethod
+    def _split_partitions(df: pd.DataFrame):
+        """Yield ((price_area, month), rows) for every partition in a frame"""
+        if df.empty:
+            return
+
+        months = df['date'].dt.strftime('%Y-%m')
+        for (price_area, month), part in df.groupby([df['price_area'].astype(str), months], observed=True, sort=False):
+            yield (price_area, month), part
+
+    @staticmethod
+    def _to_table(df: pd.DataFrame) -> pa.Table:
+        # The partition value is encoded in the path, not the file
+        return pa.Table.from_pandas(df, schema=FILE_SCHEMA, preserve_index=False)
+
+
+def parts_identity(paths: Iterable[Path]) -> str:
+    """
+    Identity of a set of part files: paths, sizes and mtimes
+
+    Each file is stat'ed once. A file removed by a concurrent merge is left
+    out; the identity then differs from the next listing, so whatever was
+    read under it is reloaded.
+    """
+    identity = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        identity.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return hashlib.sha256(json.dumps(identity).encode('utf-8')).hexdigest()
+
+
+def _and(expression, clause):
+    return clause if expression is None else expression & clause
+
+
+def as_timestamp(value: Union[datetime, str]) -> pd.Timestamp:
+    """Normalise a bound to a tz-aware timestamp in Norwegian local time"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize('Europe/Oslo')
+    return timestamp.tz_convert('Europe/Oslo')
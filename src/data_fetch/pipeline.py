@@ -0,0 +1,244 @@
+"""
+Small DAG scheduler for the fetch and processing pipeline
+"""
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+# A stage function returning this did not need to do any work
+SKIPPED = 'skipped'
+
+
+class Stage:
+    """
+    One step of a pipeline
+
+    A stage depends on every stage that produces one of its inputs, plus any
+    stage named in `after`. Stages with inputs are skipped when the content
+    of all inputs is the same as on their last successful run and all their
+    outputs still exist.
+    """
+
+    def __init__(self, name: str, func: Callable[[], Any], inputs: Iterable[Path] = (),
+                 outputs: Iterable[Path] = (), after: Iterable[str] = (), always_run: bool = False):
+        """
+        Args:
+            name: Unique stage name
+            func: Work to do; returning False marks the stage as failed and
+                returning SKIPPED marks it as skipped
+            inputs: Files the stage reads
+            outputs: Files the stage writes
+            after: Names of stages that must finish first
+            always_run: Never skip, e.g. for stages that talk to an API
+        """
+        self.name = name
+        self.func = func
+        self.inputs = [Path(path) for path in inputs]
+        self.outputs = [Path(path) for path in outputs]
+        self.after = list(after)
+        self.always_run = always_run or not self.inputs
+
+
+class Pipeline:
+    """
+    Run stages in dependency order on a worker pool
+
+    Independent stages run in parallel. Each run reports per-stage status
+    and timing and the critical path: the chain of dependent stages that
+    determined the total wall-clock time.
+    """
+
+    def __init__(self, file_manager, stages: Iterable[Stage] = (), max_workers: int = 4,
+                 state_name: str = 'pipeline'):
+        """
+        Args:
+            file_manager: DataFileManager, used to hash inputs and keep run state
+            stages: Initial stages
+            max_workers: Maximum number of stages running at once
+            state_name: State store holding the input fingerprints of past runs
+        """
+        self.file_manager = file_manager
+        self.max_workers = max_workers
+        self.state = file_manager.state_store(state_name)
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> Stage:
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {stage.name}")
+        self.stages[stage.name] = stage
+        return stage
+
+    def dependencies(self) -> Dict[str, List[str]]:
+        """Map each stage to the stages it waits for"""
+        producers = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                producers[output.resolve()] = stage.name
+
+        dependencies = {}
+        for stage in self.stages.values():
+            upstream = set(stage.after)
+            upstream.update(
+                producers[path.resolve()] for path in stage.inputs
+                if path.resolve() in producers and producers[path.resolve()] != stage.name
+            )
+            unknown = upstream - self.stages.keys()
+            if unknown:
+                raise ValueError(f"Stage {stage.name} waits for unknown stages: {sorted(unknown)}")
+            dependencies[stage.name] = sorted(upstream)
+        return dependencies
+
+    def topological_order(self, dependencies: Dict[str, List[str]]) -> List[str]:
+        order = []
+        remaining = {name: set(upstream) for name, upstream in dependencies.items()}
+        while remaining:
+            ready = sorted(name for name, upstream in remaining.items() if not upstream)
+            if not ready:
+                raise ValueError(f"Pipeline has a dependency cycle between: {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for upstream in remaining.values():
+                upstream.difference_update(ready)
+        return order
+
+    def run(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Run the pipeline
+
+        Args:
+            force: Run every stage, even if its inputs are unchanged
+
+        Returns:
+            Report with per-stage results, total wall time and the critical path
+        """
+        dependencies = self.dependencies()
+        order = self.topological_order(dependencies)
+        results: Dict[str, Dict[str, Any]] = {}
+        run_start = time.perf_counter()
+
+        pending = list(order)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as executor:
+            while pending or running:
+                for name in list(pending):
+                    upstream = dependencies[name]
+                    if any(results.get(dep, {}).get('status') in ('failed', 'blocked') for dep in upstream):
+                        pending.remove(name)
+                        results[name] = self._result('blocked', run_start, time.perf_counter())
+                        results[name]['error'] = "upstream stage failed"
+                    elif all(dep in results for dep in upstream):
+                        pending.remove(name)
+                        running[executor.submit(self._run_stage, self.stages[name], force, run_start)] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+        wall_s = time.perf_counter() - run_start
+        critical_path, critical_s = self._critical_path(order, dependencies, results)
+
+        return {
+            'stages': {name: results[name] for name in order},
+            'wall_s': round(wall_s, 3),
+            'critical_path': critical_path,
+            'critical_path_s': round(critical_s, 3)
+        }
+
+    def _run_stage(self, stage: Stage, force: bool, run_start: float) -> Dict[str, Any]:
+        start = time.perf_counter()
+        fingerprint = None
+
+        try:
+            if not stage.always_run:
+                fingerprint = self._fingerprint(stage)
+                unchanged = fingerprint == self.state.get(stage.name)
+                if not force and unchanged and all(path.exists() for path in stage.outputs):
+                    print(f"⏭️ {stage.name}: inputs unchanged")
+                    return self._result('skipped', run_start, start)
+
+            print(f"▶️ {stage.name}")
+            outcome = stage.func()
+        except Exception as e:
+            print(f"❌ {stage.name}: {e}")
+            result = self._result('failed', run_start, start)
+            result['error'] = str(e)
+            return result
+
+        if outcome is False:
+            return self._result('failed', run_start, start)
+        if outcome == SKIPPED:
+            return self._result('skipped', run_start, start)
+
+        if fingerprint is not None:
+            self.state.set(stage.name, fingerprint)
+        return self._result('success', run_start, start)
+
+    def _fingerprint(self, stage: Stage) -> str:
+        """Hash over the content hashes of a stage's inputs"""
+        digests = {
+            str(path): self.file_manager.file_digest(path) if path.exists() else None
+            for path in stage.inputs
+        }
+        return hashlib.sha256(json.dumps(digests, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _result(status: str, run_start: float, start: float) -> Dict[str, Any]:
+        end = time.perf_counter()
+        return {
+            'status': status,
+            'start_s': round(start - run_start, 3),
+            'end_s': round(end - run_start, 3),
+            'duration_s': round(end - start, 3),
+            'error': None
+        }
+
+    @staticmethod
+    def _critical_path(order: List[str], dependencies: Dict[str, List[str]],
+                       results: Dict[str, Dict[str, Any]]):
+        """Longest chain of dependent stages by measured duration"""
+        finish = {}
+        previous = {}
+        for name in order:
+            upstream = max(dependencies[name], key=lambda dep: finish[dep], default=None)
+            finish[name] = results[name]['duration_s'] + (finish[upstream] if upstream else 0.0)
+            previous[name] = upstream
+
+        if not finish:
+            return [], 0.0
+
+        name = max(finish, key=finish.get)
+        total = finish[name]
+        path = []
+        while name:
+            path.append(name)
+            name = previous[name]
+        return path[::-1], total
+
+
+def print_pipeline_report(report: Dict[str, Any]):
+    """Print per-stage timing and the critical path of a pipeline run"""
+    icons = {'success': '✅', SKIPPED: '⏭️', 'failed': '❌', 'blocked': '⛔'}
+    critical = set(report['critical_path'])
+
+    print("\n📋 Pipeline report:")
+    print(f"  {'stage':<18} {'status':<8} {'start':>8} {'duration':>9}")
+    for name, result in report['stages'].items():
+        icon = icons.get(result['status'], '❔')
+        marker = ' *' if name in critical else ''
+        line = f"  {icon} {name:<16} {result['status']:<8} {result['start_s']:>7.2f}s {result['duration_s']:>8.2f}s{marker}"
+        if result.get('error'):
+            line += f"  ({result['error']})"
+        print(line)
+
+    print(f"\n⏱️ Wall time {report['wall_s']:.2f}s; critical path ({report['critical_path_s']:.2f}s, marked *): "
+          f"{' → '.join(report['critical_path'])}")
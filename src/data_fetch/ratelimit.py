@@ -0,0 +1,104 @@
+"""
+Per-host request rate limiting shared by all clients and threads
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Holds up to `capacity` tokens and refills at `rate` tokens per second.
+    Over any window of T seconds it hands out at most capacity + rate * T
+    tokens, which is how the per-host limits are sized.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until the requested tokens are available, then take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for the given time and drop the saved-up burst"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def _refill(self, now: float):
+        # No tokens accrue while paused, so the server's back-off is honoured in full
+        start = max(self._updated, self._paused_until)
+        if now > start:
+            self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+        self._updated = now
+
+
+class HostRateLimiter:
+    """
+    Registry of token buckets, one per host
+
+    Hosts without a configured limit are not throttled.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Args:
+            limits: Mapping of host name to (rate per second, burst capacity)
+        """
+        self._buckets = {
+            host: TokenBucket(rate, capacity)
+            for host, (rate, capacity) in (limits or {}).items()
+        }
+
+    def bucket(self, host: str) -> Optional[TokenBucket]:
+        return self._buckets.get(host)
+
+    def acquire(self, host: str):
+        """Wait for a request slot on a host"""
+        bucket = self._buckets.get(host)
+        if bucket is not None:
+            bucket.acquire()
+
+    def pause(self, host: str, seconds: float):
+        """Back off all requests to a host, e.g. after a 429"""
+        bucket = self._buckets.get(host)
+        if bucket is not None:
+            bucket.pause(seconds)
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse 'host=rate:burst,host=rate:burst' into a limits mapping
+
+    Example: 'data.ssb.no=0.4:6,api.elhub.no=5:10'
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        host, _, values = item.partition('=')
+        rate, _, capacity = values.partition(':')
+        limits[host.strip()] = (float(rate), float(capacity or rate))
+    return limits
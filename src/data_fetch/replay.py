@@ -0,0 +1,397 @@
+"""
+Record real API responses and replay them from a local stand-in server
+"""
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+
+from .archive import RawSnapshotArchive
+from .transport import HttpTransport
+
+# Header carrying the original URL of a request sent to the stand-in server
+REPLAY_URL_HEADER = 'X-Replay-Url'
+
+# Response headers that describe the wire encoding, not the recorded body
+_HOP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+
+def request_key(method: str, url: str, body: Union[bytes, str, None] = None) -> str:
+    """Identity of a request: method, full URL including the query, and body"""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    digest = hashlib.sha256(f"{method.upper()} {url}\n".encode('utf-8'))
+    digest.update(body or b'')
+    return digest.hexdigest()
+
+
+class Cassette:
+    """
+    Recorded HTTP responses, keyed by request
+
+    Bodies are kept in a RawSnapshotArchive under the cassette directory, so
+    they are compressed and de-duplicated like the main raw archive. Each
+    index entry carries the request key, status and response headers. When a
+    request was recorded more than once, the latest response wins.
+    """
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: Cassette directory
+        """
+        self.root = Path(root)
+        self.archive = RawSnapshotArchive(self.root)
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def record(self, response: requests.Response) -> Dict[str, Any]:
+        """
+        Store a response under the request that produced it
+
+        Reads the whole body; the response can still be read by the caller.
+        """
+        request = response.request
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in _HOP_HEADERS
+        }
+        entry = self.archive.put(
+            urlsplit(request.url).hostname or 'unknown',
+            response.content,
+            metadata={
+                'key': request_key(request.method, request.url, request.body),
+                'method': request.method,
+                'url': request.url,
+                'status': response.status_code,
+                'headers': headers
+            }
+        )
+
+        with self._lock:
+            if self._entries is not None:
+                self._entries[entry['metadata']['key']] = entry
+        return entry
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Latest index entry recorded for a request key"""
+        with self._lock:
+            if self._entries is None:
+                self._entries = {
+                    entry['metadata']['key']: entry
+                    for entry in self.archive.entries()
+                    if 'key' in entry.get('metadata', {})
+                }
+            return self._entries.get(key)
+
+    def read(self, entry: Dict[str, Any]) -> bytes:
+        return self.archive.read(entry['sha256'])
+
+    def __len__(self) -> int:
+        self.lookup('')
+        return len(self._entries)
+
+
+class RecordingTransport(HttpTransport):
+    """
+    HttpTransport that saves every response it receives to a cassette
+
+    Rate limiting and retries behave as usual; each attempt that reaches
+    the server is recorded, so the last recorded response for a request is
+    the one the client acted on.
+    """
+
+    def __init__(self, cassette: Union[Cassette, Path, str], **kwargs):
+        """
+        Args:
+            cassette: Cassette, or the directory of one
+            **kwargs: HttpTransport arguments
+        """
+        super().__init__(**kwargs)
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+
+    def send(self, method: str, url: str, **kwargs) -> requests.Response:
+        response = super().send(method, url, **kwargs)
+        self.cassette.record(response)
+        return response
+
+
+class StandInTransport(HttpTransport):
+    """
+    HttpTransport that sends every request to a stand-in server instead
+
+    The original URL travels in the X-Replay-Url header, so the clients keep
+    their real endpoints and the per-host rate limits still apply by the
+    original host name.
+    """
+
+    def __init__(self, base_url: str, **kwargs):
+        """
+        Args:
+            base_url: Root URL of the stand-in server, e.g. http://127.0.0.1:8765
+            **kwargs: HttpTransport arguments
+        """
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, method: str, url: str, **kwargs) -> requests.Response:
+        request = requests.Request(
+            method, url,
+            params=kwargs.pop('params', None),
+            data=kwargs.pop('data', None),
+            json=kwargs.pop('json', None),
+            headers=kwargs.pop('headers', None)
+        )
+        prepared = self.session.prepare_request(request)
+
+        original = urlsplit(prepared.url)
+        prepared.headers[REPLAY_URL_HEADER] = prepared.url
+        prepared.url = self.base_url + original.path + (f"?{original.query}" if original.query else '')
+
+        kwargs.pop('allow_redirects', None)
+        return self.session.send(prepared, **kwargs)
+
+
+class StandInServer:
+    """
+    Local HTTP server replaying a cassette
+
+    Stands in for SSB, Elhub and the Enova SSB tables so fetch throughput
+    and concurrency can be measured offline and reproducibly. Every
+    response can be delayed, replaced by an error, or scaled up:
+
+    - latency/jitter: each response waits latency + uniform(0, jitter) seconds
+    - error_rate: share of requests answered with error_status instead
+    - payload_scale: JSON-stat tables get this many times as many periods,
+      other JSON documents have their longest array repeated this many times
+
+    Requests that were never recorded get a 404. Usable as a context manager:
+
+        with StandInServer('data/cassettes/nightly', latency=0.2) as server:
+            set_transport(StandInTransport(server.url))
+    """
+
+    def __init__(self, cassette: Union[Cassette, Path, str], host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, payload_scale: int = 1, seed: Optional[int] = None):
+        """
+        Args:
+            cassette: Cassette, or the directory of one
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            latency: Fixed delay before each response, in seconds
+            jitter: Maximum extra random delay, in seconds
+            error_rate: Probability of answering with error_status
+            error_status: Status returned for injected errors
+            payload_scale: Integer scale factor for successful JSON bodies
+            seed: Seed for the latency and error draws
+        """
+        if payload_scale < 1:
+            raise ValueError("payload_scale must be at least 1")
+
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payload_scale = payload_scale
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._bodies: Dict[str, bytes] = {}
+        self._bodies_lock = threading.Lock()
+        self.stats = {'requests': 0, 'replayed': 0, 'errors': 0, 'missing': 0, 'bytes': 0}
+        self._stats_lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StandInServer':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-in-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted"""
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def respond(self, method: str, url: str, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Status, headers and body for a request, after the configured delay"""
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(0, self.jitter) if self.jitter else self.latency
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if fail:
+            self._count('errors')
+            return self.error_status, {'Content-Type': 'text/plain', 'Retry-After': '0'}, b'Injected error'
+
+        entry = self.cassette.lookup(request_key(method, url, body))
+        if entry is None:
+            self._count('missing')
+            return 404, {'Content-Type': 'text/plain'}, f'Not recorded: {method} {url}'.encode('utf-8')
+
+        metadata = entry['metadata']
+        content = self._body(entry)
+        self._count('replayed', len(content))
+        return metadata['status'], dict(metadata.get('headers', {})), content
+
+    def _body(self, entry: Dict[str, Any]) -> bytes:
+        """Recorded body, scaled once per object and then reused"""
+        sha256 = entry['sha256']
+        with self._bodies_lock:
+            if sha256 in self._bodies:
+                return self._bodies[sha256]
+
+        content = self.cassette.read(entry)
+        if self.payload_scale > 1 and entry['metadata']['status'] == 200:
+            content = scale_payload(content, self.payload_scale)
+
+        with self._bodies_lock:
+            self._bodies[sha256] = content
+        return content
+
+    def _count(self, outcome: str, size: int = 0):
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats[outcome] += 1
+            self.stats['bytes'] += size
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _replay(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                url = self.headers.get(REPLAY_URL_HEADER) or self.path
+
+                status, headers, content = server.respond(self.command, url, body)
+
+                if 'gzip' in self.headers.get('Accept-Encoding', '') and len(content) > 1024:
+                    content = gzip.compress(content, compresslevel=1, mtime=0)
+                    headers['Content-Encoding'] = 'gzip'
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _replay
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def scale_payload(content: bytes, scale: int) -> bytes:
+    """
+    Make a JSON response body `scale` times larger with the same shape
+
+    JSON-stat datasets get extra periods in their time dimension ('Tid', or
+    the largest dimension), with the values repeated, so they still decode.
+    Other JSON documents have their longest array repeated. Non-JSON bodies
+    are returned unchanged.
+    """
+    try:
+        document = json.loads(content)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return content
+
+    if isinstance(document, dict) and _is_json_stat(document):
+        document = _scale_json_stat(document, scale)
+    else:
+        _repeat_longest_list(document, scale)
+
+    return json.dumps(document, ensure_ascii=False).encode('utf-8')
+
+
+def _is_json_stat(document: Dict[str, Any]) -> bool:
+    return isinstance(document.get('dimension'), dict) and isinstance(document.get('value'), list) \
+        and isinstance(document.get('id'), list) and isinstance(document.get('size'), list)
+
+
+def _scale_json_stat(document: Dict[str, Any], scale: int) -> Dict[str, Any]:
+    ids, sizes = document['id'], document['size']
+    axis = ids.index('Tid') if 'Tid' in ids else int(np.argmax(sizes))
+    category = document['dimension'][ids[axis]]['category']
+
+    index = category.get('index')
+    codes = (index if isinstance(index, list) else sorted(index, key=index.get)) if index \
+        else list(category.get('label', {}))
+    labels = category.get('label', {})
+
+    # Earlier periods for numeric years, suffixed codes otherwise
+    numeric = all(str(code).isdigit() for code in codes)
+    first = int(codes[0]) if numeric and codes else 0
+    new_codes = []
+    for copy in range(scale - 1, 0, -1):
+        for position, code in enumerate(codes):
+            new_codes.append(str(first - copy * len(codes) + position) if numeric else f"{code}_{copy}")
+    all_codes = new_codes + list(codes)
+
+    values = np.empty(len(document['value']), dtype=object)
+    values[:] = document['value']
+    values = np.concatenate([values.reshape(sizes)] * scale, axis=axis)
+
+    category['index'] = {code: position for position, code in enumerate(all_codes)}
+    category['label'] = {code: labels.get(code, code) for code in all_codes}
+    document['size'] = [size * scale if position == axis else size for position, size in enumerate(sizes)]
+    document['value'] = values.ravel().tolist()
+    return document
+
+
+def _repeat_longest_list(document: Any, scale: int):
+    longest = None
+
+    def visit(node):
+        nonlocal longest
+        if isinstance(node, list):
+            if longest is None or len(node) > len(longest):
+                longest = node
+            children = node
+        elif isinstance(node, dict):
+            children = node.values()
+        else:
+            return
+        for child in children:
+            visit(child)
+
+    visit(document)
+    if longest:
+        longest[:] = longest * scale
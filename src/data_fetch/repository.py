@@ -0,0 +1,219 @@
+"""
+Single access point for the processed data, with an in-process cache
+"""
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from .columnar import ARROW_SUFFIX, PROCESSED_SCHEMAS, processed_table_path, read_table
+from .config import config
+from .files import DataFileManager
+from .parquet_store import CATEGORY_COLUMNS, ElhubParquetStore, as_timestamp, parts_identity
+from .sources.elhub import ElhubDataProcessor
+
+
+class DataRepository:
+    """
+    Owns the locations of the processed data and returns typed frames
+
+    Readers ask for a dataset by name instead of building paths and parsing
+    files themselves. Processed tables come from their Arrow files, or from
+    the CSV export when there is no Arrow file yet, with the column types
+    from PROCESSED_SCHEMAS either way. Elhub records come from the Parquet
+    store, or from elhub_energy_formatted.json without one.
+
+    Frames are kept in an LRU cache limited to `max_bytes` of frame memory.
+    Entries are keyed on the identity of the files they were read from
+    (mtime, size and content hash), so once a fetch rewrites a file the next
+    read loads the new content and the stale entry is dropped. Reads of
+    unchanged files cost a stat call.
+
+    Returned frames share their data with the cache. Adding, dropping or
+    replacing columns is safe, but in-place edits of values (df.loc[...] = ...,
+    df[col].iloc[...] = ...) can reach the cached buffers, so treat the
+    frames as read-only and copy(deep=True) before editing values.
+    """
+
+    def __init__(self, file_manager: Optional[DataFileManager] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            file_manager: DataFileManager owning data/raw and data/processed
+            max_bytes: Cache limit in bytes of frame memory (default from DATA_CACHE_MAX_MB)
+        """
+        self.file_manager = file_manager or DataFileManager()
+        self.max_bytes = max_bytes if max_bytes is not None else int(config.data_cache_max_mb * 1024 * 1024)
+        self.elhub_store = ElhubParquetStore(self.file_manager.processed_dir / "elhub")
+        self._cache: 'OrderedDict[str, Tuple[Any, pd.DataFrame, int]]' = OrderedDict()
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def path(self, name: str) -> Path:
+        """Current file of a processed table: its Arrow file, or the CSV export"""
+        return processed_table_path(self.file_manager.processed_dir, name)
+
+    @property
+    def elhub_json_path(self) -> Path:
+        return self.file_manager.raw_dir / "elhub_energy_formatted.json"
+
+    def ssb_emissions(self) -> Optional[pd.DataFrame]:
+        """National emissions per year (ssb_emissions_clean), or None before the first fetch"""
+        return self.table('ssb_emissions_clean')
+
+    def company_efficiency(self) -> Optional[pd.DataFrame]:
+        """Enova company efficiency summary, or None before the first fetch"""
+        return self.table('company_efficiency_summary')
+
+    def efficiency_projects(self) -> Optional[pd.DataFrame]:
+        """Enova efficiency projects, or None before the first fetch"""
+        return self.table('efficiency_projects')
+
+    def table(self, name: str) -> Optional[pd.DataFrame]:
+        """
+        Read a processed table by name
+
+        Args:
+            name: File stem under data/processed, e.g. 'efficiency_projects'
+
+        Returns:
+            DataFrame typed by PROCESSED_SCHEMAS, or None if the table does not exist
+        """
+        path = self.path(name)
+        if not path.exists():
+            return None
+        return self._cached(name, self._file_identity(path), lambda: _typed(read_table(path), name, path))
+
+    def elhub_consumption(self, price_areas: Optional[Iterable[str]] = None,
+                          start: Optional[Union[datetime, str]] = None,
+                          end: Optional[Union[datetime, str]] = None,
+                          columns: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Elhub hourly consumption records
+
+        Args:
+            price_areas: Only these price areas, e.g. ['NO5']
+            start: Earliest timestamp to include; naive values are Norwegian local time
+            end: Timestamp after the last one to include
+            columns: Only these columns, e.g. ['timestamp', 'quantity_kwh']
+
+        Returns:
+            The consumption summary frame (ElhubDataProcessor.to_consumption_summary
+            columns, categoricals for the area and group columns), or None
+            if no Elhub data has been fetched
+        """
+        price_areas = sorted(price_areas) if price_areas else None
+        columns = list(columns) if columns else None
+
+        if self.elhub_store.exists():
+            # Each selection is its own entry; the store only reads what it asks for
+            key = json.dumps(['elhub_consumption', price_areas, _bound(start), _bound(end), columns])
+            parts = [path for _, _, files in self.elhub_store.partitions() for path in files]
+            return self._cached(key, parts_identity(parts), lambda: self.elhub_store.read(
+                price_areas=price_areas, start=start, end=end, columns=columns
+            ))
+
+        path = self.elhub_json_path
+        if not path.exists():
+            return None
+
+        def load() -> pd.DataFrame:
+            with open(path, 'r', encoding='utf-8') as f:
+                df = ElhubDataProcessor.to_consumption_summary(json.load(f))
+            for column in CATEGORY_COLUMNS:
+                if column in df.columns:
+                    df[column] = df[column].astype('category')
+            return df
+
+        df = self._cached('elhub_consumption', self._file_identity(path), load)
+        if price_areas:
+            df = df[df['price_area'].isin(price_areas)]
+        if start is not None:
+            df = df[df['timestamp'] >= as_timestamp(start)]
+        if end is not None:
+            df = df[df['timestamp'] < as_timestamp(end)]
+        return df[columns] if columns else df
+
+    def clear(self):
+        """Drop every cached frame"""
+        with self._lock:
+            self._cache.clear()
+
+    def cache_info(self) -> Dict[str, int]:
+        """Hit, miss and eviction counts, cached entries and their size in bytes"""
+        with self._lock:
+            return {**self.stats, 'entries': len(self._cache),
+                    'bytes': sum(size for _, _, size in self._cache.values())}
+
+    def _cached(self, name: str, identity: Any, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None and entry[0] == identity:
+                self._cache.move_to_end(name)
+                self.stats['hits'] += 1
+                return entry[1].copy(deep=False)
+
+        # Load outside the lock; concurrent misses for the same name both load
+        df = load()
+        size = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            self.stats['misses'] += 1
+            # A changed file replaces its stale entry instead of sitting next to it
+            self._cache.pop(name, None)
+            if size <= self.max_bytes:
+                self._cache[name] = (identity, df, size)
+                self._evict()
+        return df.copy(deep=False)
+
+    def _evict(self):
+        total = sum(size for _, _, size in self._cache.values())
+        while total > self.max_bytes and self._cache:
+            _, (_, _, size) = self._cache.popitem(last=False)
+            total -= size
+            self.stats['evictions'] += 1
+
+    def _file_identity(self, path: Path) -> Tuple[str, int, int, str]:
+        """(path, mtime, size, content hash); the hash is only computed when mtime or size change"""
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            # Hash outside the lock; concurrent misses for the same file both hash it
+            digest = self.file_manager.file_digest(path)
+            with self._lock:
+                self._digests = {k: v for k, v in self._digests.items() if k[0] != key[0]}
+                self._digests[key] = digest
+        return key + (digest,)
+
+
+_default_repository: Optional[DataRepository] = None
+_default_lock = threading.Lock()
+
+
+def get_repository() -> DataRepository:
+    """The process-wide repository for the project's data directory"""
+    global _default_repository
+    with _default_lock:
+        if _default_repository is None:
+            _default_repository = DataRepository()
+        return _default_repository
+
+
+def _typed(df: pd.DataFrame, name: str, path: Path) -> pd.DataFrame:
+    """Give a table read from its CSV export the column types of the Arrow file"""
+    schema = PROCESSED_SCHEMAS.get(name)
+    if path.suffix == ARROW_SUFFIX or schema is None:
+        return df
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False).to_pandas()
+
+
+def _bound(value: Optional[Union[datetime, str]]) -> Optional[str]:
+    """Time bound as it goes into a cache key"""
+    return None if value is None else as_timestamp(value).isoformat()
@@ -2,19 +2,68 @@
 Elhub data source for energy consumption data
 """
 import requests
+import numpy as np
 import pandas as pd
+import io
 import json
-from typing import Dict, Any, Optional
+from itertools import chain
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Tuple
 import os
-from datetime import datetime
-from pathlib import Path
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import ijson
+
+from .. import metrics
+from ..circuit import OPEN, CircuitBreaker
+from ..config import config
+from ..parquet_store import ElhubParquetStore
+from ..state import JsonStateStore
+from ..transport import HttpTransport, get_transport
+
+
+# Streamed response bodies stay in memory up to this size, then spill to disk
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Elhub timestamps look like 2024-01-01T00:00:00+01:00
+ELHUB_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+ELHUB_TIMEZONE = 'Europe/Oslo'
 
 
 class ElhubApiClient:
     """Client for fetching data from Elhub APIs"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Candidate endpoints as (dataset kind, entity name, URL path), in order of preference
+    ENDPOINT_CANDIDATES = [
+        ('consumption', 'Price Areas', 'price-areas'),
+        ('consumption', 'Grid Areas', 'grid-areas'),
+        ('consumption', 'Municipalities', 'municipalities'),
+        ('consumption', 'Metering Points', 'metering-points'),
+        ('production', 'Price Areas', 'price-areas'),
+        ('production', 'Grid Areas', 'grid-areas'),
+        ('production', 'Municipalities', 'municipalities')
+    ]
+    
+    def __init__(self, api_key: Optional[str] = None, transport: Optional[HttpTransport] = None,
+                 base_url: str = "https://api.elhub.no/energy-data/v0",
+                 endpoint_store: Optional[JsonStateStore] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            api_key: Elhub API key (defaults to ELHUB_API_KEY)
+            transport: Shared HTTP transport
+            base_url: Elhub Energy Data API base URL
+            endpoint_store: State store used to remember the last working endpoint
+            circuit_breaker: Skips endpoints that failed on recent runs
+        """
         self.api_key = api_key or os.getenv('ELHUB_API_KEY')
+        self.transport = transport or get_transport()
+        self.base_url = base_url
+        self.endpoint_store = endpoint_store
+        self.circuit_breaker = circuit_breaker
         # Elhub's correct API v0 endpoints
         self.entities = ['Price Areas', 'Grid Areas', 'Metering Points', 'Municipalities']
         self.datasets = {
@@ -43,120 +92,270 @@ class ElhubApiClient:
         print(f"Available datasets: {', '.join(self.datasets.values())}")
         print(f"API Key configured: {'✅ Yes' if self.api_key else '❌ No'}")
     
-    def fetch_energy_consumption_data(self) -> Optional[Dict[str, Any]]:
+    def fetch_energy_consumption_data(self, stream: bool = False) -> Optional[Dict[str, Any]]:
         """
         Fetch energy consumption data from Elhub using correct API v0 structure
+        
+        Goes straight to the endpoint that worked last time, if one is
+        remembered. Otherwise (or if it fails) all candidate endpoints are
+        probed concurrently and the winner is remembered for the next run.
+        Endpoints whose circuit breaker is open are skipped without a
+        request. Falls back to SSB energy data when no Elhub endpoint works.
+        
+        Args:
+            stream: Return the Elhub response body as an unparsed binary file
+                under 'body' instead of parsed JSON under 'data'. The body is
+                spooled to disk past a few MB, so large responses are never
+                held in memory. The caller must close it.
         """
-        # Try different entities for consumption data
-        entities_to_try = [
-            ('Price Areas', 'price-areas'),
-            ('Grid Areas', 'grid-areas'), 
-            ('Municipalities', 'municipalities'),
-            ('Metering Points', 'metering-points')
-        ]
-        
-        for entity_name, entity_param in entities_to_try:
-            try:
-                # Construct the correct API URL
-                url = f"{self.base_url}/{entity_param}"
-                
-                print(f"Trying Elhub endpoint: {url}")
-                
-                # Parameters for the request
-                params = {
-                    'dataset': self.datasets['consumption']
-                }
-                
-                response = requests.get(
-                    url,
-                    headers=self.get_headers(),
-                    params=params,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    print(f"✅ Successfully fetched consumption data for {entity_name}")
-                    return {
-                        'metadata': {
-                            'source': 'Elhub Energy Data API v0',
-                            'entity': entity_name,
-                            'dataset': self.datasets['consumption'],
-                            'endpoint': url
-                        },
-                        'data': response.json()
-                    }
-                elif response.status_code == 401:
-                    print(f"🔑 Authentication required for {entity_name}")
-                    continue
-                elif response.status_code == 404:
-                    print(f"❌ Endpoint not found for {entity_name}: {url}")
-                    continue
-                elif response.status_code == 403:
-                    print(f"🚫 Access forbidden for {entity_name} - may need API key")
-                    continue
-                else:
-                    print(f"⚠️ Error {response.status_code} for {entity_name}: {response.text[:200]}")
-                    continue
-                    
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Request failed for {entity_name}: {e}")
-                continue
+        winner = self.endpoint_store.get('winner') if self.endpoint_store else None
+        
+        if winner:
+            candidate = (winner['kind'], winner['entity'], winner['entity_param'])
+            print(f"🎯 Using remembered Elhub endpoint: {winner['entity']} ({winner['kind']})")
+            result = self._request_endpoint(*candidate, stream=stream)
+            if result:
+                return result
+            
+            print("🔄 Remembered endpoint failed - probing all endpoints again")
+            self.endpoint_store.delete('winner')
         
-        # If all Elhub endpoints fail, try production data as fallback
-        print("\n🔄 Trying production data as fallback...")
-        return self._fetch_production_data()
+        result, candidate = self._probe_endpoints(self.ENDPOINT_CANDIDATES, stream=stream)
+        
+        if result:
+            if self.endpoint_store:
+                kind, entity_name, entity_param = candidate
+                self.endpoint_store.set('winner', {
+                    'kind': kind,
+                    'entity': entity_name,
+                    'entity_param': entity_param,
+                    'remembered_at': datetime.now().isoformat()
+                })
+            return result
+        
+        # If all Elhub endpoints fail, try alternative sources
+        print("\n🔄 Trying SSB energy data as fallback...")
+        return self._fetch_alternative_energy_data()
     
-    def _fetch_production_data(self) -> Optional[Dict[str, Any]]:
+    def _probe_endpoints(self, candidates: List[Tuple[str, str, str]],
+                         stream: bool = False) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[str, str, str]]]:
         """
-        Fetch energy production data as fallback
+        Probe candidate endpoints concurrently
+        
+        The first consumption endpoint to succeed wins immediately. A
+        production success is only used once every consumption probe has
+        failed, so the result never depends on which dataset answered faster.
+        
+        Probes only wait for the response headers; the body is read for the
+        winner alone. Losing responses are closed without reading their
+        bodies, and probes that have not started yet are cancelled.
+        
+        Returns:
+            Tuple of (result, winning candidate), or (None, None) if all failed
         """
-        entities_to_try = [
-            ('Price Areas', 'price-areas'),
-            ('Grid Areas', 'grid-areas'), 
-            ('Municipalities', 'municipalities')
-        ]
+        executor = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="elhub-probe")
+        futures = {executor.submit(self._open_endpoint, *candidate): candidate for candidate in candidates}
+        pending_consumption = sum(1 for kind, _, _ in candidates if kind == 'consumption')
+        fallback = (None, None)
+        winner = (None, None)
         
-        for entity_name, entity_param in entities_to_try:
-            try:
-                url = f"{self.base_url}/{entity_param}"
-                
-                print(f"Trying production endpoint: {url}")
+        try:
+            for future in as_completed(futures):
+                candidate = futures[future]
+                response = future.result()
                 
-                params = {
-                    'dataset': self.datasets['production']
-                }
+                if candidate[0] == 'consumption':
+                    pending_consumption -= 1
+                    if response is not None:
+                        winner = (response, candidate)
+                        break
+                elif response is not None and fallback[0] is None:
+                    fallback = (response, candidate)
+                elif response is not None:
+                    response.close()
                 
-                response = requests.get(
-                    url,
-                    headers=self.get_headers(),
-                    params=params,
-                    timeout=30
-                )
+                if fallback[0] is not None and pending_consumption == 0:
+                    winner = fallback
+                    break
+        finally:
+            # Stop waiting on the losers: cancel probes that have not started
+            # and close every other response as soon as its headers arrive
+            executor.shutdown(wait=False, cancel_futures=True)
+            
+            def close_loser(done):
+                if not done.cancelled() and done.exception() is None and done.result() is not None \
+                        and done.result() is not winner[0]:
+                    done.result().close()
+            
+            for future in futures:
+                future.add_done_callback(close_loser)
+        
+        response, candidate = winner
+        if response is None:
+            return None, None
+        return self._read_endpoint(response, *candidate, stream=stream), candidate
+    
+    def _request_endpoint(self, kind: str, entity_name: str, entity_param: str,
+                          stream: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Request one Elhub endpoint
+        
+        Args:
+            kind: Dataset kind ('consumption' or 'production')
+            entity_name: Human readable entity name
+            entity_param: Entity URL path
+            stream: Spool the body to a binary file instead of parsing it
+            
+        Returns:
+            Response wrapped with metadata, or None if the request failed
+        """
+        response = self._open_endpoint(kind, entity_name, entity_param)
+        if response is None:
+            return None
+        return self._read_endpoint(response, kind, entity_name, entity_param, stream=stream)
+    
+    def _open_endpoint(self, kind: str, entity_name: str, entity_param: str) -> Optional[requests.Response]:
+        """
+        Send the request for one Elhub endpoint without reading the body
+        
+        Returns:
+            The streamed 200 response (the caller reads or closes it), or
+            None if the endpoint is skipped or failed
+        """
+        url = f"{self.base_url}/{entity_param}"
+        dataset = self.datasets[kind]
+        endpoint = f"{url}?dataset={dataset}"
+        
+        if self.circuit_breaker and not self.circuit_breaker.allow(endpoint):
+            retry_at = self.circuit_breaker.retry_at(endpoint)
+            print(f"⏸️ Skipping Elhub {kind} endpoint for {entity_name} - failing repeatedly, "
+                  f"next try after {retry_at:%Y-%m-%d %H:%M}")
+            return None
+        
+        failure = None
+        try:
+            print(f"Trying Elhub {kind} endpoint: {url}")
+            
+            response = self.transport.get(
+                url, source='elhub',
+                headers=self.get_headers(),
+                params={'dataset': dataset},
+                stream=True
+            )
+            
+            if response.status_code == 200:
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_success(endpoint)
+                return response
+            
+            failure = f"HTTP {response.status_code}"
+            if response.status_code == 401:
+                print(f"🔑 Authentication required for {kind} data - {entity_name}")
+            elif response.status_code == 404:
+                print(f"❌ Endpoint not found for {entity_name}: {url}")
+            elif response.status_code == 403:
+                print(f"🚫 Access forbidden for {entity_name} - may need API key")
+            else:
+                print(f"⚠️ Error {response.status_code} for {kind} {entity_name}: {response.text[:200]}")
+            
+            response.close()
                 
-                if response.status_code == 200:
-                    print(f"✅ Successfully fetched production data for {entity_name}")
-                    return {
-                        'metadata': {
-                            'source': 'Elhub Energy Data API v0',
-                            'entity': entity_name,
-                            'dataset': self.datasets['production'],
-                            'endpoint': url
-                        },
-                        'data': response.json()
-                    }
-                elif response.status_code == 401:
-                    print(f"🔑 Authentication required for production data - {entity_name}")
-                    continue
-                else:
-                    print(f"⚠️ Error {response.status_code} for production {entity_name}")
-                    continue
-                    
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Request failed for production {entity_name}: {e}")
-                continue
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Request failed for {kind} {entity_name}: {e}")
+            failure = type(e).__name__
         
-        # If all fails, try alternative sources
-        return self._fetch_alternative_energy_data()
+        if failure and self.circuit_breaker:
+            if self.circuit_breaker.record_failure(endpoint, failure) == OPEN:
+                print(f"⏸️ Elhub {kind} endpoint for {entity_name} will be skipped for "
+                      f"{self.circuit_breaker.cooldown}")
+        return None
+    
+    def _read_endpoint(self, response: requests.Response, kind: str, entity_name: str, entity_param: str,
+                       stream: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Read the body of an endpoint response opened by _open_endpoint
+        
+        Returns:
+            Response wrapped with metadata, or None if the body could not be read
+        """
+        url = f"{self.base_url}/{entity_param}"
+        result = {
+            'metadata': {
+                'source': 'Elhub Energy Data API v0',
+                'entity': entity_name,
+                'dataset': self.datasets[kind],
+                'endpoint': url
+            }
+        }
+        
+        try:
+            if stream:
+                result['body'] = self._spool_body(response)
+            else:
+                with metrics.timed(metrics.DOWNLOAD, 'elhub', url=response.url) as event:
+                    content = response.content
+                    event['bytes'] = len(content)
+                result['data'] = json.loads(content)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"❌ Reading the {kind} response for {entity_name} failed: {e}")
+            return None
+        finally:
+            response.close()
+        
+        print(f"✅ Successfully fetched {kind} data for {entity_name}")
+        return result
+    
+    @staticmethod
+    def _spool_body(response: requests.Response) -> BinaryIO:
+        """Copy a streamed response body into a spooled temporary file"""
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            with metrics.timed(metrics.DOWNLOAD, 'elhub', url=response.url) as event:
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+                    body.write(chunk)
+                event['bytes'] = body.tell()
+        except BaseException:
+            body.close()
+            raise
+        finally:
+            response.close()
+        body.seek(0)
+        return body
+    
+    def fetch_window(self, entity_param: str, area: str, start: datetime, end: datetime,
+                     kind: str = 'consumption') -> bytes:
+        """
+        Fetch one time window of hourly data for a single area
+        
+        Args:
+            entity_param: Entity URL path ('price-areas' or 'grid-areas')
+            area: Area identifier, e.g. 'NO5'
+            start: Window start (inclusive)
+            end: Window end (exclusive)
+            kind: Dataset kind ('consumption' or 'production')
+            
+        Returns:
+            Raw JSON response body
+            
+        Raises:
+            requests.RequestException: If API request fails
+        """
+        url = f"{self.base_url}/{entity_param}/{area}"
+        params = {
+            'dataset': self.datasets[kind],
+            'startDate': start.isoformat(),
+            'endDate': end.isoformat()
+        }
+        
+        response = self.transport.get(url, source='elhub', headers=self.get_headers(), params=params)
+        
+        if response.status_code == 200:
+            return response.content
+        else:
+            raise requests.RequestException(
+                f"Failed to fetch {area} {start:%Y-%m-%d}..{end:%Y-%m-%d}: "
+                f"{response.status_code} - {response.text[:200]}"
+            )
     
     def _fetch_alternative_energy_data(self) -> Optional[Dict[str, Any]]:
         """
@@ -188,7 +387,7 @@ class ElhubApiClient:
                 }
             }
             
-            response = requests.post(ssb_endpoint, json=query, timeout=30)
+            response = self.transport.post(ssb_endpoint, source='elhub', json=query)
             
             if response.status_code == 200:
                 print("Successfully fetched alternative energy data from SSB")
@@ -205,43 +404,167 @@ class ElhubApiClient:
 class ElhubDataProcessor:
     """Process Elhub energy data into analysis-ready formats"""
     
+    # Columns of the consumption summary, before the derived date/hour columns
+    CONSUMPTION_COLUMNS = [
+        'timestamp', 'price_area', 'consumption_group', 'quantity_kwh',
+        'metering_points', 'area_id', 'country'
+    ]
+    
+    # Elhub record field -> consumption summary column
+    RECORD_FIELDS = {
+        'startTime': 'timestamp',
+        'priceArea': 'price_area',
+        'consumptionGroup': 'consumption_group',
+        'quantityKwh': 'quantity_kwh',
+        'meteringPointCount': 'metering_points'
+    }
+    
     @staticmethod
     def to_consumption_summary(elhub_data: Dict[str, Any]) -> pd.DataFrame:
         """
         Convert Elhub consumption data to summary DataFrame
         
+        The nested records are normalized into a flat table in a single
+        from_records call, and the per-element id and country are broadcast
+        with np.repeat, so no Python dict is built per hourly record.
+        
         Args:
             elhub_data: Raw Elhub API response
             
         Returns:
-            DataFrame with aggregated consumption data
+            DataFrame with aggregated consumption data. `timestamp` is
+            tz-aware in Europe/Oslo, `date` is the local calendar day as
+            datetime64 (local midnight, no time zone) rather than Python
+            date objects, and `hour` is the local hour.
         """
-        records = []
-        
+        elements = []
         if 'raw_data' in elhub_data and 'data' in elhub_data['raw_data']:
-            for area_data in elhub_data['raw_data']['data']:
-                if 'attributes' in area_data and 'consumptionPerGroupMbaHour' in area_data['attributes']:
-                    for consumption_record in area_data['attributes']['consumptionPerGroupMbaHour']:
-                        records.append({
-                            'timestamp': consumption_record.get('startTime'),
-                            'price_area': consumption_record.get('priceArea'),
-                            'consumption_group': consumption_record.get('consumptionGroup'),
-                            'quantity_kwh': consumption_record.get('quantityKwh'),
-                            'metering_points': consumption_record.get('meteringPointCount'),
-                            'area_id': area_data.get('id'),
-                            'country': area_data.get('attributes', {}).get('country')
-                        })
-        
-        df = pd.DataFrame(records)
-        
-        if not df.empty:
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['date'] = df['timestamp'].dt.date
-            df['hour'] = df['timestamp'].dt.hour
+            elements = [
+                area_data for area_data in elhub_data['raw_data']['data']
+                if 'consumptionPerGroupMbaHour' in area_data.get('attributes', {})
+            ]
+        
+        record_counts = [len(area_data['attributes']['consumptionPerGroupMbaHour']) for area_data in elements]
+        if not sum(record_counts):
+            return pd.DataFrame()
+        
+        df = pd.DataFrame.from_records(
+            chain.from_iterable(area_data['attributes']['consumptionPerGroupMbaHour'] for area_data in elements),
+            columns=list(ElhubDataProcessor.RECORD_FIELDS),
+            nrows=sum(record_counts)
+        ).rename(columns=ElhubDataProcessor.RECORD_FIELDS)
+        
+        df['area_id'] = np.repeat([area_data.get('id') for area_data in elements], record_counts)
+        df['country'] = np.repeat([area_data['attributes'].get('country') for area_data in elements], record_counts)
+        
+        return ElhubDataProcessor._add_time_columns(df)
+    
+    @staticmethod
+    def _add_time_columns(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Parse timestamps, derive the date and hour columns and compact dtypes
+        
+        Timestamps are parsed with an explicit ISO-8601 format, once per
+        distinct value (each hour repeats for every area and group), and
+        converted to Norwegian local time so DST offsets don't mix (offsets
+        alternate between +01:00 and +02:00 over a year, which pandas cannot
+        hold in one fixed-offset column). The date column is local midnight
+        as datetime64, which is what the Parquet and analytical stores keep
+        and what groups and plots as a date axis.
+        """
+        if df.empty:
+            return df
+        
+        # Convert timestamp to datetime
+        codes, unique_timestamps = pd.factorize(df['timestamp'])
+        parsed = pd.to_datetime(unique_timestamps, format=ELHUB_TIMESTAMP_FORMAT, utc=True)
+        df['timestamp'] = parsed.tz_convert(ELHUB_TIMEZONE).take(codes, allow_fill=True, fill_value=pd.NaT)
+        
+        df['date'] = df['timestamp'].dt.tz_localize(None).dt.normalize()
+        df['hour'] = df['timestamp'].dt.hour
+        
+        for column in ('price_area', 'consumption_group', 'area_id'):
+            df[column] = df[column].astype('category')
             
         return df
     
+    @staticmethod
+    def iter_record_batches(source: BinaryIO, batch_size: int = 100_000,
+                            prefix: str = 'data') -> Iterator[pd.DataFrame]:
+        """
+        Stream consumption records out of an Elhub JSON document in batches
+        
+        Parses data[].attributes.consumptionPerGroupMbaHour[] incrementally,
+        so peak memory depends on batch_size rather than on the document
+        size. Each batch has the same columns as to_consumption_summary.
+        
+        The element id and country may come after the records in the
+        document; rows still in the current batch are corrected when they
+        arrive, rows already yielded keep their price area as area_id. The
+        Parquet store deduplicates on (timestamp, price_area,
+        consumption_group), so such rows still replace the same hours.
+        
+        Args:
+            source: Binary file-like object with the JSON document
+            batch_size: Number of records per yielded DataFrame
+            prefix: Path to the data array ('raw_data.data' for the formatted file)
+            
+        Yields:
+            DataFrames of at most batch_size records
+        """
+        batches = ElhubDataProcessor._iter_record_batches(source, batch_size, prefix)
+        return metrics.timed_iter(metrics.PARSE, 'elhub', batches, step='records')
+    
+    @staticmethod
+    def _iter_record_batches(source: BinaryIO, batch_size: int, prefix: str) -> Iterator[pd.DataFrame]:
+        item_prefix = f"{prefix}.item"
+        record_prefix = f"{item_prefix}.attributes.consumptionPerGroupMbaHour.item"
+        field_prefixes = {
+            f"{record_prefix}.{field}": column
+            for field, column in ElhubDataProcessor.RECORD_FIELDS.items()
+        }
+        id_prefix = f"{item_prefix}.id"
+        country_prefix = f"{item_prefix}.attributes.country"
+        
+        def empty_columns():
+            return {column: [] for column in ElhubDataProcessor.CONSUMPTION_COLUMNS}
+        
+        columns = empty_columns()
+        record = {}
+        area_id = country = None
+        item_start = 0  # First row of the current data element in this batch
+        
+        for path, event, value in ijson.parse(source, use_float=True):
+            if path in field_prefixes:
+                record[field_prefixes[path]] = value
+            elif path == record_prefix:
+                if event == 'start_map':
+                    record = {}
+                elif event == 'end_map':
+                    for field_column in ElhubDataProcessor.RECORD_FIELDS.values():
+                        columns[field_column].append(record.get(field_column))
+                    columns['area_id'].append(area_id if area_id is not None else record.get('price_area'))
+                    columns['country'].append(country)
+                    
+                    if len(columns['timestamp']) >= batch_size:
+                        yield ElhubDataProcessor._add_time_columns(pd.DataFrame(columns))
+                        columns = empty_columns()
+                        item_start = 0
+            elif path == item_prefix and event == 'start_map':
+                area_id = country = None
+                item_start = len(columns['timestamp'])
+            elif path == id_prefix:
+                area_id = value
+                rows = len(columns['area_id']) - item_start
+                columns['area_id'][item_start:] = [value] * rows
+            elif path == country_prefix:
+                country = value
+                rows = len(columns['country']) - item_start
+                columns['country'][item_start:] = [value] * rows
+        
+        if columns['timestamp']:
+            yield ElhubDataProcessor._add_time_columns(pd.DataFrame(columns))
+    
     @staticmethod
     def get_daily_summary(df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -251,37 +574,363 @@ class ElhubDataProcessor:
             df: Processed consumption DataFrame
             
         Returns:
-            DataFrame with daily aggregated data
+            DataFrame with daily aggregated data; `date` is datetime64 local
+            midnight, as in to_consumption_summary
         """
         if df.empty:
             return pd.DataFrame()
             
-        daily_summary = df.groupby(['date', 'price_area', 'consumption_group']).agg({
+        daily_summary = df.groupby(['date', 'price_area', 'consumption_group'], observed=True).agg({
             'quantity_kwh': 'sum',
             'metering_points': 'mean'  # Average metering points per day
         }).reset_index()
         
         return daily_summary
-def fetch_elhub_data() -> bool:
+def elhub_circuit_breaker(file_manager) -> CircuitBreaker:
+    """Circuit breakers for the Elhub endpoint chain, kept between runs"""
+    return CircuitBreaker(
+        file_manager.state_store('elhub_circuit_breakers'),
+        failure_threshold=config.elhub_breaker_failures,
+        cooldown=timedelta(hours=config.elhub_breaker_cooldown_hours)
+    )
+
+
+def elhub_parquet_store(file_manager, dataset: str) -> ElhubParquetStore:
+    """Get the Parquet store for an Elhub dataset under data/processed/elhub/"""
+    return ElhubParquetStore(file_manager.processed_dir / "elhub", dataset, on_write=file_manager.record_write)
+
+
+def split_time_windows(start: datetime, end: datetime, window: timedelta) -> List[Tuple[datetime, datetime]]:
+    """
+    Split [start, end) into consecutive windows of the given length
+    
+    The last window is shortened to end exactly at `end`.
+    """
+    windows = []
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + window, end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+
+class ElhubBackfill:
+    """
+    Time-windowed, concurrent ingestion of Elhub hourly data
+    
+    Splits a date range into fixed windows per area, fetches the windows
+    concurrently under a worker limit and writes each one to
+    data/raw/elhub/<dataset>/<entity>/<area>/ and to the partitioned Parquet
+    store as soon as it arrives, so only the windows currently in flight are
+    held in memory. Completed windows are
+    recorded in a state store, which makes an interrupted backfill resumable:
+    running it again only fetches the windows that are still missing.
+    
+    Every run also advances a per-(entity, area, dataset) high-water mark -
+    the latest startTime stored - which ingest_incremental uses to request
+    only the hours that are new since the last run.
+    """
+    
+    DEFAULT_PRICE_AREAS = ['NO1', 'NO2', 'NO3', 'NO4', 'NO5']
+    
+    def __init__(self, client: Optional[ElhubApiClient] = None, file_manager=None,
+                 entity_param: str = 'price-areas', kind: str = 'consumption',
+                 window: timedelta = timedelta(days=7), max_workers: int = 4):
+        """
+        Args:
+            client: Elhub API client
+            file_manager: DataFileManager used to write windows and progress
+            entity_param: Entity URL path ('price-areas' or 'grid-areas')
+            kind: Dataset kind ('consumption' or 'production')
+            window: Length of the time window fetched per request
+            max_workers: Maximum number of concurrent requests
+        """
+        if file_manager is None:
+            from ..files import DataFileManager
+            file_manager = DataFileManager()
+        
+        self.client = client or ElhubApiClient()
+        self.file_manager = file_manager
+        self.entity_param = entity_param
+        self.kind = kind
+        self.dataset = self.client.datasets[kind]
+        self.window = window
+        self.max_workers = max_workers
+        self.progress = file_manager.state_store('elhub_backfill')
+        self.high_water_marks = file_manager.state_store('elhub_high_water_marks')
+        self.store = elhub_parquet_store(file_manager, self.dataset)
+    
+    def window_path(self, area: str, start: datetime, end: datetime) -> str:
+        """Path of a window file, relative to the raw data directory"""
+        return f"elhub/{self.dataset}/{self.entity_param}/{area}/{start:%Y%m%dT%H}_{end:%Y%m%dT%H}.json"
+    
+    def _progress_key(self, area: str) -> str:
+        return f"{self.dataset}/{self.entity_param}/{area}"
+    
+    def _high_water_key(self, area: str) -> str:
+        return f"{self.entity_param}/{area}/{self.dataset}"
+    
+    def high_water_mark(self, area: str) -> Optional[datetime]:
+        """Latest startTime stored for an area, or None if nothing has been ingested"""
+        value = self.high_water_marks.get(self._high_water_key(area))
+        return datetime.fromisoformat(value) if value else None
+    
+    def ingest(self, start: datetime, end: datetime, areas: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Fetch all windows of [start, end) for the given areas
+        
+        Args:
+            start: Range start; naive datetimes are taken as Norwegian local time
+            end: Range end (exclusive)
+            areas: Area identifiers (defaults to all five price areas)
+            
+        Returns:
+            Summary with the number of fetched and skipped windows and any failures
+        """
+        start, end = _as_local_time(start), _as_local_time(end)
+        areas = areas or self.DEFAULT_PRICE_AREAS
+        windows = split_time_windows(start, end, self.window)
+        
+        tasks = []
+        skipped = 0
+        for area in areas:
+            completed = set(self.progress.get(self._progress_key(area), []))
+            for window_start, window_end in windows:
+                if self.window_path(area, window_start, window_end) in completed:
+                    skipped += 1
+                else:
+                    tasks.append((area, window_start, window_end))
+        
+        print(f"📅 Elhub backfill {start:%Y-%m-%d} → {end:%Y-%m-%d}: "
+              f"{len(tasks)} windows to fetch, {skipped} already done")
+        
+        summary = self._run(tasks, self._ingest_window, skipped)
+        
+        print(f"✅ Elhub backfill done: {summary['fetched']} fetched, "
+              f"{summary['skipped']} skipped, {len(summary['failed'])} failed")
+        return summary
+    
+    def ingest_incremental(self, areas: Optional[List[str]] = None,
+                           overlap: timedelta = timedelta(hours=48),
+                           initial_lookback: timedelta = timedelta(days=7),
+                           until: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Fetch only the hours after each area's high-water mark
+        
+        The request starts `overlap` before the high-water mark so that late
+        corrections to recent hours are picked up, and the result is merged
+        into the Parquet store with de-duplication on (timestamp, area,
+        consumption group). A daily run therefore costs about one day of data
+        plus the overlap, regardless of how much history is stored.
+        
+        Args:
+            areas: Area identifiers (defaults to all five price areas)
+            overlap: How far before the high-water mark to re-request
+            initial_lookback: Range fetched for areas without a high-water mark
+            until: Range end (exclusive); defaults to the start of the current hour
+            
+        Returns:
+            Summary with the number of fetched windows and any failures
+        """
+        until = _as_local_time(until or datetime.now()).replace(minute=0, second=0, microsecond=0)
+        areas = areas or self.DEFAULT_PRICE_AREAS
+        
+        tasks = []
+        for area in areas:
+            high_water_mark = self.high_water_mark(area)
+            start = high_water_mark - overlap if high_water_mark else until - initial_lookback
+            tasks.extend((area, window_start, window_end)
+                         for window_start, window_end in split_time_windows(start, until, self.window))
+        
+        print(f"📈 Elhub incremental ingest up to {until:%Y-%m-%d %H:%M}: {len(tasks)} windows to fetch")
+        
+        summary = self._run(tasks, self._merge_window)
+        
+        print(f"✅ Elhub incremental ingest done: {summary['fetched']} fetched, "
+              f"{len(summary['failed'])} failed")
+        return summary
+    
+    def _run(self, tasks: List[Tuple[str, datetime, datetime]], handler, skipped: int = 0) -> Dict[str, Any]:
+        """
+        Run window tasks concurrently and advance the high-water marks
+        
+        An area's high-water mark only moves once all of its windows in this
+        run succeeded, so a failed window is never stepped over.
+        """
+        summary = {'fetched': 0, 'skipped': skipped, 'failed': []}
+        latest: Dict[str, pd.Timestamp] = {}
+        failed_areas = set()
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="elhub-backfill") as executor:
+            futures = {executor.submit(handler, *task): task for task in tasks}
+            
+            for future in as_completed(futures):
+                area, window_start, window_end = futures[future]
+                try:
+                    window_latest = future.result()
+                    summary['fetched'] += 1
+                    if window_latest is not None and (area not in latest or window_latest > latest[area]):
+                        latest[area] = window_latest
+                except Exception as e:
+                    print(f"❌ {area} {window_start:%Y-%m-%d}: {e}")
+                    failed_areas.add(area)
+                    summary['failed'].append({
+                        'area': area,
+                        'start': window_start.isoformat(),
+                        'end': window_end.isoformat(),
+                        'error': str(e)
+                    })
+        
+        for area, timestamp in latest.items():
+            if area not in failed_areas:
+                self._advance_high_water_mark(area, timestamp.to_pydatetime())
+        
+        return summary
+    
+    def _advance_high_water_mark(self, area: str, timestamp: datetime):
+        """Move an area's high-water mark forward; never moves it back"""
+        def advance(current):
+            if current is None or datetime.fromisoformat(current) < timestamp:
+                return timestamp.isoformat()
+            return current
+        
+        self.high_water_marks.update(self._high_water_key(area), advance)
+    
+    def _fetch_batches(self, area: str, start: datetime, end: datetime):
+        """Fetch one window, keep the raw response and parse it into record batches"""
+        body = self.client.fetch_window(self.entity_param, area, start, end, self.kind)
+        self.file_manager.save_raw_json(body, self.window_path(area, start, end))
+        self.file_manager.archive.put('elhub', body, metadata={
+            'kind': 'window',
+            'entity': self.entity_param,
+            'area': area,
+            'dataset': self.dataset,
+            'start': start.isoformat(),
+            'end': end.isoformat()
+        })
+        return ElhubDataProcessor.iter_record_batches(io.BytesIO(body))
+    
+    def _ingest_window(self, area: str, start: datetime, end: datetime) -> Optional[pd.Timestamp]:
+        """Fetch one window, write it out and mark it as completed"""
+        # Merged on the record key, so a re-fetched window replaces its own hours
+        latest = self._merge_window(area, start, end)
+        
+        relative_path = self.window_path(area, start, end)
+        self.progress.update(
+            self._progress_key(area),
+            lambda completed: completed + [relative_path],
+            default=[]
+        )
+        return latest
+    
+    def _merge_window(self, area: str, start: datetime, end: datetime) -> Optional[pd.Timestamp]:
+        """Fetch one window and merge it into the store, replacing overlapping hours"""
+        latest = None
+        
+        def batches():
+            nonlocal latest
+            for batch in self._fetch_batches(area, start, end):
+                latest = _latest_timestamp(batch, latest)
+                yield batch
+        
+        self.store.write_batches(batches())
+        return latest
+
+
+def _latest_timestamp(batch: pd.DataFrame, latest: Optional[pd.Timestamp]) -> Optional[pd.Timestamp]:
+    """Fold the newest timestamp of a batch into a running maximum"""
+    batch_latest = batch['timestamp'].max() if not batch.empty else None
+    if batch_latest is None or pd.isna(batch_latest):
+        return latest
+    return batch_latest if latest is None or batch_latest > latest else latest
+
+
+def _as_local_time(value: datetime) -> datetime:
+    """Attach Norwegian local time to naive datetimes"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=ZoneInfo(ELHUB_TIMEZONE))
+    return value
+
+
+def backfill_elhub_data(start: datetime, end: datetime, areas: Optional[List[str]] = None,
+                        entity_param: str = 'price-areas', window_days: int = 7,
+                        max_workers: int = 4, file_manager=None) -> Dict[str, Any]:
+    """
+    Backfill Elhub hourly consumption data for a date range
+    
+    Args:
+        start: Range start
+        end: Range end (exclusive)
+        areas: Price area or grid area identifiers
+        entity_param: 'price-areas' or 'grid-areas'
+        window_days: Days per request window
+        max_workers: Maximum number of concurrent requests
+        file_manager: DataFileManager used for output files
+        
+    Returns:
+        Backfill summary (see ElhubBackfill.ingest)
+    """
+    backfill = ElhubBackfill(
+        file_manager=file_manager,
+        entity_param=entity_param,
+        window=timedelta(days=window_days),
+        max_workers=max_workers
+    )
+    return backfill.ingest(start, end, areas)
+
+
+def fetch_elhub_data(file_manager=None, stream: bool = True, incremental: bool = False,
+                     process: bool = True) -> bool:
     """
     Main function to fetch Elhub data using the correct API v0 structure
     Returns True if successful, False otherwise
+
+    Args:
+        file_manager: DataFileManager used to write the output files
+        stream: Stream the response to disk and process it in record batches
+            instead of loading the whole payload into memory
+        incremental: Only fetch the hours after each price area's high-water
+            mark and merge them into the Parquet store
+        process: Also write the hourly records to the Parquet store; when
+            False only the JSON files are written (see process_elhub_file)
     """
     try:
-        client = ElhubApiClient()
+        if file_manager is None:
+            from ..files import DataFileManager
+            file_manager = DataFileManager()
+
+        client = ElhubApiClient(
+            endpoint_store=file_manager.state_store('elhub_endpoint'),
+            circuit_breaker=elhub_circuit_breaker(file_manager)
+        )
+        
+        if incremental:
+            summary = ElhubBackfill(client=client, file_manager=file_manager).ingest_incremental()
+            return not summary['failed']
         
         # Show available options for debugging
         client.list_available_options()
         
-        data = client.fetch_energy_consumption_data()
+        data = client.fetch_energy_consumption_data(stream=stream)
         
-        if data:
-            # Save raw data
-            raw_dir = Path(__file__).resolve().parents[3] / "data/raw"
-            raw_dir.mkdir(parents=True, exist_ok=True)
+        if data and 'body' in data:
+            with data['body'] as body:
+                file_manager.archive.put('elhub', body, metadata={'kind': 'snapshot', 'api_info': data['metadata']})
+                body.seek(0)
+                _save_streamed_elhub_data(file_manager, data['metadata'], body, process=process)
             
-            with open(raw_dir / 'elhub_energy.json', 'w') as f:
-                json.dump(data, f, indent=2)
+            print("✅ Elhub energy data fetched and saved successfully")
+            return True
+        elif data:
+            file_manager.archive.put(
+                'elhub',
+                json.dumps(data.get('data', {})).encode('utf-8'),
+                metadata={'kind': 'snapshot', 'api_info': data.get('metadata', {})}
+            )
+            
+            # Save raw data
+            file_manager.save_formatted_json(data, 'elhub_energy.json')
             
             # Process and save formatted data
             formatted_data = {
@@ -299,8 +948,15 @@ def fetch_elhub_data() -> bool:
                 }
             }
             
-            with open(raw_dir / 'elhub_energy_formatted.json', 'w') as f:
-                json.dump(formatted_data, f, indent=2)
+            file_manager.save_formatted_json(formatted_data, 'elhub_energy_formatted.json')
+            
+            consumption_df = None
+            if process:
+                with metrics.timed(metrics.PARSE, 'elhub', step='records'):
+                    consumption_df = ElhubDataProcessor.to_consumption_summary(formatted_data)
+            if consumption_df is not None and not consumption_df.empty:
+                store = elhub_parquet_store(file_manager, formatted_data['summary']['dataset'])
+                store.write_batches([consumption_df])
             
             print("✅ Elhub energy data fetched and saved successfully")
             return True
@@ -311,3 +967,79 @@ def fetch_elhub_data() -> bool:
     except Exception as e:
         print(f"❌ Error fetching Elhub data: {e}")
         return False
+
+
+def save_elhub_snapshot(file_manager, body: BinaryIO, metadata: Dict[str, Any]):
+    """
+    Rebuild Elhub outputs from an archived response body
+    
+    Args:
+        file_manager: DataFileManager used to write the output files
+        body: Seekable binary stream of the archived response
+        metadata: Metadata stored with the snapshot in the archive
+    """
+    if metadata.get('kind') == 'window':
+        # A backfill window: merge its hours back into the Parquet store
+        store = elhub_parquet_store(file_manager, metadata['dataset'])
+        store.write_batches(ElhubDataProcessor.iter_record_batches(body))
+    else:
+        _save_streamed_elhub_data(file_manager, metadata.get('api_info', {}), body)
+
+
+def process_elhub_file(file_manager) -> Any:
+    """
+    Load the saved elhub_energy.json into the partitioned Parquet store
+    
+    Args:
+        file_manager: DataFileManager holding the raw file
+        
+    Returns:
+        True on success, or 'skipped' if there is no raw file
+    """
+    raw_path = file_manager.raw_dir / 'elhub_energy.json'
+    if not raw_path.exists():
+        return 'skipped'
+    
+    with open(raw_path, 'rb') as f:
+        api_info = next(ijson.items(f, 'metadata'), {})
+        f.seek(0)
+        store = elhub_parquet_store(file_manager, api_info.get('dataset', 'CONSUMPTION_PER_GROUP_MBA_HOUR'))
+        rows = store.write_batches(ElhubDataProcessor.iter_record_batches(f, prefix='data.data'))
+    
+    print(f"⚡ Saved {rows} hourly consumption records to {store.path}")
+    return True
+
+
+def _save_streamed_elhub_data(file_manager, api_info: Dict[str, Any], body: BinaryIO, process: bool = True):
+    """
+    Write a streamed Elhub response without parsing it into memory
+    
+    The raw and formatted JSON files wrap the response body byte-for-byte,
+    and the consumption records are written to the partitioned Parquet
+    store one batch at a time.
+    """
+    file_manager.save_json_with_body({'metadata': api_info}, 'data', body, 'elhub_energy.json')
+    
+    body.seek(0)
+    envelope = {
+        'metadata': {
+            'source': 'Elhub Energy Data API v0',
+            'fetched_at': datetime.now().isoformat(),
+            'description': 'Norwegian energy consumption/production data',
+            'api_info': api_info
+        },
+        'summary': {
+            'entity': api_info.get('entity', 'Unknown'),
+            'dataset': api_info.get('dataset', 'Unknown'),
+            'endpoint': api_info.get('endpoint', 'Unknown')
+        }
+    }
+    file_manager.save_json_with_body(envelope, 'raw_data', body, 'elhub_energy_formatted.json')
+    
+    if not process:
+        return
+    
+    body.seek(0)
+    store = elhub_parquet_store(file_manager, api_info.get('dataset', 'CONSUMPTION_PER_GROUP_MBA_HOUR'))
+    rows = store.write_batches(ElhubDataProcessor.iter_record_batches(body))
+    print(f"⚡ Saved {rows} hourly consumption records to {store.path}")
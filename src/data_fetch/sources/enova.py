@@ -1,22 +1,28 @@
 """
 Enova data source for energy efficiency and renewable energy data
 """
-import requests
+import numpy as np
 import pandas as pd
 import json
-from typing import Dict, Any, Optional
+from itertools import chain
+from typing import Dict, Any, List, Optional
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
-import random
+
+from .. import metrics
+from ..columnar import processed_table_path, read_table
+from ..transport import HttpTransport, get_transport
 
 
 class EnovaApiClient:
     """Client for fetching energy efficiency data with real SSB sources and demo data"""
     
-    def __init__(self, api_key: Optional[str] = None, use_demo_data: bool = True):
+    def __init__(self, api_key: Optional[str] = None, use_demo_data: bool = True,
+                 transport: Optional[HttpTransport] = None):
         self.api_key = api_key or os.getenv('ENOVA_API_KEY')
         self.use_demo_data = use_demo_data
+        self.transport = transport or get_transport()
         
         # Real working endpoints for energy data
         self.base_urls = {
@@ -34,117 +40,181 @@ class EnovaApiClient:
             'Content-Type': 'application/json'
         }
     
-    def generate_demo_energy_efficiency_data(self) -> Dict[str, Any]:
+    # Sample companies in Bergen region (various sectors); larger demo sets
+    # continue with generated companies
+    DEMO_COMPANIES = [
+        {"name": "Bergen Maritime Solutions AS", "sector": "Maritime", "employees": 150, "energy_baseline": 2500},
+        {"name": "Havbruk Bergen AS", "sector": "Aquaculture", "employees": 80, "energy_baseline": 1800},
+        {"name": "Vestland Industri AS", "sector": "Manufacturing", "employees": 200, "energy_baseline": 3200},
+        {"name": "Bergen Logistikk AS", "sector": "Transport", "employees": 120, "energy_baseline": 2100},
+        {"name": "Fjord Energy Solutions", "sector": "Energy", "employees": 90, "energy_baseline": 1600},
+        {"name": "Bergen Fish Processing", "sector": "Food Processing", "employees": 160, "energy_baseline": 2800},
+        {"name": "Kystservice Bergen AS", "sector": "Services", "employees": 75, "energy_baseline": 1200},
+    ]
+    
+    SECTORS = ["Maritime", "Aquaculture", "Manufacturing", "Transport", "Energy", "Food Processing", "Services"]
+    
+    PROJECT_TYPES = [
+        "LED lighting upgrade",
+        "HVAC optimization",
+        "Heat pump installation",
+        "Building insulation",
+        "Energy management system",
+        "Solar panel installation",
+        "Electric vehicle fleet"
+    ]
+    
+    def generate_demo_energy_efficiency_data(self, n_companies: int = 7, start_year: int = 2020,
+                                             end_year: Optional[int] = None, seed: Optional[int] = None,
+                                             columnar: bool = False) -> Dict[str, Any]:
         """
         Generate realistic demo data for energy efficiency metrics
         This simulates Enova-style energy efficiency and renewable energy data
-        """
-        current_year = datetime.now().year
-        years = list(range(2020, current_year + 1))
-        
-        # Generate realistic energy efficiency data for Bergen region
-        companies_data = []
-        
-        # Sample companies in Bergen region (various sectors)
-        companies = [
-            {"name": "Bergen Maritime Solutions AS", "sector": "Maritime", "employees": 150, "energy_baseline": 2500},
-            {"name": "Havbruk Bergen AS", "sector": "Aquaculture", "employees": 80, "energy_baseline": 1800},
-            {"name": "Vestland Industri AS", "sector": "Manufacturing", "employees": 200, "energy_baseline": 3200},
-            {"name": "Bergen Logistikk AS", "sector": "Transport", "employees": 120, "energy_baseline": 2100},
-            {"name": "Fjord Energy Solutions", "sector": "Energy", "employees": 90, "energy_baseline": 1600},
-            {"name": "Bergen Fish Processing", "sector": "Food Processing", "employees": 160, "energy_baseline": 2800},
-            {"name": "Kystservice Bergen AS", "sector": "Services", "employees": 75, "energy_baseline": 1200},
-        ]
         
-        for company in companies:
-            company_data = {
-                "company_info": company,
-                "efficiency_projects": [],
-                "annual_metrics": []
-            }
-            
-            baseline_consumption = company["energy_baseline"]  # MWh/year
-            cumulative_savings = 0
-            
-            for year in years:
-                # Simulate energy efficiency improvements over time
-                if year > 2020:
-                    # Random efficiency project (some years have projects, some don't)
-                    if random.random() < 0.6:  # 60% chance of efficiency project per year
-                        project_savings = random.uniform(50, 300)  # MWh saved
-                        cumulative_savings += project_savings
-                        
-                        project = {
-                            "year": year,
-                            "project_type": random.choice([
-                                "LED lighting upgrade", 
-                                "HVAC optimization", 
-                                "Heat pump installation",
-                                "Building insulation",
-                                "Energy management system",
-                                "Solar panel installation",
-                                "Electric vehicle fleet"
-                            ]),
-                            "investment_nok": random.randint(200000, 2000000),
-                            "annual_savings_mwh": round(project_savings, 1),
-                            "co2_reduction_tonnes": round(project_savings * 0.12, 1),  # ~0.12 kg CO2/kWh
-                            "enova_support_nok": random.randint(50000, 500000) if random.random() < 0.7 else 0
-                        }
-                        company_data["efficiency_projects"].append(project)
-                
-                # Annual energy metrics
-                current_consumption = baseline_consumption - cumulative_savings + random.uniform(-50, 50)
-                efficiency_improvement = (cumulative_savings / baseline_consumption) * 100
-                
-                annual_metric = {
-                    "year": year,
-                    "total_energy_consumption_mwh": round(max(current_consumption, baseline_consumption * 0.6), 1),
-                    "efficiency_improvement_percent": round(efficiency_improvement, 2),
-                    "cumulative_savings_mwh": round(cumulative_savings, 1),
-                    "renewable_energy_share_percent": round(
-                        min(random.uniform(20, 60) + (year - 2020) * 3, 85), 1
-                    ),
-                    "co2_emissions_tonnes": round(current_consumption * 0.12, 1)
-                }
-                company_data["annual_metrics"].append(annual_metric)
+        All companies and years are simulated at once with NumPy, so large
+        load-test datasets (millions of rows) take seconds, and the same seed
+        always gives the same data.
+        
+        Args:
+            n_companies: Number of companies; the first seven are the Bergen sample companies
+            start_year: First year simulated
+            end_year: Last year simulated (defaults to the current year)
+            seed: Random seed for reproducible output
+            columnar: Return company_info, efficiency_projects and annual_metrics
+                as DataFrames keyed by company_id instead of nested per company
             
-            companies_data.append(company_data)
+        Returns:
+            Dictionary with metadata, regional_summary and either 'companies'
+            (nested) or the three tables (columnar)
+        """
+        end_year = end_year or datetime.now().year
+        years = np.arange(start_year, end_year + 1)
+        rng = np.random.default_rng(seed)
+        n_years = len(years)
+        
+        company_info = self._generate_demo_companies(n_companies, rng)
+        baseline = company_info["energy_baseline"].to_numpy(dtype=np.float64)[:, None]
+        
+        # Simulate energy efficiency improvements over time: some years have
+        # a project (60% chance, never in the first year), some don't
+        has_project = rng.random((n_companies, n_years)) < 0.6
+        has_project[:, 0] = False
+        savings = np.where(has_project, rng.uniform(50, 300, (n_companies, n_years)), 0.0)  # MWh saved
+        cumulative_savings = savings.cumsum(axis=1)
+        
+        # Annual energy metrics
+        current_consumption = baseline - cumulative_savings + rng.uniform(-50, 50, (n_companies, n_years))
+        renewable_share = np.minimum(
+            rng.uniform(20, 60, (n_companies, n_years)) + (years - start_year) * 3, 85
+        )
+        
+        company_ids = np.repeat(np.arange(n_companies, dtype=np.int32), n_years)
+        annual_metrics = pd.DataFrame({
+            "company_id": company_ids,
+            "year": np.tile(years.astype(np.int16), n_companies),
+            "total_energy_consumption_mwh": np.maximum(current_consumption, baseline * 0.6).round(1).ravel(),
+            "efficiency_improvement_percent": (cumulative_savings / baseline * 100).round(2).ravel(),
+            "cumulative_savings_mwh": cumulative_savings.round(1).ravel(),
+            "renewable_energy_share_percent": renewable_share.round(1).ravel(),
+            "co2_emissions_tonnes": (current_consumption * 0.12).round(1).ravel()
+        })
+        
+        # One row per project, ordered by company and year
+        project_company, project_year = np.nonzero(has_project)
+        n_projects = len(project_company)
+        project_savings = savings[project_company, project_year]
+        efficiency_projects = pd.DataFrame({
+            "company_id": project_company.astype(np.int32),
+            "year": years[project_year].astype(np.int16),
+            "project_type": pd.Categorical.from_codes(
+                rng.integers(0, len(self.PROJECT_TYPES), n_projects), categories=self.PROJECT_TYPES
+            ),
+            "investment_nok": rng.integers(200000, 2000001, n_projects),
+            "annual_savings_mwh": project_savings.round(1),
+            "co2_reduction_tonnes": (project_savings * 0.12).round(1),  # ~0.12 kg CO2/kWh
+            "enova_support_nok": np.where(
+                rng.random(n_projects) < 0.7, rng.integers(50000, 500001, n_projects), 0
+            )
+        })
         
         # Regional summary statistics
+        latest = annual_metrics.groupby("company_id", sort=False).tail(1)
         regional_summary = {
             "region": "Bergen/Vestland",
-            "total_companies": len(companies),
-            "total_efficiency_projects": sum(len(c["efficiency_projects"]) for c in companies_data),
-            "total_investment_nok": sum(
-                sum(p["investment_nok"] for p in c["efficiency_projects"]) 
-                for c in companies_data
-            ),
-            "total_energy_savings_mwh": sum(
-                c["annual_metrics"][-1]["cumulative_savings_mwh"] 
-                for c in companies_data if c["annual_metrics"]
-            ),
-            "total_co2_reduction_tonnes": sum(
-                sum(p["co2_reduction_tonnes"] for p in c["efficiency_projects"]) 
-                for c in companies_data
-            ),
-            "average_renewable_share": round(
-                sum(c["annual_metrics"][-1]["renewable_energy_share_percent"] 
-                    for c in companies_data if c["annual_metrics"]) / len(companies_data), 1
-            )
+            "total_companies": n_companies,
+            "total_efficiency_projects": n_projects,
+            "total_investment_nok": int(efficiency_projects["investment_nok"].sum()),
+            "total_energy_savings_mwh": round(float(latest["cumulative_savings_mwh"].sum()), 1),
+            "total_co2_reduction_tonnes": round(float(efficiency_projects["co2_reduction_tonnes"].sum()), 1),
+            "average_renewable_share": round(float(latest["renewable_energy_share_percent"].mean()), 1)
+            if n_companies else 0.0
         }
         
-        return {
+        data = {
             "metadata": {
                 "source": "Demo Energy Efficiency Data (Enova-style)",
                 "region": "Bergen/Vestland, Norway",
                 "generated_at": datetime.now().isoformat(),
                 "data_type": "energy_efficiency_demo",
-                "years_covered": years,
+                "years_covered": years.tolist(),
+                "seed": seed,
                 "description": "Simulated energy efficiency and renewable energy data for Bergen region companies"
             },
-            "regional_summary": regional_summary,
-            "companies": companies_data
+            "regional_summary": regional_summary
         }
+        
+        if columnar:
+            data.update({
+                "company_info": company_info,
+                "efficiency_projects": efficiency_projects,
+                "annual_metrics": annual_metrics
+            })
+        else:
+            data["companies"] = self._nest_demo_tables(company_info, efficiency_projects, annual_metrics)
+        
+        return data
+    
+    def _generate_demo_companies(self, n_companies: int, rng: np.random.Generator) -> pd.DataFrame:
+        """Company table: the sample companies first, then generated ones"""
+        sample = pd.DataFrame(self.DEMO_COMPANIES[:n_companies])
+        n_generated = n_companies - len(sample)
+        
+        generated = pd.DataFrame({
+            "name": pd.Index(np.arange(len(sample), n_companies)).map("Vestland Demo Company {:07d} AS".format),
+            "sector": np.asarray(self.SECTORS, dtype=object)[rng.integers(0, len(self.SECTORS), n_generated)],
+            "employees": rng.integers(10, 500, n_generated),
+            "energy_baseline": rng.integers(800, 4000, n_generated)
+        })
+        
+        companies = pd.concat([sample, generated], ignore_index=True) if len(sample) else generated
+        companies.insert(0, "company_id", np.arange(n_companies, dtype=np.int32))
+        companies["sector"] = pd.Categorical(companies["sector"], categories=self.SECTORS)
+        companies["employees"] = companies["employees"].astype(np.int32)
+        companies["energy_baseline"] = companies["energy_baseline"].astype(np.int32)
+        return companies
+    
+    @staticmethod
+    def _nest_demo_tables(company_info: pd.DataFrame, efficiency_projects: pd.DataFrame,
+                          annual_metrics: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Convert the columnar demo tables to the nested per-company layout"""
+        def records(df: pd.DataFrame) -> Dict[int, List[Dict[str, Any]]]:
+            grouped = {}
+            rows = df.drop(columns="company_id").astype(object).to_dict(orient="records")
+            for company_id, row in zip(df["company_id"].tolist(), rows):
+                grouped.setdefault(company_id, []).append(row)
+            return grouped
+        
+        projects = records(efficiency_projects)
+        metrics = records(annual_metrics)
+        
+        return [
+            {
+                "company_info": {key: value for key, value in info.items() if key != "company_id"},
+                "efficiency_projects": projects.get(info["company_id"], []),
+                "annual_metrics": metrics.get(info["company_id"], [])
+            }
+            for info in company_info.astype(object).to_dict(orient="records")
+        ]
     
     def fetch_energy_efficiency_data(self) -> Optional[Dict[str, Any]]:
         """
@@ -189,16 +259,16 @@ class EnovaApiClient:
                 }
             }
             
-            response = requests.post(
-                self.base_urls['ssb_renewable'],
+            response = self.transport.post(
+                self.base_urls['ssb_renewable'], source='enova',
                 json=query,
-                headers=self.get_headers(),
-                timeout=30
+                headers=self.get_headers()
             )
             
             if response.status_code == 200:
                 print("✅ Successfully fetched renewable energy data from SSB")
-                data = response.json()
+                with metrics.timed(metrics.PARSE, 'enova', step='json'):
+                    data = response.json()
                 
                 # Add our metadata
                 return {
@@ -222,86 +292,186 @@ class EnovaApiClient:
 class EnovaDataProcessor:
     """Process and format Enova/energy efficiency data"""
     
+    # Compact dtypes shared by the normalized tables
+    TABLE_DTYPES = {
+        "company_id": np.int32,
+        "year": np.int16,
+        "employees": np.int32,
+        "energy_baseline": np.int32,
+        "sector": "category",
+        "project_type": "category"
+    }
+    
     @staticmethod
-    def to_efficiency_summary(data: Dict[str, Any]) -> pd.DataFrame:
-        """Convert energy efficiency data to summary DataFrame"""
-        if not data or "companies" not in data:
-            return pd.DataFrame()
+    def to_tables(data: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+        """
+        Flatten energy efficiency data into three normalized tables
+        
+        Accepts both the nested per-company layout and the columnar layout
+        of generate_demo_energy_efficiency_data(columnar=True).
         
-        summaries = []
-        for company in data["companies"]:
-            company_info = company["company_info"]
-            latest_metrics = company["annual_metrics"][-1] if company["annual_metrics"] else {}
+        Args:
+            data: Energy efficiency payload
             
-            summary = {
-                "company_name": company_info["name"],
-                "sector": company_info["sector"],
-                "employees": company_info["employees"],
-                "total_projects": len(company["efficiency_projects"]),
-                "total_investment_nok": sum(p["investment_nok"] for p in company["efficiency_projects"]),
-                "energy_savings_mwh": latest_metrics.get("cumulative_savings_mwh", 0),
-                "efficiency_improvement_percent": latest_metrics.get("efficiency_improvement_percent", 0),
-                "renewable_share_percent": latest_metrics.get("renewable_energy_share_percent", 0),
-                "co2_emissions_tonnes": latest_metrics.get("co2_emissions_tonnes", 0),
-                "year": latest_metrics.get("year", datetime.now().year)
+        Returns:
+            Dictionary with 'companies', 'projects' and 'annual_metrics'
+            DataFrames, linked by company_id
+        """
+        if data and "company_info" in data:
+            tables = {
+                "companies": data["company_info"],
+                "projects": data["efficiency_projects"],
+                "annual_metrics": data["annual_metrics"]
             }
-            summaries.append(summary)
+        elif data and data.get("companies"):
+            companies = data["companies"]
+            company_ids = np.arange(len(companies), dtype=np.int32)
+            
+            projects = pd.DataFrame.from_records(
+                list(chain.from_iterable(company["efficiency_projects"] for company in companies)),
+                columns=["year", "project_type", "investment_nok", "annual_savings_mwh",
+                         "co2_reduction_tonnes", "enova_support_nok"]
+            )
+            projects.insert(0, "company_id", np.repeat(
+                company_ids, [len(company["efficiency_projects"]) for company in companies]
+            ))
+            
+            annual_metrics = pd.DataFrame.from_records(
+                list(chain.from_iterable(company["annual_metrics"] for company in companies)),
+                columns=["year", "total_energy_consumption_mwh", "efficiency_improvement_percent",
+                         "cumulative_savings_mwh", "renewable_energy_share_percent", "co2_emissions_tonnes"]
+            )
+            annual_metrics.insert(0, "company_id", np.repeat(
+                company_ids, [len(company["annual_metrics"]) for company in companies]
+            ))
+            
+            company_info = pd.DataFrame.from_records([company["company_info"] for company in companies])
+            company_info.insert(0, "company_id", company_ids)
+            
+            tables = {"companies": company_info, "projects": projects, "annual_metrics": annual_metrics}
+        else:
+            return {}
         
-        return pd.DataFrame(summaries)
+        return {
+            name: df.astype({column: dtype for column, dtype in EnovaDataProcessor.TABLE_DTYPES.items()
+                             if column in df.columns})
+            for name, df in tables.items()
+        }
     
     @staticmethod
-    def to_projects_df(data: Dict[str, Any]) -> pd.DataFrame:
-        """Convert efficiency projects to DataFrame"""
-        if not data or "companies" not in data:
-            return pd.DataFrame()
+    def efficiency_summary(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Per-company summary: project totals plus the latest annual metrics
         
-        projects = []
-        for company in data["companies"]:
-            company_name = company["company_info"]["name"]
-            company_sector = company["company_info"]["sector"]
+        Args:
+            tables: Normalized tables from to_tables
             
-            for project in company["efficiency_projects"]:
-                project_data = project.copy()
-                project_data["company_name"] = company_name
-                project_data["company_sector"] = company_sector
-                projects.append(project_data)
+        Returns:
+            DataFrame with one row per company
+        """
+        if not tables:
+            return pd.DataFrame()
+        
+        companies = tables["companies"].set_index("company_id")
+        project_totals = tables["projects"].groupby("company_id").agg(
+            total_projects=("investment_nok", "size"),
+            total_investment_nok=("investment_nok", "sum")
+        )
+        latest_metrics = (
+            tables["annual_metrics"]
+            .sort_values(["company_id", "year"], kind="stable")
+            .drop_duplicates("company_id", keep="last")
+            .set_index("company_id")
+        )
+        
+        summary = pd.DataFrame({
+            "company_name": companies["name"],
+            "sector": companies["sector"],
+            "employees": companies["employees"],
+            "total_projects": project_totals["total_projects"].reindex(companies.index, fill_value=0),
+            "total_investment_nok": project_totals["total_investment_nok"].reindex(companies.index, fill_value=0),
+            "energy_savings_mwh": latest_metrics["cumulative_savings_mwh"].reindex(companies.index, fill_value=0),
+            "efficiency_improvement_percent": latest_metrics["efficiency_improvement_percent"]
+                .reindex(companies.index, fill_value=0),
+            "renewable_share_percent": latest_metrics["renewable_energy_share_percent"]
+                .reindex(companies.index, fill_value=0),
+            "co2_emissions_tonnes": latest_metrics["co2_emissions_tonnes"].reindex(companies.index, fill_value=0),
+            "year": latest_metrics["year"].reindex(companies.index, fill_value=datetime.now().year)
+        })
+        
+        return summary.reset_index(drop=True)
+    
+    @staticmethod
+    def projects_frame(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Projects with their company name and sector attached"""
+        if not tables or tables["projects"].empty:
+            return pd.DataFrame()
+        
+        companies = tables["companies"]
+        projects = tables["projects"]
+        
+        return projects.drop(columns="company_id").assign(
+            company_name=_company_column(companies, projects["company_id"], "name"),
+            company_sector=_company_column(companies, projects["company_id"], "sector")
+        )
+    
+    @staticmethod
+    def annual_metrics_frame(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Long table of per-company, per-year metrics for multi-year trends"""
+        if not tables or tables["annual_metrics"].empty:
+            return pd.DataFrame()
+        
+        companies = tables["companies"]
+        metrics = tables["annual_metrics"]
         
-        return pd.DataFrame(projects)
+        frame = metrics.drop(columns="company_id")
+        frame.insert(0, "company_name", _company_column(companies, metrics["company_id"], "name"))
+        frame.insert(1, "sector", _company_column(companies, metrics["company_id"], "sector"))
+        return frame
+    
+    @staticmethod
+    def to_efficiency_summary(data: Dict[str, Any]) -> pd.DataFrame:
+        """Convert energy efficiency data to summary DataFrame"""
+        return EnovaDataProcessor.efficiency_summary(EnovaDataProcessor.to_tables(data))
+    
+    @staticmethod
+    def to_projects_df(data: Dict[str, Any]) -> pd.DataFrame:
+        """Convert efficiency projects to DataFrame"""
+        return EnovaDataProcessor.projects_frame(EnovaDataProcessor.to_tables(data))
+    
+    @staticmethod
+    def to_annual_metrics_df(data: Dict[str, Any]) -> pd.DataFrame:
+        """Convert per-year company metrics to a long DataFrame"""
+        return EnovaDataProcessor.annual_metrics_frame(EnovaDataProcessor.to_tables(data))
 
 
-def fetch_enova_data() -> bool:
+def fetch_enova_data(file_manager=None, process: bool = True) -> bool:
     """
     Main function to fetch Enova/energy efficiency data
     Returns True if successful, False otherwise
+
+    Args:
+        file_manager: DataFileManager used to write the output files
+        process: Also derive the CSV files; when False only
+            enova_efficiency.json is written (see process_enova_file)
     """
     try:
+        if file_manager is None:
+            from ..files import DataFileManager
+            file_manager = DataFileManager()
+
         # Use demo data by default for reliable results
         client = EnovaApiClient(use_demo_data=True)
         data = client.fetch_energy_efficiency_data()
         
         if data:
-            # Save raw data
-            raw_dir = Path(__file__).resolve().parents[3] / "data/raw"
-            raw_dir.mkdir(parents=True, exist_ok=True)
-            
-            with open(raw_dir / 'enova_efficiency.json', 'w') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            # Process and save formatted data for easier access
-            processed_dir = Path(__file__).resolve().parents[3] / "data/processed"
-            processed_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Save company efficiency summary
-            efficiency_df = EnovaDataProcessor.to_efficiency_summary(data)
-            if not efficiency_df.empty:
-                efficiency_df.to_csv(processed_dir / 'company_efficiency_summary.csv', index=False)
-                print(f"📊 Saved efficiency data for {len(efficiency_df)} companies")
-            
-            # Save projects data
-            projects_df = EnovaDataProcessor.to_projects_df(data)
-            if not projects_df.empty:
-                projects_df.to_csv(processed_dir / 'efficiency_projects.csv', index=False)
-                print(f"🔧 Saved {len(projects_df)} efficiency projects")
+            # Demo data is generated afresh on every run; only real responses are worth keeping
+            if not client.use_demo_data:
+                file_manager.archive.put('enova', json.dumps(data, ensure_ascii=False).encode('utf-8'))
+            if process:
+                save_enova_outputs(file_manager, data)
+            else:
+                file_manager.save_formatted_json(data, 'enova_efficiency.json')
             
             print("✅ Enova/Energy efficiency data fetched and processed successfully")
             return True
@@ -314,6 +484,77 @@ def fetch_enova_data() -> bool:
         return False
 
 
+def _company_column(companies: pd.DataFrame, company_ids: pd.Series, column: str) -> pd.Categorical:
+    """
+    Look up a company attribute for every row of a child table
+    
+    Returns a categorical built from positions into the company table, so
+    repeating a company name across millions of rows costs one int per row.
+    """
+    positions = pd.Index(companies["company_id"]).get_indexer(company_ids)
+    values = companies[column]
+    
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, dtype = values.cat.codes.to_numpy(), values.dtype
+    else:
+        codes, uniques = pd.factorize(values)
+        dtype = pd.CategoricalDtype(uniques)
+    
+    row_codes = codes[positions]
+    row_codes[positions < 0] = -1
+    return pd.Categorical.from_codes(row_codes, dtype=dtype)
+
+
+def save_enova_outputs(file_manager, data: Dict[str, Any]):
+    """
+    Save the raw Enova payload and the CSVs derived from it
+    
+    Args:
+        file_manager: DataFileManager used to write the output files
+        data: Energy efficiency payload as returned by EnovaApiClient
+    """
+    # Save raw data
+    file_manager.save_formatted_json(data, 'enova_efficiency.json')
+    
+    # Flatten once, derive every table from the same frames
+    with metrics.timed(metrics.PARSE, 'enova', step='tables'):
+        tables = EnovaDataProcessor.to_tables(data)
+    
+    # Save company efficiency summary
+    efficiency_df = EnovaDataProcessor.efficiency_summary(tables)
+    if not efficiency_df.empty:
+        file_manager.save_processed_table(efficiency_df, 'company_efficiency_summary')
+        print(f"📊 Saved efficiency data for {len(efficiency_df)} companies")
+    
+    # Save projects data
+    projects_df = EnovaDataProcessor.projects_frame(tables)
+    if not projects_df.empty:
+        file_manager.save_processed_table(projects_df, 'efficiency_projects')
+        print(f"🔧 Saved {len(projects_df)} efficiency projects")
+    
+    # Save per-company yearly metrics
+    metrics_df = EnovaDataProcessor.annual_metrics_frame(tables)
+    if not metrics_df.empty:
+        file_manager.save_processed_table(metrics_df, 'company_annual_metrics')
+        print(f"📈 Saved {len(metrics_df)} company-year metrics")
+
+
+def process_enova_file(file_manager) -> Any:
+    """
+    Derive the Enova CSV files from the saved enova_efficiency.json
+    
+    Returns:
+        True on success, or 'skipped' if there is no raw file
+    """
+    raw_path = file_manager.raw_dir / 'enova_efficiency.json'
+    if not raw_path.exists():
+        return 'skipped'
+    
+    with open(raw_path, 'r', encoding='utf-8') as f:
+        save_enova_outputs(file_manager, json.load(f))
+    return True
+
+
 def fetch_all_enova_data(years=None):
     """Legacy function for backward compatibility"""
     return fetch_enova_data()
@@ -328,8 +569,9 @@ if __name__ == "__main__":
         # Load and display summary
         processed_dir = Path(__file__).resolve().parents[3] / "data/processed"
         
-        if (processed_dir / 'company_efficiency_summary.csv').exists():
-            df = pd.read_csv(processed_dir / 'company_efficiency_summary.csv')
+        summary_path = processed_table_path(processed_dir, 'company_efficiency_summary')
+        if summary_path.exists():
+            df = read_table(summary_path)
             print(f"Companies analyzed: {len(df)}")
             print(f"Total energy savings: {df['energy_savings_mwh'].sum():.1f} MWh")
             print(f"Average efficiency improvement: {df['efficiency_improvement_percent'].mean():.1f}%")
@@ -3,18 +3,65 @@ SSB (Statistics Norway) data source for greenhouse gas emissions
 """
 import requests
 import json
+import itertools
+import math
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+from .. import metrics
+from ..transport import HttpTransport, get_transport
+
+# SSB API v0 cell limit per query (the request-rate limit is applied by the transport)
+SSB_CELL_LIMIT = 800_000
+
+
+def plan_table_queries(selection: Dict[str, List[str]], cell_limit: int = SSB_CELL_LIMIT) -> List[Dict[str, List[str]]]:
+    """
+    Split a table selection into sub-selections under the cell limit
+    
+    The largest dimensions are chunked first, each into the biggest slices
+    that keep a sub-query under the limit, so the plan uses as few requests
+    as possible while leaving small dimensions whole.
+    
+    Args:
+        selection: Mapping of variable code to the value codes to fetch
+        cell_limit: Maximum number of cells per query
+        
+    Returns:
+        Sub-selections whose union is the full selection
+    """
+    chunk_sizes = {code: len(values) for code, values in selection.items()}
+    
+    for code in sorted(selection, key=lambda code: len(selection[code]), reverse=True):
+        cells = math.prod(chunk_sizes.values())
+        if cells <= cell_limit:
+            break
+        other_cells = cells // chunk_sizes[code]
+        chunk_sizes[code] = max(1, cell_limit // other_cells)
+    
+    chunks_per_variable = [
+        [values[i:i + chunk_sizes[code]] for i in range(0, len(values), chunk_sizes[code])]
+        for code, values in selection.items()
+    ]
+    
+    return [
+        dict(zip(selection.keys(), chunks))
+        for chunks in itertools.product(*chunks_per_variable)
+    ]
 
 
 class SSBApiClient:
     """Client for Statistics Norway (SSB) API"""
     
-    def __init__(self, base_url: str = "https://data.ssb.no/api/v0/en/table", api_key: Optional[str] = None):
+    def __init__(self, base_url: str = "https://data.ssb.no/api/v0/en/table", api_key: Optional[str] = None,
+                 transport: Optional[HttpTransport] = None):
         self.base_url = base_url
         self.api_key = api_key or os.getenv('SSB_API_KEY')
+        self.transport = transport or get_transport()
     
     def get_headers(self) -> Dict[str, str]:
         """Get request headers with authentication if available"""
@@ -29,21 +76,16 @@ class SSBApiClient:
             
         return headers
     
-    def fetch_emissions_data(self, table_id: str = "13931") -> Dict[str, Any]:
+    def build_emissions_query(self, latest_only: bool = False) -> Dict[str, Any]:
         """
-        Fetch greenhouse gas emissions data from SSB
+        Build the JSON-stat2 query for national greenhouse gas emissions
         
         Args:
-            table_id: SSB table identifier
+            latest_only: Restrict the query to the most recent year only
             
         Returns:
-            Raw JSON data from the API
-            
-        Raises:
-            requests.RequestException: If API request fails
+            Query body for the SSB API
         """
-        url = f"{self.base_url}/{table_id}"
-        
         query = {
             "query": [
                 {
@@ -62,26 +104,316 @@ class SSBApiClient:
             "response": {"format": "json-stat2"}
         }
         
-        response = requests.post(url, json=query, headers=self.get_headers())
+        if latest_only:
+            query["query"].append({
+                "code": "Tid",
+                "selection": {"filter": "top", "values": ["1"]}
+            })
+        
+        return query
+    
+    def fetch_emissions_data(self, table_id: str = "13931") -> Dict[str, Any]:
+        """
+        Fetch greenhouse gas emissions data from SSB
+        
+        Args:
+            table_id: SSB table identifier
+            
+        Returns:
+            Raw JSON data from the API
+            
+        Raises:
+            requests.RequestException: If API request fails
+        """
+        url = f"{self.base_url}/{table_id}"
+        
+        response = self.transport.post(
+            url, source='ssb', json=self.build_emissions_query(), headers=self.get_headers()
+        )
         
         if response.status_code == 200:
-            return json.loads(response.content.decode("utf-8"))
+            with metrics.timed(metrics.PARSE, 'ssb', step='json'):
+                return json.loads(response.content.decode("utf-8"))
         else:
             raise requests.RequestException(
                 f"Failed to fetch data: {response.status_code} - {response.text}"
             )
+    
+    def fetch_table_updated(self, table_id: str = "13931") -> Optional[str]:
+        """
+        Get the "updated" timestamp SSB publishes for a table
+        
+        Queries a single cell (latest year only), so checking for new data
+        costs one small request instead of a full download.
+        
+        Args:
+            table_id: SSB table identifier
+            
+        Returns:
+            ISO timestamp of the last table update, or None if not reported
+            
+        Raises:
+            requests.RequestException: If API request fails
+        """
+        url = f"{self.base_url}/{table_id}"
+        
+        response = self.transport.post(
+            url, source='ssb', json=self.build_emissions_query(latest_only=True), headers=self.get_headers()
+        )
+        
+        if response.status_code == 200:
+            return response.json().get("updated")
+        else:
+            raise requests.RequestException(
+                f"Failed to fetch table metadata: {response.status_code} - {response.text}"
+            )
+    
+    def fetch_table_metadata(self, table_id: str = "13931") -> Dict[str, Any]:
+        """
+        Get a table's variables and their value codes
+        
+        Args:
+            table_id: SSB table identifier
+            
+        Returns:
+            Table metadata with a 'variables' list of {code, text, values, valueTexts}
+            
+        Raises:
+            requests.RequestException: If API request fails
+        """
+        url = f"{self.base_url}/{table_id}"
+        
+        response = self.transport.get(url, source='ssb', headers=self.get_headers())
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise requests.RequestException(
+                f"Failed to fetch table metadata: {response.status_code} - {response.text}"
+            )
+    
+    @staticmethod
+    def build_selection_query(selection: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Build a JSON-stat2 query selecting the given value codes per variable"""
+        return {
+            "query": [
+                {"code": code, "selection": {"filter": "item", "values": values}}
+                for code, values in selection.items()
+            ],
+            "response": {"format": "json-stat2"}
+        }
+    
+    def fetch_full_table(self, table_id: str = "13931", cell_limit: int = SSB_CELL_LIMIT,
+                         max_workers: int = 4, labels: bool = False) -> pd.DataFrame:
+        """
+        Download every cell of a table, in as many queries as the cell limit requires
+        
+        Reads the table metadata, plans sub-queries with plan_table_queries,
+        runs them concurrently (throttled by the transport's per-host rate
+        limit) and merges the decoded results.
+        
+        Args:
+            table_id: SSB table identifier
+            cell_limit: Maximum number of cells per query
+            max_workers: Maximum number of concurrent queries
+            labels: Use category labels instead of codes in the dimension columns
+            
+        Returns:
+            Long-format DataFrame as returned by SSBDataProcessor.decode
+            
+        Raises:
+            requests.RequestException: If the metadata or any sub-query fails
+        """
+        metadata = self.fetch_table_metadata(table_id)
+        selection = {variable["code"]: variable["values"] for variable in metadata["variables"]}
+        plan = plan_table_queries(selection, cell_limit)
+        
+        print(f"📦 SSB table {table_id}: {math.prod(len(v) for v in selection.values()):,} cells "
+              f"in {len(plan)} queries")
+        
+        url = f"{self.base_url}/{table_id}"
+        
+        def fetch_chunk(chunk: Dict[str, List[str]]) -> pd.DataFrame:
+            response = self.transport.post(
+                url, source='ssb', json=self.build_selection_query(chunk), headers=self.get_headers()
+            )
+            if response.status_code != 200:
+                raise requests.RequestException(
+                    f"Failed to fetch data: {response.status_code} - {response.text}"
+                )
+            with metrics.timed(metrics.PARSE, 'ssb', step='decode'):
+                return SSBDataProcessor.decode(json.loads(response.content.decode("utf-8")), labels=labels)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ssb-table") as executor:
+            frames = list(executor.map(fetch_chunk, plan))
+        
+        df = pd.concat(frames, ignore_index=True)
+        
+        # Chunks carry only their own categories; restore the table-wide ones
+        for variable in metadata["variables"]:
+            code = variable["code"]
+            if code in df.columns:
+                categories = variable["valueTexts"] if labels else variable["values"]
+                if len(set(categories)) == len(categories):
+                    df[code] = pd.Categorical(df[code].astype(object), categories=categories)
+                else:
+                    df[code] = df[code].astype("category")
+        
+        return df
 
 
 class SSBDataProcessor:
     """Process SSB JSON-stat2 data into various formats"""
     
     @staticmethod
-    def to_formatted_json(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+    def dimension_codes(raw_data: Dict[str, Any], dimension: str) -> List[str]:
+        """
+        Get the category codes of a dimension in value order
+        
+        Args:
+            raw_data: Raw JSON-stat2 data from SSB API
+            dimension: Dimension id, e.g. 'Tid'
+            
+        Returns:
+            Category codes ordered by their position in the value array
+        """
+        category = raw_data["dimension"][dimension]["category"]
+        index = category.get("index")
+        
+        if index is None:
+            # A single-category dimension may omit the index
+            return list(category.get("label", {}).keys())
+        if isinstance(index, list):
+            return index
+        return sorted(index, key=index.get)
+    
+    @staticmethod
+    def decode_array(raw_data: Dict[str, Any]) -> Tuple[np.ndarray, Dict[str, List[str]]]:
+        """
+        Reshape the value array into one axis per dimension
+        
+        Args:
+            raw_data: Raw JSON-stat2 data from SSB API
+            
+        Returns:
+            Tuple of (N-dimensional float array with NaN for missing cells,
+            mapping of dimension id to its category codes along that axis)
+        """
+        ids = raw_data["id"]
+        sizes = raw_data["size"]
+        values = raw_data["value"]
+        
+        if isinstance(values, dict):
+            # Sparse form: {"<flat index>": value}
+            array = np.full(int(np.prod(sizes)), np.nan)
+            if values:
+                positions = np.fromiter(values.keys(), dtype=np.int64, count=len(values))
+                array[positions] = np.array(list(values.values()), dtype=float)
+        else:
+            array = np.array(values, dtype=float)
+        
+        coords = {dimension: SSBDataProcessor.dimension_codes(raw_data, dimension) for dimension in ids}
+        return array.reshape(sizes), coords
+    
+    @staticmethod
+    def decode(raw_data: Dict[str, Any], labels: bool = False) -> pd.DataFrame:
+        """
+        Decode a JSON-stat2 dataset into a long-format DataFrame
+        
+        Works for any number of dimensions: the value array is reshaped with
+        the id/size arrays and every cell becomes one row, with one
+        categorical column per dimension and a 'value' column.
+        
+        Args:
+            raw_data: Raw JSON-stat2 data from SSB API
+            labels: Use category labels instead of codes in the dimension columns
+            
+        Returns:
+            DataFrame with one column per dimension id plus 'value'. Values are
+            nullable integers when the table reports zero decimals and every
+            value is whole, floats as reported otherwise.
+        """
+        array, coords = SSBDataProcessor.decode_array(raw_data)
+        positions = np.unravel_index(np.arange(array.size), array.shape)
+        
+        columns = {}
+        for axis, (dimension, codes) in enumerate(coords.items()):
+            categories = codes
+            if labels:
+                label_map = raw_data["dimension"][dimension]["category"].get("label", {})
+                categories = [label_map.get(code, code) for code in codes]
+            
+            if len(set(categories)) == len(categories):
+                columns[dimension] = pd.Categorical.from_codes(positions[axis], categories=categories)
+            else:
+                # Labels need not be unique; look them up per position instead
+                columns[dimension] = pd.Categorical(np.asarray(categories, dtype=object)[positions[axis]])
+        
+        values = array.reshape(-1)
+        present = values[~np.isnan(values)]
+        # Only cast when lossless: 'decimals' is a display hint, not a guarantee
+        if (raw_data.get("extension", {}).get("px", {}).get("decimals") == 0
+                and np.array_equal(present, np.round(present))):
+            columns["value"] = pd.array(values, dtype="Float64").astype("Int64")
+        else:
+            columns["value"] = values
+        
+        return pd.DataFrame(columns)
+    
+    @staticmethod
+    def decode_emissions(raw_data: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Decode an emissions response into the canonical frame all outputs derive from
+        
+        Args:
+            raw_data: Raw JSON-stat2 data from SSB API
+            
+        Returns:
+            The SSBDataProcessor.decode frame (dimension codes and 'value')
+            plus 'year', and 'source' and 'pollutant' labels
+        """
+        df = SSBDataProcessor.decode(raw_data)
+        df["year"] = df["Tid"].astype(int)
+        
+        for column, dimension in (("source", "UtslpTilLuft"), ("pollutant", "UtslpKomp")):
+            labels = raw_data["dimension"][dimension]["category"].get("label", {})
+            df[column] = df[dimension].map(lambda code: labels.get(code, code))
+        
+        return df
+    
+    @staticmethod
+    def process(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Derive every output from a single decode of the response
+        
+        Args:
+            raw_data: Raw JSON-stat2 data from SSB API
+            
+        Returns:
+            Dictionary with 'formatted_json', 'raw_csv', 'clean_csv' and 'summary'
+        """
+        frame = SSBDataProcessor.decode_emissions(raw_data)
+        clean_df = SSBDataProcessor.to_clean_csv(raw_data, frame)
+        summary = SSBDataProcessor.get_summary_stats(clean_df)
+        
+        formatted_data = SSBDataProcessor.to_formatted_json(raw_data, frame)
+        formatted_data["summary"] = summary
+        
+        return {
+            "formatted_json": formatted_data,
+            "raw_csv": SSBDataProcessor.to_raw_csv(raw_data, frame),
+            "clean_csv": clean_df,
+            "summary": summary
+        }
+    
+    @staticmethod
+    def to_formatted_json(raw_data: Dict[str, Any], frame: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """
         Convert JSON-stat2 format to readable JSON structure
         
         Args:
             raw_data: Raw JSON-stat2 data from SSB API
+            frame: Already decoded frame (see decode_emissions)
             
         Returns:
             Formatted JSON with metadata and clean data structure
@@ -104,62 +436,72 @@ class SSBDataProcessor:
             "data": []
         }
         
-        # Extract emissions data
-        years = list(raw_data["dimension"]["Tid"]["category"]["label"].values())
-        values = raw_data["value"]
+        df = frame if frame is not None else SSBDataProcessor.decode_emissions(raw_data)
+        records = pd.DataFrame({
+            "year": df["year"],
+            "emissions_ktCO2e": df["value"]
+        })
         
-        for year, value in zip(years, values):
-            formatted_data["data"].append({
-                "year": int(year),
-                "emissions_ktCO2e": value
-            })
+        # Only spell out the dimensions that actually vary in this dataset
+        for key, dimension in (("source", "UtslpTilLuft"), ("pollutant", "UtslpKomp"), ("contents", "ContentsCode")):
+            if len(df[dimension].cat.categories) > 1:
+                records[key] = df[dimension].astype(str)
+        
+        records = records.astype(object).where(records.notna(), None)
+        formatted_data["data"] = records.to_dict(orient="records")
         
         return formatted_data
     
     @staticmethod
-    def to_raw_csv(raw_data: Dict[str, Any]) -> pd.DataFrame:
+    def to_raw_csv(raw_data: Dict[str, Any], frame: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """
         Convert to raw CSV format preserving original structure
         
         Args:
             raw_data: Raw JSON-stat2 data from SSB API
+            frame: Already decoded frame (see decode_emissions)
             
         Returns:
             DataFrame with original API structure and codes
         """
-        years = list(raw_data["dimension"]["Tid"]["category"]["label"].values())
-        values = raw_data["value"]
+        df = frame if frame is not None else SSBDataProcessor.decode(raw_data)
+        df = df[raw_data["id"] + ["value"]]
+        contents = df["ContentsCode"].cat.categories
         
-        return pd.DataFrame({
-            "Tid": years,  # Original dimension name
-            "UtslippCO2ekvival": values,  # Original value name
-            "UtslpTilLuft": ["0"] * len(years),  # Source code
-            "UtslpKomp": ["A10"] * len(years),  # Pollutant code
-            "table_id": ["08940"] * len(years),  # Table identifier
-            "unit": ["1000_tonnes_CO2_eq"] * len(years)  # Unit info
-        })
+        # A single contents code names the value column, as in the original API
+        value_column = contents[0] if len(contents) == 1 else "value"
+        raw_df = df.rename(columns={"value": value_column})
+        if len(contents) == 1:
+            raw_df = raw_df.drop(columns="ContentsCode")
+        
+        leading = ["Tid", value_column]
+        raw_df = raw_df[leading + [column for column in raw_df.columns if column not in leading]]
+        # Kept as the table the raw CSV has always been labelled with, whatever table was fetched
+        raw_df["table_id"] = "08940"
+        raw_df["unit"] = "1000_tonnes_CO2_eq"
+        return raw_df
     
     @staticmethod
-    def to_clean_csv(raw_data: Dict[str, Any]) -> pd.DataFrame:
+    def to_clean_csv(raw_data: Dict[str, Any], frame: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """
         Convert to analysis-ready CSV format
         
         Args:
             raw_data: Raw JSON-stat2 data from SSB API
+            frame: Already decoded frame (see decode_emissions)
             
         Returns:
             DataFrame with clean, analysis-ready data
         """
-        years = list(raw_data["dimension"]["Tid"]["category"]["label"].values())
-        values = raw_data["value"]
+        df = frame if frame is not None else SSBDataProcessor.decode_emissions(raw_data)
         
         return pd.DataFrame({
-            "year": [int(year) for year in years],
-            "emissions_ktCO2e": values,
-            "emissions_MtCO2e": [round(val / 1000, 2) for val in values],  # Convert to million tonnes
-            "source": ["All sources"] * len(years),
-            "pollutant": ["Greenhouse gases total"] * len(years),
-            "country": ["Norway"] * len(years)
+            "year": df["year"],
+            "emissions_ktCO2e": df["value"],
+            "emissions_MtCO2e": (df["value"] / 1000).round(2),  # Convert to million tonnes
+            "source": df["source"],
+            "pollutant": df["pollutant"],
+            "country": "Norway"
         })
     
     @staticmethod
@@ -173,21 +515,33 @@ class SSBDataProcessor:
         Returns:
             Dictionary with summary statistics
         """
+        # Suppressed cells decode as missing values; leave them out of the statistics
+        reported = df[df["emissions_ktCO2e"].notna()]
+        if reported.empty:
+            return {
+                "time_period": f"{df['year'].min()} - {df['year'].max()}",
+                "data_points": len(df),
+                "latest_emissions": None,
+                "peak_emissions": None,
+                "total_change_pct": None
+            }
+        
+        emissions = reported["emissions_ktCO2e"]
+        years = reported["year"]
+        first, last = emissions.iloc[0], emissions.iloc[-1]
+        
         return {
             "time_period": f"{df['year'].min()} - {df['year'].max()}",
             "data_points": len(df),
             "latest_emissions": {
-                "year": int(df.iloc[-1]['year']),
-                "value_ktCO2e": int(df.iloc[-1]['emissions_ktCO2e'])
+                "year": int(years.iloc[-1]),
+                "value_ktCO2e": int(last)
             },
             "peak_emissions": {
-                "value_ktCO2e": int(df['emissions_ktCO2e'].max()),
-                "year": int(df.loc[df['emissions_ktCO2e'].idxmax(), 'year'])
+                "value_ktCO2e": int(emissions.max()),
+                "year": int(years.loc[emissions.idxmax()])
             },
-            "total_change_pct": round(
-                ((df.iloc[-1]['emissions_ktCO2e'] - df.iloc[0]['emissions_ktCO2e']) 
-                 / df.iloc[0]['emissions_ktCO2e']) * 100, 1
-            )
+            "total_change_pct": round(float((last - first) / first * 100), 1)
         }
 
 
@@ -226,7 +580,7 @@ def fetch_ssb_data():
     if api_key:
         headers['Authorization'] = f'Bearer {api_key}'
 
-    response = requests.post(url, json=query, headers=headers)
+    response = get_transport().post(url, source='ssb', json=query, headers=headers)
     if response.status_code == 200:
         # Lagre rådata
         RAW_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,71 @@
+"""
+Persistent JSON state shared between fetch runs
+"""
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+
+class JsonStateStore:
+    """
+    Small key/value store backed by a JSON file
+
+    Used for fetch bookkeeping that has to survive between runs (source
+    manifests, remembered endpoints and the like). Updates are serialised
+    within the process and written with an atomic rename, so a crashed run
+    never leaves a truncated state file behind.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+
+    def load(self) -> Dict[str, Any]:
+        """Load the full state, or an empty dict if none is stored yet"""
+        with self._lock:
+            if not self.path.exists():
+                return {}
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, OSError):
+                # Treat a corrupt state file as empty rather than failing the fetch
+                return {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.load().get(key, default)
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            state = self.load()
+            state[key] = value
+            self._save(state)
+
+    def update(self, key: str, func: Callable[[Any], Any], default: Any = None) -> Any:
+        """Atomically replace the value for key with func(current value)"""
+        with self._lock:
+            state = self.load()
+            state[key] = func(state.get(key, default))
+            self._save(state)
+            return state[key]
+
+    def delete(self, key: str):
+        with self._lock:
+            state = self.load()
+            if state.pop(key, None) is not None:
+                self._save(state)
+
+    def _save(self, state: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
@@ -0,0 +1,223 @@
+"""
+Shared pooled HTTP transport for all data source clients
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import cancellation, metrics
+from .config import config
+from .ratelimit import HostRateLimiter
+
+# Responses that mean "slow down" rather than "failed"
+RETRY_STATUSES = (429, 503)
+
+
+class HttpTransport:
+    """
+    Pooled HTTP transport shared by the SSB, Elhub and Enova clients
+
+    Wraps a single requests.Session so that connections to the same host are
+    kept alive and reused across requests (and across clients), instead of
+    paying for a new TCP+TLS handshake on every call.
+
+    Every request first takes a slot from the process-wide per-host rate
+    limiter. 429 and 503 responses are retried with exponential backoff and
+    jitter, or after the server's Retry-After, and hold back every other
+    request to the same host for the same time. A Retry-After longer than
+    HTTP_BACKOFF_MAX is not waited out: the throttled response is returned
+    as is, instead of being retried before the server is ready.
+    """
+
+    DEFAULT_HEADERS = {
+        'User-Agent': 'GreenPulse-DataFetch/1.0',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    }
+
+    def __init__(self, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                 timeout: Optional[Tuple[float, float]] = None,
+                 rate_limiter: Optional[HostRateLimiter] = None, max_retries: Optional[int] = None):
+        """
+        Args:
+            pool_connections: Number of per-host connection pools to cache
+            pool_maxsize: Maximum connections kept alive per host
+            timeout: Default (connect, read) timeout in seconds
+            rate_limiter: Per-host limiter (defaults to the process-wide one)
+            max_retries: Retries on 429/503 before the response is returned as is
+        """
+        self.pool_connections = pool_connections or config.http_pool_connections
+        self.pool_maxsize = pool_maxsize or config.http_pool_maxsize
+        self.timeout = timeout or (config.http_connect_timeout, config.http_read_timeout)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = config.http_max_retries if max_retries is None else max_retries
+
+        self.session = requests.Session()
+        self.session.headers.update(self.DEFAULT_HEADERS)
+
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method: str, url: str, source: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session, applying the default timeout
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            source: Source name the request is reported under in the fetch
+                metrics (defaults to the host name)
+            **kwargs: requests arguments
+
+        Returns:
+            The final response, after any retries
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).hostname
+        event = {'host': host, 'method': method, 'status': None, 'retries': 0, 'bytes': None}
+        latency = waited = 0.0
+        # A fetch that timed out stops here instead of sending more requests
+        cancellation.check(source)
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                start = time.perf_counter()
+                self.rate_limiter.acquire(host)
+                sent = time.perf_counter()
+                response = self.send(method, url, **kwargs)
+                waited += sent - start
+                latency += time.perf_counter() - sent
+                event.update(status=response.status_code, retries=attempt)
+
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    break
+
+                delay = retry_delay(response, attempt)
+                if delay is None:
+                    print(f"⏳ {host} answered {response.status_code} and asked to wait "
+                          f"{response.headers.get('Retry-After')} - longer than HTTP_BACKOFF_MAX, not retrying")
+                    break
+                response.close()
+                print(f"⏳ {host} answered {response.status_code} - retrying in {delay:.1f}s "
+                      f"({attempt + 1}/{self.max_retries})")
+                self.rate_limiter.pause(host, delay)
+                time.sleep(delay)
+                waited += delay
+                cancellation.check(source)
+
+            if not kwargs.get('stream'):
+                event['bytes'] = len(response.content)
+            return response
+        except requests.RequestException as e:
+            event['error'] = type(e).__name__
+            raise
+        finally:
+            metrics.emit(metrics.REQUEST, source or host, seconds=round(latency, 6),
+                         wait_s=round(waited, 6), **event)
+
+    def send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a single attempt over the session; subclasses can redirect or record it"""
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+
+def retry_delay(response: requests.Response, attempt: int) -> Optional[float]:
+    """
+    Seconds to wait before retrying a throttled request
+
+    Uses the Retry-After header (seconds or HTTP date) when present, and
+    otherwise exponential backoff with full jitter, capped at
+    HTTP_BACKOFF_MAX.
+
+    Returns:
+        The delay, or None when Retry-After asks for longer than
+        HTTP_BACKOFF_MAX; retrying earlier would only get throttled again
+    """
+    retry_after = response.headers.get('Retry-After')
+    delay = None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                pass
+
+    if delay is not None:
+        return max(0.0, delay) if delay <= config.http_backoff_max else None
+
+    ceiling = min(config.http_backoff_max, config.http_backoff_base * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+_rate_limiter: Optional[HostRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Get the process-wide per-host rate limiter, shared by every transport"""
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = HostRateLimiter(config.http_rate_limits)
+        return _rate_limiter
+
+
+_default_transport: Optional[HttpTransport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Get the process-wide shared transport, creating it on first use"""
+    global _default_transport
+
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = _configured_transport()
+        return _default_transport
+
+
+def _configured_transport() -> HttpTransport:
+    # replay.py builds on HttpTransport, so it is imported only when asked for
+    if config.http_replay_url:
+        from .replay import StandInTransport
+        print(f"🎞️ Replaying HTTP requests from {config.http_replay_url}")
+        return StandInTransport(config.http_replay_url)
+    if config.http_record_dir:
+        from .replay import RecordingTransport
+        print(f"🎞️ Recording HTTP responses to {config.http_record_dir}")
+        return RecordingTransport(config.http_record_dir)
+    return HttpTransport()
+
+
+def set_transport(transport: Optional[HttpTransport]):
+    """Replace the process-wide shared transport (None resets to a fresh default)"""
+    global _default_transport
+
+    with _default_transport_lock:
+        if _default_transport is not None and _default_transport is not transport:
+            _default_transport.close()
+        _default_transport = transport
@@ -2,11 +2,9 @@
 Streamlit dashboard for GreenPulse sustainability data
 """
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import json
 from pathlib import Path
 import sys
 from datetime import datetime, timedelta
@@ -18,39 +16,49 @@ if str(project_root) not in sys.path:
 
 from src.data_fetch.sources.ssb import SSBDataProcessor
 from src.data_fetch.sources.elhub import ElhubDataProcessor
+from src.data_fetch.analytics_store import AnalyticsStore
+from src.data_fetch.repository import get_repository
+
+
+@st.cache_resource
+def get_analytics_store():
+    """One analytical store per dashboard process; it opens a connection per query"""
+    return AnalyticsStore(project_root / "data" / "processed" / "analytics.sqlite")
+
+
+def load_daily_summary(elhub_df):
+    """
+    Daily Elhub consumption, from the analytical store when it matches elhub_df
+    
+    The store's rollup is only used when it was loaded from the same Parquet
+    parts the repository read elhub_df from; after a fetch that has not been
+    loaded yet, the summary is aggregated from elhub_df so the charts and
+    tables agree.
+    
+    Args:
+        elhub_df: Hourly records, aggregated in memory when the store is behind
+        
+    Returns:
+        DataFrame with daily aggregated data
+    """
+    store = get_analytics_store()
+    repository = get_repository()
+    if repository.elhub_store.exists() and store.elhub_in_sync(repository.elhub_store):
+        daily_df = store.daily_summary()
+        if not daily_df.empty:
+            return daily_df
+    return ElhubDataProcessor.get_daily_summary(elhub_df)
 
 
 def load_data():
-    """Load all available data"""
-    data_dir = project_root / "data"
-    
-    # Load SSB emissions data
-    ssb_emissions = None
-    ssb_path = data_dir / "processed" / "ssb_emissions_clean.csv"
-    if ssb_path.exists():
-        ssb_emissions = pd.read_csv(ssb_path)
-    
-    # Load Elhub energy data
-    elhub_data = None
-    elhub_path = data_dir / "raw" / "elhub_energy_formatted.json"
-    if elhub_path.exists():
-        with open(elhub_path, 'r') as f:
-            elhub_raw = json.load(f)
-        elhub_data = ElhubDataProcessor.to_consumption_summary(elhub_raw)
-    
-    # Load Enova efficiency data
-    enova_companies = None
-    enova_projects = None
-    
-    companies_path = data_dir / "processed" / "company_efficiency_summary.csv"
-    if companies_path.exists():
-        enova_companies = pd.read_csv(companies_path)
-    
-    projects_path = data_dir / "processed" / "efficiency_projects.csv"
-    if projects_path.exists():
-        enova_projects = pd.read_csv(projects_path)
-    
-    return ssb_emissions, elhub_data, enova_companies, enova_projects
+    """Load all available data (cached until the files change)"""
+    repository = get_repository()
+    return (
+        repository.ssb_emissions(),
+        repository.elhub_consumption(),
+        repository.company_efficiency(),
+        repository.efficiency_projects()
+    )
 
 
 def plot_emissions_trend(df):
@@ -92,7 +100,7 @@ def plot_energy_consumption(df):
         return None
     
     # Daily summary
-    daily_df = ElhubDataProcessor.get_daily_summary(df)
+    daily_df = load_daily_summary(df)
     
     if daily_df.empty:
         return None
@@ -170,12 +178,14 @@ def plot_efficiency_projects(projects_df):
     if projects_df is None or projects_df.empty:
         return None
     
-    # Aggregate by year and project type
-    yearly_projects = projects_df.groupby(['year', 'project_type']).agg({
-        'investment_nok': 'sum',
-        'annual_savings_mwh': 'sum',
-        'co2_reduction_tonnes': 'sum'
-    }).reset_index()
+    # Aggregate by year and project type, in the analytical store if it has the table
+    totals = {'investment_nok': 'sum', 'annual_savings_mwh': 'sum', 'co2_reduction_tonnes': 'sum'}
+    store = get_analytics_store()
+    if 'efficiency_projects' in store.tables():
+        yearly_projects = store.query('efficiency_projects', columns=['year', 'project_type'],
+                                      aggregates=totals, order_by=['year', 'project_type'])
+    else:
+        yearly_projects = projects_df.groupby(['year', 'project_type'], observed=True).agg(totals).reset_index()
     
     fig = px.bar(
         yearly_projects,
@@ -323,9 +333,10 @@ def main():
             
             # Show data summary
             with st.expander("📋 View Energy Data Summary"):
-                daily_summary = ElhubDataProcessor.get_daily_summary(elhub_data)
+                daily_summary = load_daily_summary(elhub_data)
                 if not daily_summary.empty:
-                    st.dataframe(daily_summary)
+                    # date is datetime64 local midnight; show the calendar day only
+                    st.dataframe(daily_summary.assign(date=daily_summary['date'].dt.date))
                 else:
                     st.dataframe(elhub_data.head(20))
             
@@ -0,0 +1,51 @@
+"""
+Shared fixtures for the data pipeline tests
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.data_fetch.files import DataFileManager
+from src.data_fetch.sources.elhub import ElhubDataProcessor
+
+
+def elhub_response(price_area, start, hours, groups=('household',), quantity=1.0, area_id=None):
+    """Elhub API response body with one record per hour and consumption group"""
+    start = pd.Timestamp(start)
+    start = start.tz_convert('Europe/Oslo') if start.tzinfo else start.tz_localize('Europe/Oslo')
+    timestamps = pd.date_range(start, periods=hours, freq='h')
+    records = [
+        {
+            'startTime': timestamp.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'priceArea': price_area,
+            'consumptionGroup': group,
+            'quantityKwh': quantity,
+            'meteringPointCount': 10
+        }
+        for timestamp in timestamps
+        for group in groups
+    ]
+    return {
+        'data': [{
+            'id': area_id or price_area,
+            'attributes': {'country': 'NO', 'consumptionPerGroupMbaHour': records}
+        }]
+    }
+
+
+def elhub_records(price_area, start, hours, groups=('household',), quantity=1.0):
+    """Consumption summary frame, as ElhubDataProcessor builds it from a response"""
+    response = elhub_response(price_area, start, hours, groups, quantity)
+    return ElhubDataProcessor.to_consumption_summary({'raw_data': response})
+
+
+@pytest.fixture
+def file_manager(tmp_path):
+    return DataFileManager(tmp_path)
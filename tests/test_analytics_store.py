@@ -0,0 +1,69 @@
+"""
+Tests for the SQLite analytical store
+"""
+import pandas as pd
+
+from src.data_fetch.analytics_store import analytics_store, load_analytics_store
+from src.data_fetch.parquet_store import DEFAULT_DATASET, ElhubParquetStore
+
+from conftest import elhub_records
+
+PRODUCTION = 'PRODUCTION_PER_GROUP_MBA_HOUR'
+
+
+def elhub_store(file_manager, dataset=DEFAULT_DATASET):
+    return ElhubParquetStore(file_manager.processed_dir / 'elhub', dataset)
+
+
+def test_daily_summary_keeps_datasets_apart(file_manager):
+    elhub_store(file_manager).upsert(elhub_records('NO5', '2024-01-01', 48, quantity=1.0))
+    elhub_store(file_manager, PRODUCTION).upsert(elhub_records('NO5', '2024-01-01', 48, quantity=10.0))
+    load_analytics_store(file_manager, ['elhub'])
+    store = analytics_store(file_manager)
+
+    consumption = store.daily_summary()
+    every_dataset = store.daily_summary(dataset=None)
+
+    assert consumption['quantity_kwh'].tolist() == [24.0, 24.0]
+    assert consumption['date'].tolist() == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02')]
+    assert len(every_dataset) == 4
+    assert every_dataset.groupby('dataset')['quantity_kwh'].sum().to_dict() == {
+        DEFAULT_DATASET: 48.0, PRODUCTION: 480.0
+    }
+
+
+def test_daily_summary_filters_areas_and_days(file_manager):
+    elhub_store(file_manager).upsert(elhub_records('NO5', '2024-01-31', 48))
+    elhub_store(file_manager).upsert(elhub_records('NO1', '2024-01-31', 48))
+    load_analytics_store(file_manager, ['elhub'])
+
+    summary = analytics_store(file_manager).daily_summary(price_areas=['NO1'], start='2024-02-01')
+
+    assert summary[['date', 'price_area']].astype(str).values.tolist() == [['2024-02-01', 'NO1']]
+
+
+def test_only_changed_partitions_are_reloaded(file_manager):
+    store = elhub_store(file_manager)
+    store.upsert(elhub_records('NO5', '2024-01-31', 48))
+
+    assert load_analytics_store(file_manager, ['elhub']) == {'elhub': 48}
+    assert load_analytics_store(file_manager, ['elhub']) == {'elhub': 0}
+
+    store.upsert(elhub_records('NO5', '2024-02-01', 24, quantity=3.0))
+
+    assert load_analytics_store(file_manager, ['elhub']) == {'elhub': 24}
+    summary = analytics_store(file_manager).daily_summary()
+    assert summary['quantity_kwh'].tolist() == [24.0, 72.0]
+
+
+def test_in_sync_until_the_parquet_store_changes(file_manager):
+    store = elhub_store(file_manager)
+    store.upsert(elhub_records('NO5', '2024-01-31', 48))
+    analytics = analytics_store(file_manager)
+    assert not analytics.elhub_in_sync(store)
+
+    load_analytics_store(file_manager, ['elhub'])
+    assert analytics.elhub_in_sync(store)
+
+    store.upsert(elhub_records('NO5', '2024-02-01', 24, quantity=3.0))
+    assert not analytics.elhub_in_sync(store)
@@ -0,0 +1,90 @@
+"""
+Tests for the incremental Elhub ingest and its high-water marks
+"""
+import json
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.data_fetch.sources.elhub import ElhubBackfill
+
+from conftest import elhub_records, elhub_response
+
+
+class FakeElhubClient:
+    """Answers every window with one household record per hour"""
+
+    datasets = {'consumption': 'CONSUMPTION_PER_GROUP_MBA_HOUR'}
+
+    def __init__(self, failing_areas=()):
+        self.failing_areas = set(failing_areas)
+        self.windows = []
+
+    def fetch_window(self, entity_param, area, start, end, kind='consumption'):
+        self.windows.append((area, start, end))
+        if area in self.failing_areas:
+            raise RuntimeError("503 from Elhub")
+        hours = int((end - start) / timedelta(hours=1))
+        return json.dumps(elhub_response(area, start, hours)).encode('utf-8')
+
+
+def oslo(value):
+    return pd.Timestamp(value, tz='Europe/Oslo').to_pydatetime()
+
+
+def test_first_run_fetches_the_initial_lookback_and_sets_the_mark(file_manager):
+    backfill = ElhubBackfill(client=FakeElhubClient(), file_manager=file_manager, max_workers=1)
+
+    backfill.ingest_incremental(areas=['NO5'], until=datetime(2024, 1, 10))
+
+    assert backfill.high_water_mark('NO5') == oslo('2024-01-09 23:00')
+    assert len(backfill.store.read()) == 7 * 24
+
+
+def test_next_run_starts_overlap_before_the_mark_without_duplicates(file_manager):
+    client = FakeElhubClient()
+    backfill = ElhubBackfill(client=client, file_manager=file_manager, max_workers=1)
+    backfill.ingest_incremental(areas=['NO5'], until=datetime(2024, 1, 10))
+    client.windows.clear()
+
+    backfill.ingest_incremental(areas=['NO5'], until=datetime(2024, 1, 11), overlap=timedelta(hours=48))
+
+    assert min(start for _, start, _ in client.windows) == oslo('2024-01-07 23:00')
+    df = backfill.store.read()
+    assert len(df) == 8 * 24
+    assert df['timestamp'].is_unique
+    assert backfill.high_water_mark('NO5') == oslo('2024-01-10 23:00')
+
+
+def test_failed_window_does_not_advance_the_mark(file_manager):
+    backfill = ElhubBackfill(client=FakeElhubClient(), file_manager=file_manager, max_workers=1)
+    backfill.ingest_incremental(areas=['NO1', 'NO5'], until=datetime(2024, 1, 10))
+
+    backfill.client = FakeElhubClient(failing_areas=['NO1'])
+    summary = backfill.ingest_incremental(areas=['NO1', 'NO5'], until=datetime(2024, 1, 11))
+
+    assert summary['failed']
+    assert backfill.high_water_mark('NO1') == oslo('2024-01-09 23:00')
+    assert backfill.high_water_mark('NO5') == oslo('2024-01-10 23:00')
+
+
+def test_mark_never_moves_back(file_manager):
+    backfill = ElhubBackfill(client=FakeElhubClient(), file_manager=file_manager, max_workers=1)
+    backfill.ingest_incremental(areas=['NO5'], until=datetime(2024, 1, 10))
+
+    backfill.ingest(datetime(2024, 1, 1), datetime(2024, 1, 2), areas=['NO5'])
+
+    assert backfill.high_water_mark('NO5') == oslo('2024-01-09 23:00')
+
+
+def test_same_hour_under_another_area_id_is_replaced(file_manager):
+    backfill = ElhubBackfill(client=FakeElhubClient(), file_manager=file_manager, max_workers=1)
+    stored = elhub_records('NO5', '2024-01-01', 24)
+    stored['area_id'] = 'NO5-element'
+    backfill.store.upsert(stored)
+
+    backfill.store.upsert(elhub_records('NO5', '2024-01-01', 24, quantity=2.0))
+
+    df = backfill.store.read()
+    assert len(df) == 24
+    assert df['quantity_kwh'].eq(2.0).all()
@@ -0,0 +1,103 @@
+"""
+Tests for the concurrent Elhub endpoint probe
+"""
+import json
+import threading
+import time
+
+from src.data_fetch.sources.elhub import ElhubApiClient
+
+
+class FakeResponse:
+    """Streamed response that records whether its body was read"""
+
+    def __init__(self, url, status_code=200, body=b'{"data": []}'):
+        self.url = url
+        self.status_code = status_code
+        self._body = body
+        self.read = False
+        self.closed = threading.Event()
+
+    @property
+    def content(self):
+        self.read = True
+        return self._body
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def iter_content(self, chunk_size=1):
+        self.read = True
+        yield self._body
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeTransport:
+    """
+    Answers each endpoint path with a status (404 if not given)
+
+    'price-areas' answers only once the winner's body has been read, so it
+    always loses the race.
+    """
+
+    def __init__(self, statuses, winner=None):
+        self.statuses = statuses
+        self.responses = {}
+        self.winner_read = threading.Event()
+        if winner is None:
+            self.winner_read.set()
+        self.winner = winner
+
+    def get(self, url, **kwargs):
+        path = url.rsplit('/', 1)[1]
+        key = (path, kwargs['params']['dataset'])
+        if path == 'price-areas':
+            self.winner_read.wait(5)
+        response = FakeResponse(url, self.statuses.get(key, 404))
+        if key == self.winner:
+            response.closed = self.winner_read
+        self.responses[key] = response
+        return response
+
+
+CONSUMPTION = 'CONSUMPTION_PER_GROUP_MBA_HOUR'
+PRODUCTION = 'PRODUCTION_PER_GROUP_MBA_HOUR'
+
+
+def answered(transport, key, timeout=5.0):
+    """Response a probe got for an endpoint, waiting for the probe to finish"""
+    deadline = time.monotonic() + timeout
+    while key not in transport.responses and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return transport.responses[key]
+
+
+def test_losing_probes_are_closed_without_reading_their_bodies():
+    transport = FakeTransport({('grid-areas', CONSUMPTION): 200, ('price-areas', CONSUMPTION): 200,
+                               ('price-areas', PRODUCTION): 200},
+                              winner=('grid-areas', CONSUMPTION))
+    client = ElhubApiClient(transport=transport)
+
+    result, candidate = client._probe_endpoints(client.ENDPOINT_CANDIDATES)
+
+    assert candidate == ('consumption', 'Grid Areas', 'grid-areas')
+    assert result['data'] == json.loads(b'{"data": []}')
+    assert transport.responses[('grid-areas', CONSUMPTION)].read
+    for key in [('price-areas', CONSUMPTION), ('price-areas', PRODUCTION)]:
+        loser = answered(transport, key)
+        assert loser.closed.wait(5)
+        assert not loser.read
+
+
+def test_production_is_used_once_every_consumption_probe_failed():
+    transport = FakeTransport({('grid-areas', PRODUCTION): 200})
+    client = ElhubApiClient(transport=transport)
+
+    result, candidate = client._probe_endpoints(client.ENDPOINT_CANDIDATES, stream=True)
+
+    assert candidate == ('production', 'Grid Areas', 'grid-areas')
+    assert result['body'].read() == b'{"data": []}'
+    result['body'].close()
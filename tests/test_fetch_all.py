@@ -0,0 +1,57 @@
+"""
+Tests for the concurrent fetch orchestration
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.data_fetch import cancellation, fetch_all
+from src.data_fetch.cancellation import FetchCancelled
+from src.data_fetch.transport import HttpTransport
+
+
+def test_timed_out_source_stops_before_its_next_write(file_manager, monkeypatch):
+    errors = []
+    finished = threading.Event()
+
+    def slow_fetch(file_manager):
+        time.sleep(0.3)
+        try:
+            file_manager.save_raw_json(b'{}', 'ssb_emissions.json')
+        except FetchCancelled as e:
+            errors.append(e)
+        finally:
+            finished.set()
+
+    monkeypatch.setattr(fetch_all, 'SOURCE_FETCHERS', {'ssb': ("📊 slow", slow_fetch)})
+
+    summary = asyncio.run(fetch_all.fetch_all_data_async({'ssb': 0.05}, file_manager))
+    finished.wait(5)
+
+    assert summary['ssb']['status'] == 'timeout'
+    assert len(errors) == 1
+    assert not (file_manager.raw_dir / 'ssb_emissions.json').exists()
+    assert file_manager.writes == []
+
+
+def test_cancelled_source_sends_no_requests():
+    cancellation.cancel('ssb')
+    try:
+        with pytest.raises(FetchCancelled):
+            HttpTransport().get('http://127.0.0.1:9/never-sent', source='ssb')
+    finally:
+        cancellation.reset('ssb')
+
+
+def test_next_run_resets_the_cancellation(file_manager, monkeypatch):
+    cancellation.cancel('ssb')
+    monkeypatch.setattr(fetch_all, 'SOURCE_FETCHERS', {
+        'ssb': ("📊 quick", lambda fm: fm.save_raw_json(b'{}', 'ssb_emissions.json'))
+    })
+
+    summary = asyncio.run(fetch_all.fetch_all_data_async(file_manager=file_manager))
+
+    assert summary['ssb']['status'] == 'success'
+    assert (file_manager.raw_dir / 'ssb_emissions.json').exists()
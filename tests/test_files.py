@@ -0,0 +1,32 @@
+"""
+Tests for the atomic writes and the file hash manifest
+"""
+
+
+def write_text(file_manager, path, text):
+    return file_manager.write_atomic(path, lambda f: f.write(text.encode('utf-8')))
+
+
+def test_unchanged_write_records_the_digest(file_manager):
+    path = file_manager.raw_dir / 'ssb_emissions.json'
+    write_text(file_manager, path, '{"value": 1}')
+    key = file_manager._manifest_key(path)
+    file_manager.file_hashes.delete(key)
+    mtime_ns = path.stat().st_mtime_ns
+
+    write_text(file_manager, path, '{"value": 1}')
+
+    assert path.stat().st_mtime_ns == mtime_ns
+    assert file_manager.file_hashes.get(key)['mtime_ns'] == mtime_ns
+    assert file_manager.writes == [{'path': path, 'bytes': path.stat().st_size, 'rows': None}]
+
+
+def test_changed_write_replaces_the_digest(file_manager):
+    path = file_manager.raw_dir / 'ssb_emissions.json'
+    write_text(file_manager, path, '{"value": 1}')
+    first = file_manager.file_digest(path)
+
+    write_text(file_manager, path, '{"value": 2}')
+
+    assert file_manager.file_digest(path) != first
+    assert len(file_manager.writes) == 2
@@ -0,0 +1,113 @@
+"""
+Tests for the partitioned Elhub Parquet store
+"""
+import threading
+
+import pandas as pd
+
+from src.data_fetch.parquet_store import ElhubParquetStore
+
+from conftest import elhub_records
+
+
+def test_upsert_replaces_rows_with_the_same_key(tmp_path):
+    store = ElhubParquetStore(tmp_path)
+    store.upsert(elhub_records('NO5', '2024-01-01', 48, quantity=1.0))
+    store.upsert(elhub_records('NO5', '2024-01-02', 24, quantity=2.0))
+
+    df = store.read()
+    assert len(df) == 48
+    assert df['timestamp'].is_unique
+    assert df.loc[df['timestamp'] >= pd.Timestamp('2024-01-02', tz='Europe/Oslo'), 'quantity_kwh'].eq(2.0).all()
+    assert df.loc[df['timestamp'] < pd.Timestamp('2024-01-02', tz='Europe/Oslo'), 'quantity_kwh'].eq(1.0).all()
+
+
+def test_write_batches_keeps_hours_stored_by_upsert(tmp_path):
+    store = ElhubParquetStore(tmp_path)
+    store.upsert(elhub_records('NO5', '2024-01-01', 744))
+
+    store.write_batches([elhub_records('NO5', '2024-01-31', 24, quantity=5.0)])
+
+    df = store.read()
+    assert len(df) == 744
+    assert df['quantity_kwh'].eq(5.0).sum() == 24
+
+
+def test_write_batches_merges_batches_of_one_stream(tmp_path):
+    store = ElhubParquetStore(tmp_path)
+    batches = [elhub_records('NO1', '2024-01-01', 24), elhub_records('NO1', '2024-01-01T12', 24, quantity=3.0)]
+
+    assert store.write_batches(batches) == 48
+
+    df = store.read()
+    assert len(df) == 36
+    assert df['quantity_kwh'].eq(3.0).sum() == 24
+    partition = store.partition_dir('NO1', '2024-01')
+    assert [path.name.startswith('part-merged-') for path in partition.iterdir()] == [True]
+
+
+def test_write_batches_replace_only_touches_written_partitions(tmp_path):
+    store = ElhubParquetStore(tmp_path)
+    store.upsert(elhub_records('NO5', '2024-01-01', 48))
+    store.upsert(elhub_records('NO1', '2024-01-01', 48))
+
+    store.write_batches([elhub_records('NO5', '2024-01-10', 24, quantity=7.0)], replace=True)
+
+    df = store.read()
+    assert len(df[df['price_area'] == 'NO5']) == 24
+    assert len(df[df['price_area'] == 'NO1']) == 48
+
+
+def test_read_prunes_areas_time_and_columns(tmp_path):
+    store = ElhubParquetStore(tmp_path)
+    store.upsert(elhub_records('NO5', '2024-01-30', 96))
+    store.upsert(elhub_records('NO1', '2024-01-30', 96))
+
+    df = store.read(price_areas=['NO5'], start='2024-02-01', end='2024-02-02', columns=['timestamp', 'quantity_kwh'])
+
+    assert list(df.columns) == ['timestamp', 'quantity_kwh']
+    assert len(df) == 24
+    assert df['timestamp'].min() == pd.Timestamp('2024-02-01', tz='Europe/Oslo')
+
+
+def test_readers_never_see_an_empty_partition_during_writes(tmp_path):
+    store = ElhubParquetStore(tmp_path)
+    store.upsert(elhub_records('NO5', '2024-01-01', 744))
+    counts = []
+    errors = []
+    done = threading.Event()
+
+    def read_until_done():
+        while not done.is_set():
+            try:
+                counts.append(len(store.read(columns=['timestamp'])))
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read_until_done)
+    reader.start()
+    try:
+        for day in range(1, 10):
+            store.write_batches([elhub_records('NO5', f'2024-01-{day:02d}', 24, quantity=day)])
+    finally:
+        done.set()
+        reader.join()
+
+    assert not errors
+    assert counts and min(counts) == max(counts) == 744
+
+
+def test_stores_on_the_same_directory_share_partition_locks(tmp_path):
+    stores = [ElhubParquetStore(tmp_path) for _ in range(8)]
+    threads = [
+        threading.Thread(target=store.upsert, args=(elhub_records('NO5', f'2024-01-{day + 1:02d}', 24),))
+        for day, store in enumerate(stores)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    df = ElhubParquetStore(tmp_path).read()
+    assert len(df) == 8 * 24
+    assert df['timestamp'].is_unique
@@ -0,0 +1,76 @@
+"""
+Tests for the pipeline scheduler
+"""
+import time
+
+from src.data_fetch.pipeline import Pipeline, Stage
+
+
+def copy_stage(name, source, target, calls):
+    def run():
+        calls.append(name)
+        target.write_text(source.read_text())
+    return Stage(name, run, inputs=[source], outputs=[target])
+
+
+def test_stage_is_skipped_while_its_inputs_are_unchanged(file_manager, tmp_path):
+    source, target = tmp_path / 'in.txt', tmp_path / 'out.txt'
+    source.write_text('a')
+    calls = []
+    stage = copy_stage('copy', source, target, calls)
+
+    first = Pipeline(file_manager, [stage]).run()
+    second = Pipeline(file_manager, [stage]).run()
+    source.write_text('b')
+    third = Pipeline(file_manager, [stage]).run()
+
+    assert [report['stages']['copy']['status'] for report in (first, second, third)] == \
+        ['success', 'skipped', 'success']
+    assert calls == ['copy', 'copy']
+    assert target.read_text() == 'b'
+
+
+def test_stage_reruns_when_output_is_missing_or_forced(file_manager, tmp_path):
+    source, target = tmp_path / 'in.txt', tmp_path / 'out.txt'
+    source.write_text('a')
+    calls = []
+    stage = copy_stage('copy', source, target, calls)
+    Pipeline(file_manager, [stage]).run()
+
+    target.unlink()
+    Pipeline(file_manager, [stage]).run()
+    Pipeline(file_manager, [stage]).run(force=True)
+
+    assert calls == ['copy', 'copy', 'copy']
+
+
+def test_failed_stage_blocks_downstream_and_keeps_no_fingerprint(file_manager, tmp_path):
+    source, middle = tmp_path / 'in.txt', tmp_path / 'middle.txt'
+    source.write_text('a')
+    pipeline = Pipeline(file_manager, [
+        Stage('produce', lambda: False, inputs=[source], outputs=[middle]),
+        Stage('consume', lambda: None, inputs=[middle]),
+    ])
+
+    report = pipeline.run()
+
+    assert report['stages']['produce']['status'] == 'failed'
+    assert report['stages']['consume']['status'] == 'blocked'
+    assert pipeline.state.get('produce') is None
+
+
+def test_critical_path_follows_the_slowest_chain(file_manager):
+    def sleep(seconds):
+        return lambda: time.sleep(seconds)
+
+    pipeline = Pipeline(file_manager, [
+        Stage('fetch_fast', sleep(0.01)),
+        Stage('fetch_slow', sleep(0.2)),
+        Stage('process', sleep(0.05), after=['fetch_fast', 'fetch_slow']),
+        Stage('report', sleep(0.01)),
+    ])
+
+    report = pipeline.run()
+
+    assert report['critical_path'] == ['fetch_slow', 'process']
+    assert report['critical_path_s'] >= 0.25
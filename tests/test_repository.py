@@ -0,0 +1,96 @@
+"""
+Tests for the DataRepository frame cache
+"""
+import os
+
+import pandas as pd
+
+from src.data_fetch.parquet_store import parts_identity
+from src.data_fetch.repository import DataRepository
+
+from conftest import elhub_records, elhub_response
+
+
+def save_table(file_manager, values, name='readings'):
+    file_manager.save_processed_table(pd.DataFrame({'value': values}), name)
+
+
+def test_repeated_reads_hit_the_cache(file_manager):
+    save_table(file_manager, [1, 2, 3])
+    repository = DataRepository(file_manager)
+
+    first = repository.table('readings')
+    second = repository.table('readings')
+    second['value'] = 0
+
+    assert repository.cache_info()['hits'] == 1
+    assert repository.table('readings')['value'].tolist() == first['value'].tolist() == [1, 2, 3]
+
+
+def test_rewritten_file_invalidates_the_entry(file_manager):
+    save_table(file_manager, [1, 2, 3])
+    repository = DataRepository(file_manager)
+    repository.table('readings')
+
+    save_table(file_manager, [4, 5])
+
+    assert repository.table('readings')['value'].tolist() == [4, 5]
+    assert repository.cache_info()['misses'] == 2
+    assert repository.cache_info()['entries'] == 1
+
+
+def test_least_recently_used_entry_is_evicted(file_manager):
+    for name in ('first', 'second', 'third'):
+        save_table(file_manager, list(range(1000)), name)
+    probe = DataRepository(file_manager)
+    probe.table('first')
+    entry_bytes = probe.cache_info()['bytes']
+    repository = DataRepository(file_manager, max_bytes=2 * entry_bytes)
+
+    repository.table('first')
+    repository.table('second')
+    repository.table('first')
+    repository.table('third')
+
+    assert repository.cache_info()['evictions'] == 1
+    assert list(repository._cache) == ['first', 'third']
+
+
+def test_elhub_selections_are_cached_separately(file_manager):
+    repository = DataRepository(file_manager)
+    repository.elhub_store.upsert(elhub_records('NO5', '2024-01-01', 48))
+    repository.elhub_store.upsert(elhub_records('NO1', '2024-01-01', 48))
+
+    everything = repository.elhub_consumption()
+    no5_day = repository.elhub_consumption(price_areas=['NO5'], start='2024-01-02', columns=['timestamp'])
+
+    assert len(everything) == 96
+    assert list(no5_day.columns) == ['timestamp'] and len(no5_day) == 24
+    assert repository.cache_info()['entries'] == 2
+
+    repository.elhub_store.upsert(elhub_records('NO5', '2024-01-03', 24))
+
+    assert len(repository.elhub_consumption(price_areas=['NO5'], start='2024-01-02', columns=['timestamp'])) == 48
+    assert repository.cache_info()['hits'] == 0
+
+
+def test_elhub_json_fallback_applies_the_selection(file_manager):
+    repository = DataRepository(file_manager)
+    response = {'raw_data': elhub_response('NO5', '2024-01-01', 48)}
+    file_manager.save_formatted_json(response, 'elhub_energy_formatted.json')
+
+    df = repository.elhub_consumption(end='2024-01-02', columns=['timestamp', 'quantity_kwh'])
+
+    assert list(df.columns) == ['timestamp', 'quantity_kwh']
+    assert len(df) == 24
+
+
+def test_parts_identity_skips_vanished_files(tmp_path):
+    kept, vanished = tmp_path / 'part-a.parquet', tmp_path / 'part-b.parquet'
+    kept.write_bytes(b'a')
+
+    identity = parts_identity([kept, vanished])
+    assert identity == parts_identity([kept])
+
+    os.utime(kept, ns=(0, 0))
+    assert parts_identity([kept]) != identity
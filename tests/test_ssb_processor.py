@@ -0,0 +1,57 @@
+"""
+Tests for the SSB JSON-stat2 processing
+"""
+from src.data_fetch.columnar import read_table
+from src.data_fetch.sources.ssb import SSBDataProcessor
+
+
+def emissions_response(values, decimals=0):
+    """JSON-stat2 body of the emissions table with one value per year from 2010"""
+    years = [str(2010 + i) for i in range(len(values))]
+    return {
+        'id': ['UtslpTilLuft', 'UtslpKomp', 'ContentsCode', 'Tid'],
+        'size': [1, 1, 1, len(values)],
+        'value': values,
+        'extension': {'px': {'tableid': '13931', 'decimals': decimals}},
+        'dimension': {
+            'UtslpTilLuft': {'category': {'index': {'0': 0}, 'label': {'0': 'All sources'}}},
+            'UtslpKomp': {'category': {'index': {'A10': 0}, 'label': {'A10': 'Greenhouse gases total'}}},
+            'ContentsCode': {'category': {'index': {'UtslippCO2ekvival': 0},
+                                          'label': {'UtslippCO2ekvival': 'Emissions'}}},
+            'Tid': {'category': {'index': {year: i for i, year in enumerate(years)},
+                                 'label': {year: year for year in years}}},
+        },
+    }
+
+
+def test_fractional_values_are_not_rounded_before_conversion():
+    result = SSBDataProcessor.process(emissions_response([54854.4, 53000.0]))
+
+    clean = result['clean_csv']
+    assert clean['emissions_ktCO2e'].tolist() == [54854.4, 53000.0]
+    assert clean['emissions_MtCO2e'].tolist() == [54.85, 53.0]
+
+
+def test_whole_values_stay_integers():
+    raw = SSBDataProcessor.process(emissions_response([51348, 48987]))['raw_csv']
+
+    assert str(raw['UtslippCO2ekvival'].dtype) == 'Int64'
+    assert raw['table_id'].eq('08940').all()
+
+
+def test_summary_skips_missing_values():
+    summary = SSBDataProcessor.process(emissions_response([51348, 48987, None]))['summary']
+
+    assert summary['latest_emissions'] == {'year': 2011, 'value_ktCO2e': 48987}
+    assert summary['peak_emissions'] == {'value_ktCO2e': 51348, 'year': 2010}
+    assert summary['data_points'] == 3
+
+
+def test_fractional_clean_table_is_saved(file_manager):
+    clean = SSBDataProcessor.process(emissions_response([1234.5, 53000.0]))['clean_csv']
+
+    path = file_manager.save_processed_table(clean, 'ssb_emissions_clean')
+
+    saved = read_table(path)
+    assert saved['emissions_ktCO2e'].tolist() == [1234.5, 53000.0]
+    assert saved['emissions_MtCO2e'].tolist() == [1.23, 53.0]
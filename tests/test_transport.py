@@ -0,0 +1,57 @@
+"""
+Tests for the retry behaviour of the pooled HTTP transport
+"""
+import requests
+
+from src.data_fetch.config import config
+from src.data_fetch.transport import HttpTransport, retry_delay
+
+
+def throttled(status=429, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = b''
+    response._content_consumed = True
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return response
+
+
+class ScriptedTransport(HttpTransport):
+    """Answers with the given responses in order instead of sending anything"""
+
+    def __init__(self, responses, **kwargs):
+        super().__init__(**kwargs)
+        self.responses = list(responses)
+        self.sent = 0
+
+    def send(self, method, url, **kwargs):
+        self.sent += 1
+        return self.responses.pop(0)
+
+
+def test_retry_after_within_the_cap_is_honoured():
+    assert retry_delay(throttled(retry_after='2'), 0) == 2.0
+
+
+def test_retry_after_beyond_the_cap_is_not_shortened():
+    assert retry_delay(throttled(retry_after=str(config.http_backoff_max + 240)), 0) is None
+    assert retry_delay(throttled(retry_after='Wed, 21 Oct 2099 07:28:00 GMT'), 0) is None
+
+
+def test_long_retry_after_returns_the_throttled_response():
+    transport = ScriptedTransport([throttled(retry_after='300'), throttled(status=200)], max_retries=3)
+
+    response = transport.get('http://transport.test/data')
+
+    assert response.status_code == 429
+    assert transport.sent == 1
+
+
+def test_short_retry_after_is_retried():
+    transport = ScriptedTransport([throttled(retry_after='0'), throttled(status=200)], max_retries=3)
+
+    response = transport.get('http://transport.test/data')
+
+    assert response.status_code == 200
+    assert transport.sent == 2